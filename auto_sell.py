@@ -1,22 +1,44 @@
 
     
 
-import requests
+import asyncio
+import queue
+import threading
+import httpx
 from loguru import logger
 import json
 from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
 from solana.rpc.commitment import Commitment
 from solders.keypair import Keypair
 import sys
 from configparser import ConfigParser
 import base58, logging,time, re, os,sys, json
 from raydium.Raydium import *
-from pumpfun.pump_fun import pf_sell
+from pumpfun.pump_fun import pf_sell, pf_sell_async, pf_sell_staged_async, pf_sell_staged_batch_async, FEE_RECIPIENT
+from pumpfun.coin_data import get_coin_data_many, get_coin_data_many_async
+from engine.wallet_watcher import WalletWatcher, ws_url_from_http
+from engine.scheduler import SellScheduler
+from engine.state_store import open_token_store
+from engine.registry import TokenRecord, TokenRegistry
+from raydium.pool_refresher import get_pool_refresher
+from engine.mint_cache import mint_cache
+from engine.confirmation import ConfirmationService, set_confirmation_service
+from engine.blockhash import BlockhashProvider, set_blockhash_provider
+from engine.prestage import SellStager
+from engine.sender import FanoutSender, set_transaction_sender
+from engine.http_pool import http_pool
+from engine.fees import FeeEstimator, set_fee_estimator, track_accounts
+from engine.executor import SellExecutor, PENDING, SENT
+from dexscreener import token_pairs
+from pumpfun.pda_cache import pda_cache
+from raydium.lookup_tables import LookupTableManager, set_lookup_table_manager, get_lookup_table_manager
+from raydium.create_close_account import fetch_pool_keys
+from solders.pubkey import Pubkey
 
 
-def get_assets_by_owner(RPC_URL, wallet_address):
-    logger.info("Checking Wallet for New Tokens")
-    payload = {
+def _assets_payload(wallet_address):
+    return {
         "jsonrpc": "2.0",
         "id": "my-id",
         "method": "getAssetsByOwner",
@@ -30,164 +52,457 @@ def get_assets_by_owner(RPC_URL, wallet_address):
         }
     }
 
+
+def _parse_assets(data):
+    """SPL tokens with a balance from a getAssetsByOwner reply, or None when the reply is
+    a JSON-RPC error (a rate limit answers 200 with an error body)."""
+    if "result" not in data:
+        logger.error("No result found in response: {}", data.get("error"))
+        return None
+    spl_tokens = []
+    assets = data["result"]["items"]
+    for asset in assets:
+        interface_type = asset.get("interface", "")
+        if interface_type == "V1_NFT":
+            continue  # Skip NFT assets
+        token_info = asset.get("token_info", {})
+        balance = token_info.get("balance", None)
+        if balance and float(balance) > 0:
+            spl_tokens.append({
+                "id": asset["id"],
+                "symbol": token_info.get("symbol", ""),
+                "balance": balance,
+                "token_info": token_info
+            })
+    for token in spl_tokens:
+        logger.info("Token ID: {}", token["id"])
+        logger.info("Symbol: {}", token["symbol"])
+        logger.info("Balance: {}", token["balance"])
+        logger.info("Metadata: {}", token["token_info"])
+    return spl_tokens
+
+
+def get_assets_by_owner(RPC_URL, wallet_address):
+    """Returns None when the scan itself failed, so callers can tell "no tokens" apart
+    from "could not look"."""
+    logger.info("Checking Wallet for New Tokens")
+    payload = _assets_payload(wallet_address)
+
     headers = {
         "Content-Type": "application/json"
     }
 
-    response = requests.post(RPC_URL, headers=headers, json=payload)
-    
-    if response.status_code == 200:
-        data = response.json()
-        if "result" in data:
-            assets = data["result"]["items"]
-            spl_tokens = []
-            for asset in assets:
-                interface_type = asset.get("interface", "")
-                if interface_type == "V1_NFT":
-                    continue  # Skip NFT assets
-                token_info = asset.get("token_info", {})
-                balance = token_info.get("balance", None)
-                if balance and float(balance) > 0:
-                    spl_tokens.append({
-                        "id": asset["id"],
-                        "symbol": token_info.get("symbol", ""),
-                        "balance": balance,
-                        "token_info": token_info
-                    })
-            for token in spl_tokens:
-                logger.info("Token ID: {}", token["id"])
-                logger.info("Symbol: {}", token["symbol"])
-                logger.info("Balance: {}", token["balance"])
-                logger.info("Metadata: {}", token["token_info"])
-        else:
-            logger.error("No result found in response")
-    else:
+    try:
+        response = http_pool.post(RPC_URL, headers=headers, json=payload)
+    except httpx.HTTPError as e:
+        logger.error("Error: {}", e)
+        return None
+
+    if response.status_code != 200:
         logger.error("Error: {}, {}", response.status_code, response.text)
-        
-        
+        return None
+
+    spl_tokens = _parse_assets(response.json())
     logger.info(f"Current SPL Tokens {spl_tokens}")
     return spl_tokens
 
 
-def write_wallet_tokens(tokens):
+async def get_assets_by_owner_async(http, RPC_URL, wallet_address):
+    """Async scan on a shared httpx.AsyncClient. Returns None when the scan itself failed,
+    so callers can tell "no tokens" apart from "could not look"."""
+    logger.info("Checking Wallet for New Tokens")
+    try:
+        response = await http.post(RPC_URL, json=_assets_payload(wallet_address))
+    except httpx.HTTPError as e:
+        logger.error("Error: {}", e)
+        return None
+
+    if response.status_code != 200:
+        logger.error("Error: {}, {}", response.status_code, response.text)
+        return None
+
+    spl_tokens = _parse_assets(response.json())
+    logger.info(f"Current SPL Tokens {spl_tokens}")
+    return spl_tokens
+
+
+def write_wallet_tokens(tokens, registry):
     
 
-    # clear wallet_tokens.json if no SPL tokens are detected
+    # a failed scan (None) says nothing about the wallet
+    if tokens is None:
+        return []
+
+    # clear the token registry if no SPL tokens are detected
     if not tokens:
-        with open("data/wallet_tokens.json", "w") as file:
-            file.write("[]")
-        logger.info("Wallet tokens JSON file cleared")
-        return
+        registry.clear()
+        logger.info("Wallet tokens cleared")
+        return []
     
     current_time = int(time.time())
-    
-    # Load existing data from the JSON file
-    try:
-        with open("data/wallet_tokens.json", "r") as file:
-            existing_tokens = json.load(file)
-    except FileNotFoundError:
-        existing_tokens = []
 
-    # Filter out existing tokens and add new tokens using list comprehensions
+    # New tokens are the scanned mints the registry does not know yet
+    scanned = {token.get("id"): token for token in tokens}
+    new_ids = registry.new_ids(scanned)
     new_tokens = [
-        {
-            "symbol": token.get("token_info", {}).get("symbol", ""),
-            "token_id": token.get("id"),
-            "balance": token.get("token_info", {}).get("balance", ""),
-            "detection_time": current_time
-        }
-        for token in tokens
-        if not any(existing_token.get("token_id") == token.get("id") for existing_token in existing_tokens)
+        TokenRecord(
+            token_id=token_id,
+            symbol=token.get("token_info", {}).get("symbol", ""),
+            balance=token.get("token_info", {}).get("balance", ""),
+            detection_time=current_time,
+        )
+        for token_id, token in scanned.items()
+        if token_id in new_ids
     ]
 
-    # Append new tokens to the existing data
-    existing_tokens.extend(new_tokens)
+    # Only the new tokens are written
+    return registry.add(new_tokens)
 
-    # Write the updated data back to the JSON file
-    with open("data/wallet_tokens.json", "w") as file:
-        json.dump(existing_tokens, file, indent=4)
+def track_wallet_tokens(tokens, registry, scheduler, stager, threshold_seconds):
+    """Records a wallet scan for the async engine and schedules the new tokens' sells;
+    returns the new tokens. A failed scan (None) leaves everything as it is, an empty
+    wallet drops every pending sell."""
+    if tokens is None:
+        return []
+    new_tokens = write_wallet_tokens(tokens, registry)
+    if not tokens:
+        scheduler.clear()
+        stager.clear()
+    for token in new_tokens:
+        scheduler.schedule(token.token_id, token.detection_time + threshold_seconds, token)
+    return new_tokens
 
-def detect_old_tokens(json_file, threshold_seconds):
+def detect_old_tokens(registry, threshold_seconds):
     current_time = int(time.time())
-
-    try:
-        with open(json_file, "r") as file:
-            existing_tokens = json.load(file)
-    except FileNotFoundError:
-        existing_tokens = []
-
-    # Use a list comprehension to filter old tokens
-    old_tokens = [
-        token for token in existing_tokens
-        if current_time - token.get("detection_time", 0) > threshold_seconds
-    ]
-
-    return old_tokens
+    return registry.due(current_time, threshold_seconds)
 
 
-def remove_token_from_json(token_id):
-    json_file = "data/wallet_tokens.json"
-    
-    try:
-        # Load existing data from the JSON file
-        with open(json_file, "r") as file:
-            existing_tokens = json.load(file)
-    except FileNotFoundError:
-        # If the file doesn't exist, there's nothing to remove
-        return
+def remove_token(registry, token_id):
+    registry.remove(token_id)
 
-    # Filter out the token to be removed
-    updated_tokens = [token for token in existing_tokens if token.get("token_id") != token_id]
 
-    # Write the updated data back to the JSON file
-    with open(json_file, "w") as file:
-        json.dump(updated_tokens, file, indent=4)
+def load_config():
+    config = ConfigParser()
+    config.read(os.path.join(sys.path[0], 'data', 'config.ini'))
+    return {
+        # Infura settings - register at infura and get your mainnet url.
+        "rpc_url": config.get("DEFAULT", "SOLANA_RPC_URL"),
+        # Wallet Address
+        "wallet_address": config.get("DEFAULT", "WALLET_ADDRESS"),
+        # Wallets private key
+        "private_key": config.get("DEFAULT", "PRIVATE_KEY"),
+        # Time to Hold
+        "threshold_seconds": int(config.get("DEFAULT", "X_SECONDS")),
+        "percentage": float(config.get("DEFAULT", "PERCENT_TO_SELL")),
+        "slippage": float(config.get('DEFAULT', "SLIPPAGE")),
+        # "sync" (default) or "async"
+        "engine": config.get("DEFAULT", "ENGINE", fallback="sync").strip().lower(),
+        # async engine only: "poll" (default) or "websocket"
+        "watcher": config.get("DEFAULT", "WATCHER", fallback="poll").strip().lower(),
+        "ws_url": config.get("DEFAULT", "SOLANA_WS_URL", fallback="").strip(),
+        # "json" (default), "sqlite" or "journal"
+        "state_backend": config.get("DEFAULT", "STATE_BACKEND", fallback="json"),
+        "state_path": config.get("DEFAULT", "STATE_PATH", fallback="").strip() or None,
+        # optional file to keep derived pump.fun addresses across restarts
+        "pda_cache_path": config.get("DEFAULT", "PDA_CACHE_PATH", fallback="").strip() or None,
+        # "poll" (batched getSignatureStatuses) or "websocket" (signatureSubscribe + poll fallback)
+        "confirmation": config.get("DEFAULT", "CONFIRMATION", fallback="poll"),
+        # extra RPC endpoints every sell is broadcast to, comma separated
+        "send_rpc_urls": [url.strip() for url in config.get("DEFAULT", "SEND_RPC_URLS", fallback="").split(",") if url.strip()],
+        # HTTP/2 for off-chain calls (needs the optional h2 package)
+        "http2": config.getboolean("DEFAULT", "HTTP2", fallback=False),
+        # async engine only: pack staged pump.fun sells that come due together into shared transactions
+        "batch_sells": config.getboolean("DEFAULT", "BATCH_SELLS", fallback=False),
+        # optional file; when set, every Raydium pool traded gets an address lookup table kept there
+        "lookup_table_path": config.get("DEFAULT", "LOOKUP_TABLE_PATH", fallback="").strip() or None,
+        # "static" (fixed unit price) or "adaptive" (percentile of recent prioritization fees)
+        "priority_fee": config.get("DEFAULT", "PRIORITY_FEE", fallback="static").strip().lower(),
+        "priority_fee_percentile": config.getfloat("DEFAULT", "PRIORITY_FEE_PERCENTILE", fallback=75),
+        # micro-lamports per compute unit
+        "max_unit_price": config.getint("DEFAULT", "MAX_UNIT_PRICE", fallback=5_000_000),
+        # async engine only: size compute unit limits from simulateTransaction of staged sells
+        "simulate_units": config.getboolean("DEFAULT", "SIMULATE_UNITS", fallback=False),
+        # sells running at once, and attempts per token before giving up on it
+        "sell_workers": config.getint("DEFAULT", "SELL_WORKERS", fallback=4),
+        "sell_attempts": config.getint("DEFAULT", "SELL_ATTEMPTS", fallback=3),
+    }
 
 
 def main():
     
     # Load Configs
-    config = ConfigParser()
-    config.read(os.path.join(sys.path[0], 'data', 'config.ini'))
-    
-    # Infura settings - register at infura and get your mainnet url.
-    RPC_HTTPS_URL = config.get("DEFAULT", "SOLANA_RPC_URL")
-    # Wallet Address
-    wallet_address = config.get("DEFAULT", "WALLET_ADDRESS")
-    # Wallets private key
-    private_key = config.get("DEFAULT", "PRIVATE_KEY")
-    # Time to Hold
-    threshold_seconds = int(config.get("DEFAULT", "X_SECONDS"))
-    percentage = float(config.get("DEFAULT", "PERCENT_TO_SELL"))
-    slippage = float(config.get('DEFAULT', "SLIPPAGE"))
+    cfg = load_config()
+    http_pool.configure(http2=cfg["http2"])
+    RPC_HTTPS_URL = cfg["rpc_url"]
+    wallet_address = cfg["wallet_address"]
+    threshold_seconds = cfg["threshold_seconds"]
+    percentage = cfg["percentage"]
+    slippage = cfg["slippage"]
     
     ctx = Client(RPC_HTTPS_URL, commitment=Commitment("confirmed"), timeout=30,blockhash_cache=True)
-    payer = Keypair.from_bytes(base58.b58decode(private_key))
+    payer = Keypair.from_bytes(base58.b58decode(cfg["private_key"]))
+    registry = TokenRegistry(open_token_store(cfg["state_backend"], cfg["state_path"]))
+    get_pool_refresher().start()
+    set_blockhash_provider(BlockhashProvider(ctx).start())
+    if cfg["pda_cache_path"]:
+        pda_cache.open(cfg["pda_cache_path"])
+    if cfg["lookup_table_path"]:
+        set_lookup_table_manager(LookupTableManager(payer).open(cfg["lookup_table_path"]))
+    if cfg["priority_fee"] == "adaptive":
+        set_fee_estimator(fee_estimator(cfg).start())
+    prepare_tokens(ctx, list(registry), payer.pubkey())
+    executor = SellExecutor(max_workers=cfg["sell_workers"], max_attempts=cfg["sell_attempts"])
+    # mints whose sell is over, removed from the registry by this loop (workers never touch it);
+    # their jobs keep the lease until then, so a mint is not sold twice in between
+    finished = queue.SimpleQueue()
     
     while True:
+        while not finished.empty():
+            mint = finished.get()
+            remove_token(registry, token_id=mint)
+            executor.forget(mint)
+
         spl_tokens = get_assets_by_owner(RPC_URL=RPC_HTTPS_URL, wallet_address=wallet_address)
-        write_wallet_tokens(spl_tokens)
+        if spl_tokens is not None:
+            new_tokens = write_wallet_tokens(spl_tokens, registry)
+            prepare_tokens(ctx, new_tokens, payer.pubkey())
 
-        # Detect and process old tokens
+        # Detect and process old tokens; ones being sold or backing off are skipped
         
-        old_tokens = detect_old_tokens("data/wallet_tokens.json", threshold_seconds)
+        old_tokens = [token for token in detect_old_tokens(registry, threshold_seconds) if executor.claimable(token.token_id)]
+        coins = get_coin_data_many(ctx, [token.token_id for token in old_tokens if token.token_id.endswith('pump')])
         for token in old_tokens:
-            logger.info(f"Detected old token: {token}. Selling now.")
-            try:
-                if token['token_id'].endswith('pump'):
-                    logger.info("Selling on pumpfun")
-                    pf_sell(client=ctx, mint_str=str(token['token_id']), payer_keypair=payer, percentage=percentage, slippage=slippage)
-                    remove_token_from_json(token_id=token['token_id'])
-                else:
-                    raydium_swap(ctx=ctx, payer=payer, desired_token_address=token['token_id'])
-                    remove_token_from_json(token_id=token['token_id'])
-            except Exception as e:
-                logger.warning(f"Issue encountered during sell of {token} Message {e}")
-                time.sleep(0.5)
-                continue    
+            executor.submit(
+                token.token_id,
+                lambda token=token: sell_token(ctx, payer, token, percentage, slippage, coins.get(token.token_id)),
+                on_done=lambda job: finished.put(job.mint),
+            )
 
         # Pause for some time before the next iteration
         time.sleep(1)  # 1 second
 
+
+def sell_token(ctx, payer, token, percentage, slippage, coin_data=None):
+    logger.info(f"Detected old token: {token}. Selling now.")
+    if token.token_id.endswith('pump'):
+        logger.info("Selling on pumpfun")
+        return pf_sell(client=ctx, mint_str=str(token.token_id), payer_keypair=payer, percentage=percentage, slippage=slippage, coin_data=coin_data)
+    return raydium_swap(ctx=ctx, payer=payer, desired_token_address=token.token_id, slippage=slippage)
+
+
+async def sell_token_async(ctx, payer, token, percentage, slippage, coin_data=None, staged=None):
+    logger.info(f"Detected old token: {token}. Selling now.")
+    if staged is not None:
+        confirmed = await pf_sell_staged_async(ctx, payer, staged, percentage=percentage, slippage=slippage, detected_at=token.detection_time)
+        if confirmed is not False:
+            # sold, or sent and maybe still landing: rebuilding could sell twice
+            return confirmed
+        logger.info("Staged sell did not go through, rebuilding")
+    if token.token_id.endswith('pump'):
+        logger.info("Selling on pumpfun")
+        return await pf_sell_async(client=ctx, mint_str=str(token.token_id), payer_keypair=payer, percentage=percentage, slippage=slippage, coin_data=coin_data, detected_at=token.detection_time)
+    return await raydium_swap_async(ctx=ctx, payer=payer, desired_token_address=token.token_id, detected_at=token.detection_time, slippage=slippage)
+
+
+async def sell_claimed_async(ctx, payer, executor, job, token, settle, percentage, slippage, coin_data=None, staged=None):
+    """One executor attempt at a claimed token, handed to `settle(token, done)` after."""
+    done = await executor.run_async(job, lambda: sell_token_async(ctx, payer, token, percentage, slippage, coin_data, staged))
+    settle(token, done)
+
+
+async def sell_due_async(ctx, payer, registry, stager, executor, claimed, retry, percentage, slippage, batch=False):
+    """Sells tokens that came due together, each claimed in `executor` as (token, job).
+    Staged sells go straight out (packed into shared transactions with `batch`); the
+    other pump.fun tokens have their bonding curves read in one batch. A token is removed
+    from the registry once its job is over and handed to `retry` when another attempt is
+    due later; every claimed job is finished, even when this task fails."""
+    jobs = {token.token_id: job for token, job in claimed}
+    tokens = [token for token, _ in claimed]
+    unsettled = {token.token_id: token for token in tokens}
+
+    def settle(token, done):
+        unsettled.pop(token.token_id, None)
+        if done:
+            remove_token(registry, token_id=token.token_id)
+        else:
+            retry(token)
+
+    try:
+        staged = {}
+        for token in tokens:
+            if token.token_id in stager:
+                staged[token.token_id] = stager.get(token.token_id)
+            # a Raydium holding being sold is no longer valued either
+            stager.discard(token.token_id)
+        if batch and len(staged) > 1:
+            detected_at = min(token.detection_time for token in tokens if token.token_id in staged)
+            finished = await executor.run_batch_async(
+                [jobs[mint] for mint in staged],
+                lambda: pf_sell_staged_batch_async(ctx, payer, list(staged.values()), percentage, slippage, detected_at),
+            )
+            for token in tokens:
+                if token.token_id in finished:
+                    staged.pop(token.token_id)
+                    settle(token, finished[token.token_id])
+            # what was not sent, or failed as a batch, is sold on its own
+            tokens = [token for token in tokens if token.token_id not in finished]
+        coins = {}
+        unstaged = [token.token_id for token in tokens if token.token_id.endswith('pump') and token.token_id not in staged]
+        if unstaged:
+            try:
+                coins = await get_coin_data_many_async(ctx, unstaged)
+            except Exception as e:
+                logger.warning(f"Batched coin data fetch failed, selling one by one: {e}")
+        await asyncio.gather(*(
+            sell_claimed_async(ctx, payer, executor, jobs[token.token_id], token, settle, percentage, slippage,
+                               coins.get(token.token_id), staged.get(token.token_id))
+            for token in tokens
+        ))
+    finally:
+        for token in list(unsettled.values()):
+            job = jobs[token.token_id]
+            settle(token, executor.finish(job, None if job.state == SENT else False))
+
+
+def fee_estimator(cfg):
+    return FeeEstimator(cfg["rpc_url"], percentile=cfg["priority_fee_percentile"], max_price=cfg["max_unit_price"])
+
+
+def warm_derived_addresses(tokens, owner, coins=None):
+    """Derives and persists the pump.fun addresses of `tokens`; with `coins` (mint ->
+    CoinData) the creator vaults too."""
+    coins = coins or {}
+    bonding_curves = []
+    for token in tokens:
+        if token.token_id.endswith('pump'):
+            mint = Pubkey.from_string(token.token_id)
+            coin_data = coins.get(token.token_id)
+            pda_cache.warm(mint, owner, coin_data.creator if coin_data is not None else None)
+            bonding_curves.append(pda_cache.bonding_curve_accounts(mint)[0])
+    pda_cache.save()
+    if bonding_curves:
+        track_accounts([FEE_RECIPIENT] + bonding_curves)
+
+
+def raydium_mints(tokens):
+    return [token.token_id for token in tokens if not token.token_id.endswith('pump')]
+
+
+def ensure_lookup_tables(ctx, mints):
+    tables = get_lookup_table_manager()
+    for mint in mints:
+        pool_keys = fetch_pool_keys(mint, ctx)
+        if pool_keys != "failed":
+            tables.ensure(ctx, pool_keys)
+
+
+def prepare_tokens(ctx, tokens, owner):
+    """Detection-time work that takes RPC round trips and hashing off the later sell."""
+    if not tokens:
+        return
+    # symbol/price for the Raydium sell, fetched off the detection loop
+    threading.Thread(target=token_pairs.prefetch, args=(raydium_mints(tokens),), daemon=True).start()
+    if get_lookup_table_manager() is not None and raydium_mints(tokens):
+        threading.Thread(target=ensure_lookup_tables, args=(ctx, raydium_mints(tokens)), daemon=True).start()
+    mint_cache.prefetch_many(ctx, [token.token_id for token in tokens])
+    coins = get_coin_data_many(ctx, [token.token_id for token in tokens if token.token_id.endswith('pump')])
+    warm_derived_addresses(tokens, owner, coins)
+
+
+async def prepare_tokens_async(ctx, tokens, owner, stager=None):
+    await asyncio.gather(
+        asyncio.to_thread(token_pairs.prefetch, raydium_mints(tokens)),
+        mint_cache.prefetch_many_async(ctx, [token.token_id for token in tokens]),
+    )
+    warm_derived_addresses(tokens, owner)
+    if stager is not None:
+        await stager.stage_many([token.token_id for token in tokens])
+
+
+async def async_main():
+    """Asyncio engine: detection feeds a deadline scheduler and every due token sells in
+    its own task, so one slow confirmation never delays another sell or the next scan."""
+    cfg = load_config()
+    http_pool.configure(http2=cfg["http2"])
+    payer = Keypair.from_bytes(base58.b58decode(cfg["private_key"]))
+    threshold_seconds = cfg["threshold_seconds"]
+    registry = TokenRegistry(open_token_store(cfg["state_backend"], cfg["state_path"]))
+    scheduler = SellScheduler()
+    executor = SellExecutor(max_workers=cfg["sell_workers"], max_attempts=cfg["sell_attempts"])
+    background = set()
+    get_pool_refresher().start()
+    if cfg["pda_cache_path"]:
+        pda_cache.open(cfg["pda_cache_path"])
+    if cfg["lookup_table_path"]:
+        set_lookup_table_manager(LookupTableManager(payer).open(cfg["lookup_table_path"]))
+
+    # tokens detected by a previous run keep their original deadlines
+    for token in registry:
+        scheduler.schedule(token.token_id, token.detection_time + threshold_seconds, token)
+
+    async with AsyncClient(cfg["rpc_url"], commitment=Commitment("confirmed"), timeout=30, blockhash_cache=True) as ctx:
+        http = http_pool.async_client(cfg["rpc_url"])
+
+        def spawn(coro):
+            task = asyncio.create_task(coro)
+            background.add(task)
+            task.add_done_callback(background.discard)
+            return task
+
+        ws_url = cfg["ws_url"] or ws_url_from_http(cfg["rpc_url"])
+        confirmations = ConfirmationService(ctx, ws_url=ws_url if cfg["confirmation"] == "websocket" else None)
+        set_confirmation_service(confirmations.start())
+        set_blockhash_provider(BlockhashProvider(ctx).start_async())
+        if cfg["priority_fee"] == "adaptive":
+            set_fee_estimator(fee_estimator(cfg).start_async())
+        stager = SellStager(ctx, payer.pubkey(), simulate_units=cfg["simulate_units"])
+        if cfg["send_rpc_urls"]:
+            set_transaction_sender(FanoutSender([cfg["rpc_url"]] + cfg["send_rpc_urls"]))
+
+        def track_tokens(tokens):
+            new_tokens = track_wallet_tokens(tokens, registry, scheduler, stager, threshold_seconds)
+            if new_tokens:
+                spawn(prepare_tokens_async(ctx, new_tokens, payer.pubkey(), stager))
+
+        def retry(token):
+            if token.token_id in registry:
+                scheduler.schedule(token.token_id, time.time() + executor.retry_delay(token.token_id), token)
+
+        def fire(due):
+            claimed = []
+            for token_id, token in due:
+                job = executor.claim(token_id)
+                if job is not None:
+                    claimed.append((token, job))
+                elif executor.state(token_id) == PENDING:
+                    # still backing off from a failed attempt
+                    retry(token)
+            if claimed:
+                spawn(sell_due_async(ctx, payer, registry, stager, executor, claimed, retry,
+                                     cfg["percentage"], cfg["slippage"], cfg["batch_sells"]))
+
+        spawn(prepare_tokens_async(ctx, list(registry), payer.pubkey(), stager))
+        spawn(stager.run())
+        spawn(scheduler.run(fire))
+
+        if cfg["watcher"] == "websocket":
+            watcher = WalletWatcher(
+                ws_url=ws_url,
+                wallet_address=cfg["wallet_address"],
+                on_tokens=track_tokens,
+                reconcile=lambda: get_assets_by_owner_async(http, cfg["rpc_url"], cfg["wallet_address"]),
+            )
+            await watcher.run()
+
+        while True:
+            spl_tokens = await get_assets_by_owner_async(http, cfg["rpc_url"], cfg["wallet_address"])
+            if spl_tokens is not None:
+                track_tokens(spl_tokens)
+            await asyncio.sleep(1)
+
+
 if __name__ == "__main__":
-    main()
+    if load_config()["engine"] == "async":
+        asyncio.run(async_main())
+    else:
+        main()
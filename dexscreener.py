@@ -1,10 +1,91 @@
-import requests, json, os, sys
+import httpx, json, os, sys, threading, time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from engine.http_pool import http_pool
+
+TOKENS_URL = "https://api.dexscreener.com/latest/dex/tokens/{}"
+
+
+class TokenPairsCache:
+    """/latest/dex/tokens/{mint} responses by mint, shared by getSymbol and get_price.
+
+    Bounded LRU with a TTL per read: prices want a fresh response (`ttl`), a symbol never
+    changes so any cached response will do. Concurrent callers for the same mint wait on
+    the one request already in flight instead of sending their own.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_size: int = 2048):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._responses = OrderedDict()  # mint -> (fetched_at, response json)
+        self._inflight = {}  # mint -> threading.Event
+        self._lock = threading.Lock()
+
+    def _cached(self, token, max_age):
+        entry = self._responses.get(token)
+        if entry is None or time.monotonic() - entry[0] > max_age:
+            return None
+        self._responses.move_to_end(token)
+        return entry[1]
+
+    def get(self, token: str, max_age: float = None) -> dict:
+        max_age = self.ttl if max_age is None else max_age
+        while True:
+            with self._lock:
+                response = self._cached(token, max_age)
+                if response is not None:
+                    return response
+                event = self._inflight.get(token)
+                if event is None:
+                    event = self._inflight[token] = threading.Event()
+                    break
+            # another thread is fetching this mint; use its result (or retry if it failed)
+            event.wait()
+            with self._lock:
+                response = self._cached(token, max_age)
+            if response is not None:
+                return response
+
+        try:
+            response = http_pool.get(TOKENS_URL.format(token))
+            response.raise_for_status()
+            data = response.json()
+            with self._lock:
+                self._responses[token] = (time.monotonic(), data)
+                self._responses.move_to_end(token)
+                while len(self._responses) > self.max_size:
+                    self._responses.popitem(last=False)
+            return data
+        finally:
+            with self._lock:
+                self._inflight.pop(token, None)
+            event.set()
+
+    def prefetch(self, tokens, max_workers: int = 4):
+        """Fills the cache for `tokens` so a later sell does not wait on dexscreener."""
+        tokens = [token for token in dict.fromkeys(tokens) if token not in EXCLUDE]
+        if not tokens:
+            return
+
+        def fetch(token):
+            try:
+                self.get(token)
+            except (httpx.HTTPError, ValueError) as e:
+                print(f"[prefetch] {token} error occurred: {e}")
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(tokens))) as executor:
+            list(executor.map(fetch, tokens))
+
+
+# usdc and usdt
+EXCLUDE = ['EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v', 'Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB']
+token_pairs = TokenPairsCache()
 
 
 
 def getBaseToken(token_address):
     url =  f"https://api.dexscreener.com/latest/dex/pairs/solana/{token_address}"
-    response = requests.get(url).json()
+    response = http_pool.get(url).json()
     return response['pair']['baseToken']['address']
 
 
@@ -12,11 +93,9 @@ def get_price(token_address):
     """
     USDT and USDC prices will be excluded
     """
-    url = f"https://api.dexscreener.com/latest/dex/tokens/{token_address}"
-    exclude = ['EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v', 'Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB']
-    response = requests.get(url).json()
+    response = token_pairs.get(token_address)
     
-    if token_address not in exclude:
+    if token_address not in EXCLUDE:
         for pair in response['pairs']:
             if pair['quoteToken']['address'] == 'So11111111111111111111111111111111111111112':
                 return float(pair['priceUsd'])
@@ -28,34 +107,24 @@ def get_price(token_address):
 
 """Common addresses like usdc and usdt will be excluded as we know their symbols"""
 def getSymbol(token):
-    # usdc and usdt
-    exclude = ['EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v', 'Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB']
-    
-    if token not in exclude:
-        url = f"https://api.dexscreener.com/latest/dex/tokens/{token}"
-
+    if token not in EXCLUDE:
         Token_Symbol = ""
         Sol_symbol=""
         try:
-            response = requests.get(url)
-
-            # Check if the request was successful (status code 200)
-            if response.status_code == 200:
-                resp = response.json()
-                print("Response:",resp['pairs'][0]['baseToken']['symbol'])
-                for pair in resp['pairs']:
-                    quoteToken = pair['quoteToken']['symbol']
-
-                    if quoteToken == 'SOL':
-                        Token_Symbol = pair['baseToken']['symbol']
-                        Sol_symbol = quoteToken
-                        return Token_Symbol, Sol_symbol
-
+            # a symbol never changes, so any cached response will do
+            resp = token_pairs.get(token, max_age=float('inf'))
+            print("Response:",resp['pairs'][0]['baseToken']['symbol'])
+            for pair in resp['pairs']:
+                quoteToken = pair['quoteToken']['symbol']
 
-            else:
-                print(f"[getSymbol] Request failed with status code {response.status_code}")
+                if quoteToken == 'SOL':
+                    Token_Symbol = pair['baseToken']['symbol']
+                    Sol_symbol = quoteToken
+                    return Token_Symbol, Sol_symbol
 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPStatusError as e:
+            print(f"[getSymbol] Request failed with status code {e.response.status_code}")
+        except httpx.HTTPError as e:
             print(f"[getSymbol] error occurred: {e}")
         except: 
             a = 1
@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+from loguru import logger
+
+# a blockhash is accepted for 150 blocks (~60s at 400ms slots); reuse it for half that
+MAX_BLOCKHASH_AGE = 30.0
+
+
+class BlockhashInfo:
+    __slots__ = ("blockhash", "last_valid_block_height", "fetched_at")
+
+    def __init__(self, blockhash, last_valid_block_height: int, fetched_at: float):
+        self.blockhash = blockhash
+        self.last_valid_block_height = last_valid_block_height
+        self.fetched_at = fetched_at
+
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+def _info_from_response(resp) -> BlockhashInfo:
+    return BlockhashInfo(resp.value.blockhash, resp.value.last_valid_block_height, time.monotonic())
+
+
+class BlockhashProvider:
+    """Keeps a recent blockhash in memory so transaction builders never wait on
+    getLatestBlockhash.
+
+    A background thread (sync Client) or task (AsyncClient) refreshes it every
+    `interval` seconds. `current()` returns the last one without blocking as long as it
+    is younger than `max_age`, well inside its lastValidBlockHeight window; past that it
+    returns None and callers fetch one themselves.
+    """
+
+    def __init__(self, client, interval: float = 0.4, max_age: float = MAX_BLOCKHASH_AGE):
+        self.client = client
+        self.interval = interval
+        self.max_age = max_age
+        self._info = None
+        self._stopped = threading.Event()
+        self._thread = None
+        self._task = None
+
+    def current(self):
+        info = self._info
+        if info is None or info.age() > self.max_age:
+            return None
+        return info
+
+    def update(self, info: BlockhashInfo):
+        self._info = info
+        return info
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.update(_info_from_response(self.client.get_latest_blockhash()))
+            except Exception as e:
+                logger.warning(f"Blockhash - refresh failed: {e}")
+            self._stopped.wait(self.interval)
+
+    async def _run_async(self):
+        while not self._stopped.is_set():
+            try:
+                self.update(_info_from_response(await self.client.get_latest_blockhash()))
+            except Exception as e:
+                logger.warning(f"Blockhash - refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Refreshes from a daemon thread; for the synchronous Client."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="blockhash-provider", daemon=True)
+            self._thread.start()
+        return self
+
+    def start_async(self):
+        """Refreshes from a task on the running loop; for the AsyncClient."""
+        if self._task is None or self._task.done():
+            self._stopped.clear()
+            self._task = asyncio.ensure_future(self._run_async())
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+
+
+_provider = None
+
+
+def set_blockhash_provider(provider):
+    global _provider
+    _provider = provider
+
+
+def get_blockhash_provider():
+    return _provider
+
+
+def recent_blockhash_info(client) -> BlockhashInfo:
+    """The provider's blockhash when it is fresh, otherwise one getLatestBlockhash call."""
+    info = _provider.current() if _provider is not None else None
+    if info is None:
+        info = _info_from_response(client.get_latest_blockhash())
+        if _provider is not None:
+            _provider.update(info)
+    return info
+
+
+async def recent_blockhash_info_async(client) -> BlockhashInfo:
+    info = _provider.current() if _provider is not None else None
+    if info is None:
+        info = _info_from_response(await client.get_latest_blockhash())
+        if _provider is not None:
+            _provider.update(info)
+    return info
+
+
+def recent_blockhash(client):
+    return recent_blockhash_info(client).blockhash
+
+
+async def recent_blockhash_async(client):
+    return (await recent_blockhash_info_async(client)).blockhash
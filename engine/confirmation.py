@@ -0,0 +1,258 @@
+import asyncio
+import json
+import time
+from collections import deque
+import websockets
+from loguru import logger
+from solders.signature import Signature  # type: ignore
+from solders.transaction_status import TransactionConfirmationStatus  # type: ignore
+
+COMMITMENT_RANK = {"processed": 0, "confirmed": 1, "finalized": 2}
+# solders status enums are not hashable
+STATUS_RANK = (
+    (TransactionConfirmationStatus.Processed, 0),
+    (TransactionConfirmationStatus.Confirmed, 1),
+    (TransactionConfirmationStatus.Finalized, 2),
+)
+SIGNATURE_STATUSES_LIMIT = 256
+
+
+def _as_signature(signature) -> Signature:
+    return signature if isinstance(signature, Signature) else Signature.from_string(signature)
+
+
+def status_result(status, commitment: str = "confirmed"):
+    """True / False once a getSignatureStatuses entry has reached `commitment` (False when
+    the transaction failed on-chain), None while it has not landed there yet."""
+    if status is None:
+        return None
+    # nodes omit confirmationStatus for rooted transactions
+    rank = next((rank for level, rank in STATUS_RANK if level == status.confirmation_status), COMMITMENT_RANK["finalized"])
+    if rank < COMMITMENT_RANK[commitment]:
+        return None
+    return status.err is None
+
+
+class ConfirmationService:
+    """Confirms every in-flight signature from one place.
+
+    Callers get a future per signature from `track` (or await `wait`). A poller checks
+    all pending signatures with a single getSignatureStatuses call every
+    `poll_interval`; with a `ws_url` each signature is also pushed through
+    signatureSubscribe and the poller drops to `fallback_interval` while the socket is
+    up, only catching notifications lost to a reconnect. Futures resolve to True
+    (confirmed), False (failed on-chain) or None (not seen within `timeout`).
+
+    Detection-to-confirmation latency of each confirmed signature is kept in
+    `latencies` as (signature, seconds).
+    """
+
+    def __init__(self, client, ws_url: str = None, commitment: str = "confirmed",
+                 poll_interval: float = 0.4, fallback_interval: float = 2.0, timeout: float = 60.0,
+                 reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0, max_latencies: int = 1000):
+        self.client = client
+        self.ws_url = ws_url
+        self.commitment = commitment
+        self.poll_interval = poll_interval
+        self.fallback_interval = fallback_interval
+        self.timeout = timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.latencies = deque(maxlen=max_latencies)
+        self._pending = {}  # signature str -> (future, detected_at, deadline)
+        self._wakeup = asyncio.Event()
+        self._ws = None
+        self._request_ids = iter(range(1, 1 << 62))
+        self._requests = {}  # request id -> signature str
+        self._subscriptions = {}  # subscription id -> signature str
+        self._tasks = []
+
+    def __len__(self):
+        return len(self._pending)
+
+    def track(self, signature, detected_at: float = None) -> asyncio.Future:
+        """Future for `signature`. `detected_at` (epoch seconds) is when the token was
+        detected; it defaults to now, giving send-to-confirm latency."""
+        key = str(signature)
+        entry = self._pending.get(key)
+        if entry is not None:
+            return entry[0]
+        now = time.time()
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = (future, now if detected_at is None else detected_at, time.monotonic() + self.timeout)
+        if self._ws is not None:
+            asyncio.ensure_future(self._send_subscribe(self._ws, key))
+        self._wakeup.set()
+        return future
+
+    async def wait(self, signature, detected_at: float = None):
+        return await self.track(signature, detected_at)
+
+    def _resolve(self, key: str, result):
+        entry = self._pending.pop(key, None)
+        if entry is None:
+            return
+        future, detected_at, _ = entry
+        if result is not None:
+            latency = time.time() - detected_at
+            self.latencies.append((key, latency))
+            logger.info(f"Confirm - {key} {'confirmed' if result else 'failed'} {latency:.3f}s after detection")
+        else:
+            logger.warning(f"Confirm - {key} not confirmed within {self.timeout}s")
+        if not future.done():
+            future.set_result(result)
+
+    def latency_summary(self) -> dict:
+        values = sorted(latency for _, latency in self.latencies)
+        if not values:
+            return {"count": 0}
+        return {
+            "count": len(values),
+            "p50": values[len(values) // 2],
+            "p90": values[min(len(values) - 1, int(len(values) * 0.9))],
+            "max": values[-1],
+        }
+
+    # polling
+
+    async def poll_once(self):
+        now = time.monotonic()
+        for key, (_, _, deadline) in list(self._pending.items()):
+            if deadline <= now:
+                self._resolve(key, None)
+        keys = list(self._pending)
+        for i in range(0, len(keys), SIGNATURE_STATUSES_LIMIT):
+            chunk = keys[i:i + SIGNATURE_STATUSES_LIMIT]
+            try:
+                resp = await self.client.get_signature_statuses([_as_signature(key) for key in chunk])
+            except Exception as e:
+                logger.warning(f"Confirm - getSignatureStatuses failed: {e}")
+                continue
+            for key, status in zip(chunk, resp.value):
+                result = status_result(status, self.commitment)
+                if result is not None:
+                    self._resolve(key, result)
+
+    async def _poll(self):
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            await self.poll_once()
+            await asyncio.sleep(self.fallback_interval if self._ws is not None else self.poll_interval)
+
+    # websocket
+
+    async def _send_subscribe(self, ws, key: str):
+        request_id = next(self._request_ids)
+        self._requests[request_id] = key
+        try:
+            await ws.send(json.dumps({
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "method": "signatureSubscribe",
+                "params": [key, {"commitment": self.commitment}],
+            }))
+        except websockets.ConnectionClosed:
+            self._requests.pop(request_id, None)
+
+    def _handle(self, msg: dict):
+        if "id" in msg:
+            key = self._requests.pop(msg["id"], None)
+            if key is not None and "result" in msg:
+                self._subscriptions[msg["result"]] = key
+            elif key is not None:
+                logger.warning(f"Confirm - signatureSubscribe failed for {key}: {msg.get('error')}")
+            return
+        if msg.get("method") != "signatureNotification":
+            return
+        params = msg["params"]
+        # signature subscriptions end after their one notification
+        key = self._subscriptions.pop(params["subscription"], None)
+        value = params["result"]["value"]
+        if key is not None and isinstance(value, dict):
+            self._resolve(key, value.get("err") is None)
+
+    async def _listen(self):
+        delay = self.reconnect_delay
+        while True:
+            try:
+                async with websockets.connect(self.ws_url) as ws:
+                    self._ws = ws
+                    delay = self.reconnect_delay
+                    for key in list(self._pending):
+                        await self._send_subscribe(ws, key)
+                    async for raw in ws:
+                        self._handle(json.loads(raw))
+            except (websockets.WebSocketException, OSError) as e:
+                # drops, refused handshakes (InvalidStatusCode on a 429/5xx) and timeouts alike
+                logger.warning(f"Confirm - websocket dropped: {e}")
+            finally:
+                self._ws = None
+                self._requests.clear()
+                self._subscriptions.clear()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def start(self):
+        if not self._tasks:
+            self._tasks.append(asyncio.ensure_future(self._poll()))
+            if self.ws_url:
+                self._tasks.append(asyncio.ensure_future(self._listen()))
+        return self
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        for key in list(self._pending):
+            self._resolve(key, None)
+
+
+_service = None
+
+
+def set_confirmation_service(service):
+    global _service
+    _service = service
+
+
+def get_confirmation_service():
+    return _service
+
+
+async def confirm_signature(client, signature, detected_at: float = None, timeout: float = 60.0,
+                            poll_interval: float = 0.4, commitment: str = "confirmed"):
+    """Waits on the running ConfirmationService, or polls getSignatureStatuses for this one
+    signature when none is running."""
+    if _service is not None:
+        return await _service.wait(signature, detected_at)
+    deadline = time.monotonic() + timeout
+    signature = _as_signature(signature)
+    while time.monotonic() < deadline:
+        try:
+            result = status_result((await client.get_signature_statuses([signature])).value[0], commitment)
+        except Exception as e:
+            logger.warning(f"Confirm - getSignatureStatuses failed: {e}")
+            result = None
+        if result is not None:
+            return result
+        await asyncio.sleep(poll_interval)
+    return None
+
+
+def confirm_signature_blocking(client, signature, timeout: float = 60.0, poll_interval: float = 0.4,
+                               commitment: str = "confirmed"):
+    """confirm_signature for the synchronous Client."""
+    deadline = time.monotonic() + timeout
+    signature = _as_signature(signature)
+    while time.monotonic() < deadline:
+        try:
+            result = status_result(client.get_signature_statuses([signature]).value[0], commitment)
+        except Exception as e:
+            logger.warning(f"Confirm - getSignatureStatuses failed: {e}")
+            result = None
+        if result is not None:
+            return result
+        time.sleep(poll_interval)
+    return None
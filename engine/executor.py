@@ -0,0 +1,211 @@
+import asyncio
+import contextvars
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from loguru import logger
+
+PENDING = "pending"
+BUILDING = "building"
+SENT = "sent"
+CONFIRMED = "confirmed"
+FAILED = "failed"
+
+# a transaction whose outcome is unknown can still land until its blockhash expires
+# (150 blocks, ~60-90s); it is not retried before then
+UNCONFIRMED_RETRY_DELAY = 90.0
+
+_current_jobs = contextvars.ContextVar("sell_jobs", default=())
+
+
+class SellJob:
+    __slots__ = ("mint", "state", "attempts", "retry_at", "sent_at")
+
+    def __init__(self, mint: str):
+        self.mint = mint
+        self.state = PENDING
+        self.attempts = 0
+        self.retry_at = 0.0
+        self.sent_at = None
+
+    def __repr__(self):
+        return f"SellJob({self.mint}, state={self.state}, attempts={self.attempts})"
+
+
+def mark_sent():
+    """Called by the send paths once a sell transaction went out; moves the sells running
+    in this thread or task (if any) from building to sent."""
+    for job in _current_jobs.get():
+        if job.state == BUILDING:
+            job.state = SENT
+            job.sent_at = time.monotonic()
+
+
+def sell_outcome(result):
+    """True / False / None (unknown) from what a sell function returned: True or a
+    signature means sold, False or "failed" means not sold, None means it may still land."""
+    if result is None:
+        return None
+    if result is False or result == "failed":
+        return False
+    return True
+
+
+class SellExecutor:
+    """Runs sells with at most `max_workers` at a time and at most one per mint.
+
+    Every mint being sold holds a SellJob, which doubles as its lease: `claim` refuses a
+    mint whose sell is building or sent, or whose retry is not due yet, so a token still
+    confirming is never submitted again. A job moves pending -> building -> sent ->
+    confirmed / failed. A failed attempt goes back to pending with exponential backoff
+    (`backoff` * 2^(attempts-1), at most `max_backoff`; at least UNCONFIRMED_RETRY_DELAY
+    when the transaction went out but was never confirmed). After `max_attempts` the job
+    ends as failed. Finished jobs are counted in `stats` and dropped, except that with an
+    `on_done` callback the job keeps the lease until its owner calls `forget`, so the owner
+    can drop the mint from its own bookkeeping before the mint becomes claimable again.
+
+    `submit` runs a blocking sell on the worker pool; `run_async` runs a coroutine sell
+    under a semaphore of the same size, and `run_batch_async` one that sells several
+    claimed mints in shared transactions.
+    """
+
+    def __init__(self, max_workers: int = 4, max_attempts: int = 3, backoff: float = 2.0, max_backoff: float = 30.0):
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stats = Counter()
+        self._jobs = {}  # mint -> SellJob
+        self._lock = threading.Lock()
+        self._pool = None
+        self._semaphore = None
+
+    def __contains__(self, mint: str):
+        return mint in self._jobs
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def state(self, mint: str):
+        job = self._jobs.get(mint)
+        return job.state if job is not None else None
+
+    def claimable(self, mint: str, now: float = None) -> bool:
+        job = self._jobs.get(mint)
+        if job is None:
+            return True
+        now = time.monotonic() if now is None else now
+        return job.state == PENDING and job.retry_at <= now
+
+    def claim(self, mint: str):
+        """The mint's SellJob, now building, or None when it is leased or backing off."""
+        now = time.monotonic()
+        with self._lock:
+            if not self.claimable(mint, now):
+                return None
+            job = self._jobs.setdefault(mint, SellJob(mint))
+            job.state = BUILDING
+            job.attempts += 1
+            job.sent_at = None
+            return job
+
+    def finish(self, job: SellJob, outcome, on_done=None) -> bool:
+        """Records an attempt's outcome (True / False / None). Returns True when the job is
+        over (confirmed, or failed for good) and False when a retry is scheduled.
+        A finished job handed to `on_done(job)` stays leased until `forget(job.mint)`."""
+        with self._lock:
+            if outcome:
+                job.state = CONFIRMED
+            elif job.attempts >= self.max_attempts:
+                job.state = FAILED
+            else:
+                delay = min(self.backoff * 2 ** (job.attempts - 1), self.max_backoff)
+                if outcome is None and job.sent_at is not None:
+                    delay = max(delay, UNCONFIRMED_RETRY_DELAY)
+                job.state = PENDING
+                job.retry_at = time.monotonic() + delay
+                logger.info(f"Executor - sell of {job.mint} attempt {job.attempts} did not confirm, retrying in {delay:.1f}s")
+                return False
+            self.stats[job.state] += 1
+            if on_done is not None:
+                on_done(job)
+            else:
+                self._jobs.pop(job.mint, None)
+        logger.info(f"Executor - sell of {job.mint} {job.state} after {job.attempts} attempt(s)")
+        return True
+
+    def retry_delay(self, mint: str) -> float:
+        job = self._jobs.get(mint)
+        return max(job.retry_at - time.monotonic(), 0.0) if job is not None else 0.0
+
+    def forget(self, mint: str):
+        """Drops a mint's job, e.g. when the token left the wallet, and releases the lease
+        of a finished job that was handed to `on_done`."""
+        with self._lock:
+            self._jobs.pop(mint, None)
+
+    def _run(self, job: SellJob, sell, on_done):
+        _current_jobs.set((job,))
+        try:
+            outcome = sell_outcome(sell())
+        except Exception as e:
+            logger.warning(f"Executor - sell of {job.mint} raised: {e}")
+            outcome = None if job.state == SENT else False
+        self.finish(job, outcome, on_done)
+        return job
+
+    def submit(self, mint: str, sell, on_done=None):
+        """Runs `sell()` on the worker pool unless the mint is leased or backing off.
+        `on_done(job)` is called once the job is over; the mint stays leased until it is
+        forgotten. Returns the Future or None."""
+        job = self.claim(mint)
+        if job is None:
+            return None
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sell")
+        return self._pool.submit(self._run, job, sell, on_done)
+
+    async def run_async(self, job: SellJob, sell) -> bool:
+        """Awaits `sell()` (a coroutine function) for a claimed job inside the concurrency
+        limit. Returns what finish returned."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        async with self._semaphore:
+            _current_jobs.set((job,))
+            try:
+                outcome = sell_outcome(await sell())
+            except Exception as e:
+                logger.warning(f"Executor - sell of {job.mint} raised: {e}")
+                outcome = None if job.state == SENT else False
+        return self.finish(job, outcome)
+
+    async def run_batch_async(self, jobs: list, sell) -> dict:
+        """Awaits `sell()` for claimed jobs sold together, in one slot of the limit. `sell`
+        returns mint -> result for the mints whose transaction went out; those jobs are
+        finished with that outcome. Jobs not sent, or whose shared transaction failed (so
+        nothing was sold), stay claimed for the caller to sell on their own. Returns mint
+        -> what finish returned, for the finished jobs."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        async with self._semaphore:
+            _current_jobs.set(tuple(jobs))
+            try:
+                results = await sell()
+            except Exception as e:
+                logger.warning(f"Executor - batched sell of {len(jobs)} mints raised: {e}")
+                # which batch went out is unknown; any send makes every outcome unknown
+                return {job.mint: self.finish(job, None if job.state == SENT else False) for job in jobs}
+        done = {}
+        for job in jobs:
+            outcome = sell_outcome(results.get(job.mint, False))
+            if outcome is False:
+                job.state = BUILDING
+                job.sent_at = None
+            else:
+                done[job.mint] = self.finish(job, outcome)
+        return done
+
+    def shutdown(self, wait: bool = True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
@@ -0,0 +1,207 @@
+import asyncio
+import math
+import threading
+from collections import OrderedDict
+from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price  # type: ignore
+from solders.signature import Signature  # type: ignore
+from solders.transaction import VersionedTransaction  # type: ignore
+from loguru import logger
+from engine.http_pool import http_pool
+
+"""
+Priority fee and compute unit sizing for sells.
+
+FeeEstimator polls getRecentPrioritizationFees for the writable accounts of upcoming
+sells (bonding curves, the pump.fun fee recipient, Raydium pools) and keeps the per-slot
+fees of the last `window` slots. The unit price is a percentile of that window, clamped
+to [min_price, max_price]: it follows congestion on the accounts we write and drops back
+when they are quiet.
+
+Compute unit limits default to a fixed budget per kind of sell. When simulated units are
+recorded for a kind (simulateTransaction while a sell is staged, off the sell path), the
+limit becomes the largest recent figure plus `margin`. Unit samples are kept in
+`unit_samples` whether or not the priority fee is adaptive.
+"""
+
+DEFAULT_UNIT_PRICE = 1_000_000  # micro-lamports per compute unit
+MAX_COMPUTE_UNIT_LIMIT = 1_400_000
+PRIORITIZATION_FEES_ACCOUNTS_LIMIT = 128
+
+
+class FeeEstimator:
+
+    def __init__(self, rpc_url: str, percentile: float = 75, window: int = 150, interval: float = 2.0,
+                 min_price: int = 1_000, max_price: int = 5_000_000, default_price: int = DEFAULT_UNIT_PRICE):
+        self.rpc_url = rpc_url
+        self.percentile = percentile
+        self.window = window
+        self.interval = interval
+        self.min_price = min_price
+        self.max_price = max_price
+        self.default_price = default_price
+        self._accounts = OrderedDict()  # account str -> None, most recently used last
+        self._fees = {}  # slot -> prioritization fee
+        self._price = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._task = None
+
+    def track(self, accounts):
+        """Adds writable accounts of upcoming sells to the sampled set (bounded, LRU)."""
+        with self._lock:
+            for account in accounts:
+                key = str(account)
+                self._accounts[key] = None
+                self._accounts.move_to_end(key)
+            while len(self._accounts) > PRIORITIZATION_FEES_ACCOUNTS_LIMIT:
+                self._accounts.popitem(last=False)
+
+    def unit_price(self) -> int:
+        return self.default_price if self._price is None else self._price
+
+    def observe(self, fees):
+        """Feeds getRecentPrioritizationFees entries ({"slot", "prioritizationFee"})."""
+        with self._lock:
+            for entry in fees:
+                self._fees[entry["slot"]] = entry["prioritizationFee"]
+            if not self._fees:
+                return
+            newest = max(self._fees)
+            for slot in [slot for slot in self._fees if slot <= newest - self.window]:
+                del self._fees[slot]
+            values = sorted(self._fees.values())
+        value = values[min(len(values) - 1, int(len(values) * self.percentile / 100))]
+        self._price = int(min(max(value, self.min_price), self.max_price))
+
+    def _payload(self) -> dict:
+        with self._lock:
+            accounts = list(self._accounts)
+        params = [accounts] if accounts else []
+        return {"jsonrpc": "2.0", "id": 1, "method": "getRecentPrioritizationFees", "params": params}
+
+    def sample(self):
+        resp = http_pool.post(self.rpc_url, json=self._payload())
+        resp.raise_for_status()
+        self.observe(resp.json()["result"])
+
+    async def sample_async(self):
+        resp = await http_pool.post_async(self.rpc_url, json=self._payload())
+        resp.raise_for_status()
+        self.observe(resp.json()["result"])
+
+    # background refresh
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                logger.warning(f"Fees - prioritization fee sample failed: {e}")
+            self._stopped.wait(self.interval)
+
+    async def _run_async(self):
+        while not self._stopped.is_set():
+            try:
+                await self.sample_async()
+            except Exception as e:
+                logger.warning(f"Fees - prioritization fee sample failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Samples from a daemon thread; for the synchronous engine."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="fee-estimator", daemon=True)
+            self._thread.start()
+        return self
+
+    def start_async(self):
+        """Samples from a task on the running loop; for the async engine."""
+        if self._task is None or self._task.done():
+            self._stopped.clear()
+            self._task = asyncio.ensure_future(self._run_async())
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+
+
+class UnitSamples:
+    """Recent simulated compute units per kind of sell."""
+
+    def __init__(self, margin: float = 0.15, max_samples: int = 20):
+        self.margin = margin
+        self.max_samples = max_samples
+        self._units = {}  # kind -> recent simulated units
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, units: int):
+        with self._lock:
+            samples = self._units.setdefault(kind, [])
+            samples.append(units)
+            del samples[:-self.max_samples]
+
+    def limit(self, kind: str, default: int) -> int:
+        samples = self._units.get(kind)
+        if not samples:
+            return default
+        return min(math.ceil(max(samples) * (1 + self.margin)), MAX_COMPUTE_UNIT_LIMIT)
+
+    def clear(self):
+        with self._lock:
+            self._units.clear()
+
+
+unit_samples = UnitSamples()
+_estimator = None
+
+
+def set_fee_estimator(estimator):
+    global _estimator
+    _estimator = estimator
+
+
+def get_fee_estimator():
+    return _estimator
+
+
+def track_accounts(accounts):
+    if _estimator is not None:
+        _estimator.track(accounts)
+
+
+def unit_price(default: int = DEFAULT_UNIT_PRICE) -> int:
+    return _estimator.unit_price() if _estimator is not None else default
+
+
+def unit_limit(kind: str, default: int) -> int:
+    return unit_samples.limit(kind, default)
+
+
+def compute_budget_instructions(kind: str, default_units: int, count: int = 1) -> list:
+    """[set_compute_unit_limit, set_compute_unit_price] for `count` instructions of `kind`."""
+    limit = min(unit_limit(kind, default_units) * count, MAX_COMPUTE_UNIT_LIMIT)
+    return [set_compute_unit_limit(limit), set_compute_unit_price(unit_price())]
+
+
+def unsigned_transaction(message) -> VersionedTransaction:
+    """`message` with placeholder signatures, enough for simulateTransaction without sigVerify."""
+    return VersionedTransaction.populate(message, [Signature.default()] * message.header.num_required_signatures)
+
+
+async def simulate_units_async(client, kind: str, message):
+    """Simulates `message` and records its units for `kind`; returns them, or None when
+    the simulation failed."""
+    try:
+        result = (await client.simulate_transaction(unsigned_transaction(message))).value
+    except Exception as e:
+        logger.warning(f"Fees - simulating {kind} failed: {e}")
+        return None
+    if result.err is not None or not result.units_consumed:
+        logger.info(f"Fees - {kind} simulation returned {result.err}")
+        return None
+    unit_samples.record(kind, result.units_consumed)
+    return result.units_consumed
@@ -0,0 +1,126 @@
+import threading
+from urllib.parse import urlsplit
+import httpx
+from loguru import logger
+
+"""
+Shared keep-alive HTTP clients for every off-chain call (DAS getAssetsByOwner,
+dexscreener, the Raydium liquidity list, pump.fun).
+
+One httpx client per host, created on first use and reused afterwards, so a steady poll
+pays for the TCP/TLS handshake once. Each host gets its own timeouts and connection
+limits from HOST_SETTINGS (falling back to DEFAULT_SETTINGS). HTTP/2 is used when
+enabled and the optional `h2` package is installed.
+"""
+
+
+class HostSettings:
+    __slots__ = ("timeout", "max_connections", "max_keepalive")
+
+    def __init__(self, timeout: httpx.Timeout, max_connections: int = 10, max_keepalive: int = 5):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_keepalive)
+
+
+DEFAULT_SETTINGS = HostSettings(httpx.Timeout(30.0, connect=5.0))
+HOST_SETTINGS = {
+    "api.dexscreener.com": HostSettings(httpx.Timeout(5.0, connect=3.0)),
+    "api.pump.fun": HostSettings(httpx.Timeout(5.0, connect=3.0)),
+    # the liquidity list is hundreds of MB
+    "api.raydium.io": HostSettings(httpx.Timeout(60.0, connect=10.0), max_connections=2, max_keepalive=1),
+}
+
+
+def _h2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class HttpPool:
+
+    def __init__(self, http2: bool = False, host_settings: dict = None):
+        self.http2 = http2
+        self.host_settings = dict(HOST_SETTINGS if host_settings is None else host_settings)
+        self._clients = {}
+        self._async_clients = {}
+        self._lock = threading.Lock()
+
+    def configure(self, http2: bool = None, host_settings: dict = None):
+        """Applies to clients created afterwards."""
+        if http2 is not None:
+            if http2 and not _h2_available():
+                logger.warning("HTTP pool - HTTP2 requested but the h2 package is missing, using HTTP/1.1")
+                http2 = False
+            self.http2 = http2
+        if host_settings:
+            self.host_settings.update(host_settings)
+
+    def settings_for(self, host: str) -> HostSettings:
+        return self.host_settings.get(host, DEFAULT_SETTINGS)
+
+    def _key(self, url: str):
+        parts = urlsplit(url)
+        return parts.scheme, parts.netloc
+
+    def _options(self, host: str) -> dict:
+        settings = self.settings_for(host.split(":")[0])
+        return {
+            "timeout": settings.timeout,
+            "limits": settings.limits(),
+            "http2": self.http2,
+            "follow_redirects": True,
+        }
+
+    def client(self, url: str) -> httpx.Client:
+        key = self._key(url)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = self._clients[key] = httpx.Client(**self._options(key[1]))
+        return client
+
+    def async_client(self, url: str) -> httpx.AsyncClient:
+        """AsyncClient for the host of `url`; only use it from one event loop."""
+        key = self._key(url)
+        client = self._async_clients.get(key)
+        if client is None:
+            client = self._async_clients[key] = httpx.AsyncClient(**self._options(key[1]))
+        return client
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.client(url).get(url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> httpx.Response:
+        return self.client(url).post(url, **kwargs)
+
+    def stream(self, method: str, url: str, **kwargs):
+        return self.client(url).stream(method, url, **kwargs)
+
+    async def get_async(self, url: str, **kwargs) -> httpx.Response:
+        return await self.async_client(url).get(url, **kwargs)
+
+    async def post_async(self, url: str, **kwargs) -> httpx.Response:
+        return await self.async_client(url).post(url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+
+    async def aclose(self):
+        for client in self._async_clients.values():
+            await client.aclose()
+        self._async_clients.clear()
+
+
+http_pool = HttpPool()
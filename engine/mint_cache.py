@@ -0,0 +1,123 @@
+import asyncio
+import struct
+import threading
+from collections import OrderedDict
+from solders.pubkey import Pubkey  # type: ignore
+from loguru import logger
+
+# SPL mint layout (shared by Token-2022): mint_authority COption (36) | supply u64 | decimals u8
+MINT_SUPPLY_DECIMALS = struct.Struct("<36xQB")
+MULTIPLE_ACCOUNTS_LIMIT = 100
+
+
+class MintInfo:
+    __slots__ = ("program_id", "decimals", "supply")
+
+    def __init__(self, program_id: Pubkey, decimals: int, supply: int):
+        self.program_id = program_id
+        self.decimals = decimals
+        self.supply = supply
+
+    def __repr__(self):
+        return f"MintInfo(program_id={self.program_id}, decimals={self.decimals}, supply={self.supply})"
+
+
+def parse_mint_account(account) -> MintInfo:
+    supply, decimals = MINT_SUPPLY_DECIMALS.unpack_from(account.data)
+    return MintInfo(account.owner, decimals, supply)
+
+
+def _as_pubkey(mint) -> Pubkey:
+    return mint if isinstance(mint, Pubkey) else Pubkey.from_string(mint)
+
+
+class MintCache:
+    """Owner program (Token vs Token-2022), decimals and supply per mint.
+
+    Filled when a token is first detected so the sell paths read it from memory instead
+    of calling get_account_info_json_parsed(mint) again on every attempt. Program and
+    decimals never change for a mint; supply is informational and may be stale.
+    """
+
+    def __init__(self, max_size: int = 10_000):
+        self.max_size = max_size
+        self._infos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, mint):
+        key = str(mint)
+        with self._lock:
+            info = self._infos.get(key)
+            if info is not None:
+                self._infos.move_to_end(key)
+            return info
+
+    def put(self, mint, info: MintInfo):
+        key = str(mint)
+        with self._lock:
+            self._infos[key] = info
+            self._infos.move_to_end(key)
+            while len(self._infos) > self.max_size:
+                self._infos.popitem(last=False)
+        return info
+
+    def __contains__(self, mint):
+        return self.get(mint) is not None
+
+    def _store(self, mints, accounts):
+        for mint, account in zip(mints, accounts):
+            if account is None:
+                continue
+            try:
+                self.put(mint, parse_mint_account(account))
+            except struct.error:
+                logger.warning(f"Mint cache - {mint} is not a mint account")
+
+    def fetch(self, client, mint) -> MintInfo:
+        info = self.get(mint)
+        if info is None:
+            account = client.get_account_info(_as_pubkey(mint)).value
+            if account is None:
+                return None
+            info = self.put(mint, parse_mint_account(account))
+        return info
+
+    async def fetch_async(self, client, mint) -> MintInfo:
+        info = self.get(mint)
+        if info is None:
+            account = (await client.get_account_info(_as_pubkey(mint))).value
+            if account is None:
+                return None
+            info = self.put(mint, parse_mint_account(account))
+        return info
+
+    def _missing(self, mints):
+        return [str(mint) for mint in dict.fromkeys(str(mint) for mint in mints) if self.get(mint) is None]
+
+    def prefetch_many(self, client, mints):
+        """Loads every uncached mint with getMultipleAccounts, 100 per call."""
+        missing = self._missing(mints)
+        for i in range(0, len(missing), MULTIPLE_ACCOUNTS_LIMIT):
+            chunk = missing[i:i + MULTIPLE_ACCOUNTS_LIMIT]
+            try:
+                accounts = client.get_multiple_accounts([_as_pubkey(mint) for mint in chunk]).value
+            except Exception as e:
+                logger.warning(f"Mint cache - prefetch failed: {e}")
+                continue
+            self._store(chunk, accounts)
+
+    async def prefetch_many_async(self, client, mints):
+        missing = self._missing(mints)
+        chunks = [missing[i:i + MULTIPLE_ACCOUNTS_LIMIT] for i in range(0, len(missing), MULTIPLE_ACCOUNTS_LIMIT)]
+        responses = await asyncio.gather(
+            *(client.get_multiple_accounts([_as_pubkey(mint) for mint in chunk]) for chunk in chunks),
+            return_exceptions=True,
+        )
+        for chunk, resp in zip(chunks, responses):
+            if isinstance(resp, Exception):
+                logger.warning(f"Mint cache - prefetch failed: {resp}")
+                continue
+            self._store(chunk, resp.value)
+
+
+mint_cache = MintCache()
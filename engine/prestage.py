@@ -0,0 +1,196 @@
+import asyncio
+import numpy as np
+from loguru import logger
+from solders.compute_budget import set_compute_unit_limit  # type: ignore
+from solders.message import MessageV0  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from engine.mint_cache import mint_cache, MULTIPLE_ACCOUNTS_LIMIT
+from engine.wallet_watcher import parse_token_account
+from pumpfun.coin_data import get_coin_data_many_async
+from pumpfun.curve import value_holdings
+from pumpfun.pda_cache import pda_cache
+from pumpfun.pump_fun import StagedSell, TOKEN_PROGRAM, FEE_RECIPIENT, make_sell_instruction
+from engine.blockhash import recent_blockhash_async
+from engine.fees import MAX_COMPUTE_UNIT_LIMIT, simulate_units_async, track_accounts
+from raydium.create_close_account import fetch_pool_keys_async
+from raydium.lookup_tables import get_lookup_table_manager
+from raydium.quote import fetch_pool_reserves_many_async, quote_holdings
+
+
+class SellStager:
+    """Prepares each held token's sell while its X_SECONDS hold runs.
+
+    pump.fun tokens get a StagedSell (accounts, raw balance, decimals, compute budget);
+    `run` re-reads the staged bonding curves in one batch every `refresh_interval` so
+    min-out at the deadline is computed from reserves at most that old without an RPC
+    call. Tokens that trade on Raydium (or whose curve completed) only have their pool
+    keys and mint info warmed (and the pool's lookup table created when a
+    LookupTableManager is set); their sell still goes through sell_async. `run` reads
+    those pools' reserves in the same refresh so `raydium_value` prices the holdings
+    with one vectorized quote.
+
+    Writable accounts of every staged sell are handed to the FeeEstimator. With
+    `simulate_units`, the first sell staged in each batch is simulated and its compute
+    units recorded, so later limits are sized from it.
+    """
+
+    def __init__(self, client, owner: Pubkey, refresh_interval: float = 2.0, simulate_units: bool = False):
+        self.client = client
+        self.owner = owner
+        self.refresh_interval = refresh_interval
+        self.simulate_units = simulate_units
+        self._staged = {}  # mint -> StagedSell
+        self._pools = {}  # Raydium mint -> (pool keys, raw balance)
+        self._reserves = {}  # amm id str -> PoolReserves at the last refresh
+        self._wakeup = asyncio.Event()
+
+    def __contains__(self, mint: str):
+        return mint in self._staged
+
+    def __len__(self):
+        return len(self._staged)
+
+    def get(self, mint: str):
+        return self._staged.get(mint)
+
+    def discard(self, mint: str):
+        self._staged.pop(mint, None)
+        self._pools.pop(mint, None)
+
+    def clear(self):
+        self._staged.clear()
+        self._pools.clear()
+        self._reserves.clear()
+
+    def value(self) -> dict:
+        """mint -> lamports the staged balances would sell for at the last refresh."""
+        coins = {mint: staged.coin_data for mint, staged in self._staged.items()}
+        return value_holdings(coins, {mint: staged.raw_balance for mint, staged in self._staged.items()})
+
+    def raydium_value(self) -> dict:
+        """mint -> what the Raydium holdings would sell for (lamports for SOL pairs) at the
+        last refresh; pools not read yet are left out."""
+        holdings = [(mint, balance, pool_keys) for mint, (pool_keys, balance) in self._pools.items()
+                    if str(pool_keys['amm_id']) in self._reserves]
+        if not holdings:
+            return {}
+        quotes = quote_holdings(holdings, self._reserves)
+        return dict(zip([mint for mint, _, _ in holdings], quotes.astype(np.int64).tolist()))
+
+    async def _raw_balances(self, mints) -> dict:
+        """mint -> raw amount of the owner's associated token account, batched."""
+        accounts = [pda_cache.associated_token_address(self.owner, Pubkey.from_string(mint)) for mint in mints]
+        chunks = [list(range(i, min(i + MULTIPLE_ACCOUNTS_LIMIT, len(mints)))) for i in range(0, len(mints), MULTIPLE_ACCOUNTS_LIMIT)]
+        responses = await asyncio.gather(
+            *(self.client.get_multiple_accounts([accounts[i] for i in chunk]) for chunk in chunks),
+            return_exceptions=True,
+        )
+        balances = {}
+        for chunk, resp in zip(chunks, responses):
+            if isinstance(resp, Exception):
+                logger.warning(f"Stager - token account fetch failed: {resp}")
+                continue
+            for i, account in zip(chunk, resp.value):
+                if account is not None:
+                    balances[mints[i]] = parse_token_account(account.data)[2]
+        return balances
+
+    async def _warm_raydium(self, mint: str, raw_balance: int = None):
+        try:
+            pool_keys = await fetch_pool_keys_async(mint, self.client)
+        except Exception as e:
+            logger.warning(f"Stager - pool keys for {mint} not resolved: {e}")
+            return
+        if pool_keys == "failed":
+            return
+        track_accounts([pool_keys['amm_id']])
+        if raw_balance:
+            self._pools[mint] = (pool_keys, raw_balance)
+        tables = get_lookup_table_manager()
+        if tables is not None:
+            await tables.ensure_async(self.client, pool_keys)
+
+    async def _simulate(self, staged: StagedSell):
+        """Records the compute units of selling the whole staged balance."""
+        instruction = make_sell_instruction(staged.coin_data, self.owner, staged.raw_balance, 0, staged.accounts)
+        try:
+            blockhash = await recent_blockhash_async(self.client)
+        except Exception as e:
+            logger.warning(f"Stager - no blockhash to simulate {staged.mint_str}: {e}")
+            return
+        message = MessageV0.try_compile(self.owner, [set_compute_unit_limit(MAX_COMPUTE_UNIT_LIMIT), instruction], [], blockhash)
+        units = await simulate_units_async(self.client, "pump_sell", message)
+        if units is not None:
+            logger.info(f"Stager - sell of {staged.mint_str} simulated at {units} compute units")
+
+    async def stage_many(self, mints):
+        mints = [mint for mint in dict.fromkeys(mints) if mint not in self._staged]
+        pump_mints = [mint for mint in mints if mint.endswith('pump')]
+        coins, balances, _ = await asyncio.gather(
+            get_coin_data_many_async(self.client, pump_mints),
+            self._raw_balances(mints),
+            mint_cache.prefetch_many_async(self.client, mints),
+        )
+
+        # the creator vault's bump search is the one derivation that needs the curve
+        for coin_data in coins.values():
+            pda_cache.creator_vault(coin_data.creator)
+        pda_cache.save()
+
+        raydium_mints = [mint for mint in mints if mint not in pump_mints]
+        staged = []
+        for mint in pump_mints:
+            coin_data = coins.get(mint)
+            mint_info = mint_cache.get(mint)
+            if coin_data is None or coin_data.complete:
+                raydium_mints.append(mint)
+            elif balances.get(mint) and mint_info is not None and mint_info.program_id == TOKEN_PROGRAM:
+                self._staged[mint] = StagedSell(mint, coin_data, self.owner, balances[mint], mint_info.decimals)
+                staged.append(self._staged[mint])
+                logger.info(f"Stager - pump.fun sell of {mint} staged")
+        if staged:
+            track_accounts([FEE_RECIPIENT] + [sell.coin_data.bonding_curve for sell in staged])
+            if self.simulate_units:
+                await self._simulate(staged[0])
+        if raydium_mints:
+            await asyncio.gather(*(self._warm_raydium(mint, balances.get(mint)) for mint in raydium_mints))
+        self._wakeup.set()
+
+    async def refresh(self):
+        """Re-reads every staged bonding curve (a completed curve drops its staged sell) and
+        the reserves of the warmed Raydium pools."""
+        if self._pools:
+            try:
+                self._reserves = await fetch_pool_reserves_many_async(self.client, [pool_keys for pool_keys, _ in self._pools.values()])
+            except Exception as e:
+                logger.warning(f"Stager - pool reserves not read: {e}")
+            values = self.raydium_value()
+            logger.debug(f"Stager - {len(values)} Raydium holdings worth {sum(values.values()) / 1e9:.4f} SOL")
+        if not self._staged:
+            return
+        coins = await get_coin_data_many_async(self.client, list(self._staged))
+        for mint, coin_data in coins.items():
+            staged = self._staged.get(mint)
+            if staged is None:
+                continue
+            if coin_data.complete:
+                logger.info(f"Stager - {mint} completed its curve, selling on Raydium")
+                self.discard(mint)
+                asyncio.ensure_future(self._warm_raydium(mint, staged.raw_balance))
+            elif coin_data.creator != staged.coin_data.creator:
+                self._staged[mint] = StagedSell(mint, coin_data, self.owner, staged.raw_balance, staged.decimals)
+            else:
+                staged.coin_data = coin_data
+        values = self.value()
+        logger.debug(f"Stager - {len(values)} staged pump.fun holdings worth {sum(values.values()) / 1e9:.4f} SOL")
+
+    async def run(self):
+        while True:
+            if not self._staged and not self._pools:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Stager - refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
@@ -0,0 +1,85 @@
+from loguru import logger
+
+
+class TokenRecord:
+    """One held token. Slotted so wallets with thousands of dust tokens stay small.
+    Whether its sell is in progress is the SellExecutor's lease, not kept here."""
+
+    __slots__ = ("token_id", "symbol", "balance", "detection_time")
+
+    def __init__(self, token_id: str, symbol: str = "", balance=0, detection_time: int = 0):
+        self.token_id = token_id
+        self.symbol = symbol
+        self.balance = balance
+        self.detection_time = detection_time
+
+    @classmethod
+    def from_dict(cls, token: dict) -> "TokenRecord":
+        return cls(
+            token_id=token["token_id"],
+            symbol=token.get("symbol", ""),
+            balance=token.get("balance", ""),
+            detection_time=token.get("detection_time", 0),
+        )
+
+    def to_dict(self) -> dict:
+        """The wallet_tokens.json shape the state stores persist."""
+        return {
+            "symbol": self.symbol,
+            "token_id": self.token_id,
+            "balance": self.balance,
+            "detection_time": self.detection_time,
+        }
+
+    def __repr__(self):
+        return f"TokenRecord({self.token_id}, symbol={self.symbol!r}, balance={self.balance}, detection_time={self.detection_time})"
+
+
+class TokenRegistry:
+    """In-memory index of held tokens keyed by mint, shared by the wallet scan, the sell
+    scheduler and the state store. Lookups and new-token detection are hash operations;
+    every change is written through to `store` so only the delta hits disk."""
+
+    def __init__(self, store=None):
+        self.store = store
+        self._records = {}
+        if store is not None:
+            for token in store.all():
+                record = TokenRecord.from_dict(token)
+                self._records[record.token_id] = record
+            logger.info(f"Registry - loaded {len(self._records)} tokens")
+
+    def __contains__(self, token_id):
+        return token_id in self._records
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records.values())
+
+    def get(self, token_id):
+        return self._records.get(token_id)
+
+    def new_ids(self, token_ids) -> set:
+        """Mints in `token_ids` that are not tracked yet."""
+        return set(token_ids) - self._records.keys()
+
+    def add(self, records):
+        for record in records:
+            self._records[record.token_id] = record
+        if self.store is not None and records:
+            self.store.add([record.to_dict() for record in records])
+        return records
+
+    def remove(self, token_id):
+        if self._records.pop(token_id, None) is not None and self.store is not None:
+            self.store.remove(token_id)
+
+    def clear(self):
+        self._records.clear()
+        if self.store is not None:
+            self.store.clear()
+
+    def due(self, now: int, threshold_seconds: int):
+        return [record for record in self._records.values() if now - record.detection_time > threshold_seconds]
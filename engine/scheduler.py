@@ -0,0 +1,93 @@
+import asyncio
+import heapq
+import itertools
+import time
+from loguru import logger
+
+
+class SellScheduler:
+    """Min-heap of pending sells keyed on deadline (detection_time + X_SECONDS).
+
+    `run` sleeps until the earliest deadline and hands the due tokens to `fire`, so
+    sell timing no longer depends on a fixed poll interval. Rescheduling or cancelling
+    a token leaves its old heap entry behind; stale entries are skipped when popped and
+    the heap is compacted once they outnumber the live ones.
+    """
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._heap = []
+        self._entries = {}  # token_id -> (deadline, seq, payload)
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, token_id):
+        return token_id in self._entries
+
+    def schedule(self, token_id: str, deadline: float, payload=None):
+        seq = next(self._seq)
+        self._entries[token_id] = (deadline, seq, payload)
+        heapq.heappush(self._heap, (deadline, seq, token_id))
+        self._compact()
+        self._wakeup.set()
+
+    def cancel(self, token_id: str):
+        self._entries.pop(token_id, None)
+        self._compact()
+
+    def clear(self):
+        self._entries.clear()
+        self._heap.clear()
+        self._wakeup.set()
+
+    def next_deadline(self):
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float = None) -> list:
+        """Removes and returns (token_id, payload) for every entry whose deadline has passed."""
+        now = self._clock() if now is None else now
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, seq, token_id = heapq.heappop(self._heap)
+            entry = self._entries.get(token_id)
+            if entry is None or entry[1] != seq:
+                continue
+            del self._entries[token_id]
+            due.append((token_id, entry[2]))
+        return due
+
+    def _drop_stale(self):
+        while self._heap:
+            deadline, seq, token_id = self._heap[0]
+            entry = self._entries.get(token_id)
+            if entry is not None and entry[1] == seq:
+                return
+            heapq.heappop(self._heap)
+
+    def _compact(self):
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [(deadline, seq, token_id) for token_id, (deadline, seq, _) in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    async def run(self, fire):
+        """Calls fire([(token_id, payload), ...]) with every token whose deadline has passed,
+        one call per wakeup so tokens due together can share their RPC reads. Never returns."""
+        while True:
+            self._wakeup.clear()
+            due = self.pop_due()
+            if due:
+                try:
+                    fire(due)
+                except Exception as e:
+                    logger.error(f"Scheduler - failed to fire sells for {[token_id for token_id, _ in due]}: {e}")
+
+            deadline = self.next_deadline()
+            timeout = None if deadline is None else max(deadline - self._clock(), 0)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
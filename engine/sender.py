@@ -0,0 +1,201 @@
+import asyncio
+import base64
+import itertools
+import time
+from collections import Counter
+import httpx
+from loguru import logger
+from solana.rpc.core import RPCException
+from solana.rpc.types import TxOpts
+from engine.confirmation import COMMITMENT_RANK, confirm_signature
+from engine.executor import mark_sent
+
+
+class SendResult:
+    __slots__ = ("signature", "confirmed", "sent", "first_accepted", "first_landed", "broadcasts", "elapsed")
+
+    def __init__(self, signature: str):
+        self.signature = signature
+        self.confirmed = None  # True / False (failed on-chain) / None (not seen before expiry)
+        self.sent = False  # at least one endpoint accepted it
+        self.first_accepted = None
+        self.first_landed = None
+        self.broadcasts = 0
+        self.elapsed = 0.0
+
+    def __repr__(self):
+        return (f"SendResult(signature={self.signature}, confirmed={self.confirmed}, "
+                f"first_landed={self.first_landed}, broadcasts={self.broadcasts}, elapsed={self.elapsed:.3f})")
+
+
+def _serialize(txn):
+    """(wire bytes, signature str) of a signed VersionedTransaction or legacy Transaction."""
+    if hasattr(txn, "serialize"):
+        return txn.serialize(), str(txn.signatures[0])
+    return bytes(txn), str(txn.signatures[0])
+
+
+class FanoutSender:
+    """Sends each signed transaction to every endpoint at once and keeps rebroadcasting
+    it every `rebroadcast_interval` until one of them reports it at `commitment`, its
+    lastValidBlockHeight passes, or `timeout` runs out.
+
+    Every endpoint gets its own keep-alive httpx client, so a broadcast is one request
+    per endpoint on an already open connection. After each round the endpoints are
+    asked for the signature status; the first one to report it is recorded as the
+    transaction's `first_landed` and counted in `first_landed_counts`.
+    """
+
+    def __init__(self, endpoints, rebroadcast_interval: float = 0.3, commitment: str = "confirmed",
+                 timeout: float = 60.0, skip_preflight: bool = True, request_timeout: float = 5.0):
+        self.endpoints = list(dict.fromkeys(endpoints))
+        self.rebroadcast_interval = rebroadcast_interval
+        self.commitment = commitment
+        self.timeout = timeout
+        self.skip_preflight = skip_preflight
+        self.first_landed_counts = Counter()
+        self._clients = {
+            endpoint: httpx.AsyncClient(timeout=request_timeout, limits=httpx.Limits(max_keepalive_connections=4))
+            for endpoint in self.endpoints
+        }
+        self._ids = itertools.count(1)
+        self._background = set()  # sends still running after send() moved on
+
+    async def close(self):
+        for task in self._background:
+            task.cancel()
+        await asyncio.gather(*(client.aclose() for client in self._clients.values()))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _rpc(self, endpoint: str, method: str, params: list):
+        resp = await self._clients[endpoint].post(
+            endpoint, json={"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params})
+        resp.raise_for_status()
+        body = resp.json()
+        if "error" in body:
+            raise RuntimeError(f"{method}: {body['error'].get('message', body['error'])}")
+        return body["result"]
+
+    async def _broadcast(self, encoded: str, result: SendResult, in_flight: dict):
+        """Sends to every endpoint whose previous send has finished and returns as soon as
+        one accepts (or all fail); slower endpoints finish in the background."""
+        params = [encoded, {"encoding": "base64", "skipPreflight": self.skip_preflight, "maxRetries": 0}]
+
+        async def send_one(endpoint):
+            try:
+                await self._rpc(endpoint, "sendTransaction", params)
+            except Exception as e:
+                if not result.sent:
+                    logger.warning(f"Sender - {endpoint} rejected {result.signature}: {e}")
+                return False
+            if result.first_accepted is None:
+                result.first_accepted = endpoint
+                mark_sent()
+            result.sent = True
+            return True
+
+        result.broadcasts += 1
+        for endpoint in self.endpoints:
+            task = in_flight.get(endpoint)
+            if task is None or task.done():
+                task = in_flight[endpoint] = asyncio.ensure_future(send_one(endpoint))
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+        pending = set(in_flight.values())
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if any(task.result() for task in done):
+                return
+
+    async def _check(self, result: SendResult):
+        """Asks every endpoint for the status; returns True/False once confirmed, else None."""
+        async def status_of(endpoint):
+            try:
+                value = (await self._rpc(endpoint, "getSignatureStatuses", [[result.signature]]))["value"][0]
+            except Exception:
+                return None
+            if value is not None and result.first_landed is None:
+                result.first_landed = endpoint
+                self.first_landed_counts[endpoint] += 1
+            return value
+
+        for value in await asyncio.gather(*(status_of(endpoint) for endpoint in self.endpoints)):
+            if value is None:
+                continue
+            level = value.get("confirmationStatus") or "finalized"
+            if COMMITMENT_RANK[level] >= COMMITMENT_RANK[self.commitment]:
+                return value.get("err") is None
+        return None
+
+    async def _expired(self, last_valid_block_height: int, round_no: int) -> bool:
+        endpoint = self.endpoints[round_no % len(self.endpoints)]
+        try:
+            return await self._rpc(endpoint, "getBlockHeight", [{"commitment": self.commitment}]) > last_valid_block_height
+        except Exception:
+            return False
+
+    async def send(self, txn, last_valid_block_height: int = None, detected_at: float = None) -> SendResult:
+        raw, signature = _serialize(txn)
+        encoded = base64.b64encode(raw).decode()
+        result = SendResult(signature)
+        start = time.monotonic()
+        deadline = start + self.timeout
+        in_flight = {}  # endpoint -> task of its latest sendTransaction
+
+        await self._broadcast(encoded, result, in_flight)
+        if not result.sent:
+            result.elapsed = time.monotonic() - start
+            return result
+
+        for round_no in itertools.count():
+            await asyncio.sleep(self.rebroadcast_interval)
+            confirmed = await self._check(result)
+            if confirmed is not None:
+                result.confirmed = confirmed
+                break
+            if time.monotonic() >= deadline:
+                break
+            if last_valid_block_height is not None and await self._expired(last_valid_block_height, round_no):
+                logger.info(f"Sender - blockhash of {signature} expired")
+                break
+            await self._broadcast(encoded, result, in_flight)
+
+        result.elapsed = time.monotonic() - start
+        since = f", {time.time() - detected_at:.3f}s after detection" if detected_at is not None else ""
+        logger.info(f"Sender - {signature} confirmed={result.confirmed} first landed via {result.first_landed} "
+                    f"after {result.broadcasts} broadcasts in {result.elapsed:.3f}s{since}")
+        return result
+
+
+_sender = None
+
+
+def set_transaction_sender(sender):
+    global _sender
+    _sender = sender
+
+
+def get_transaction_sender():
+    return _sender
+
+
+async def send_and_confirm(client, txn, last_valid_block_height: int = None, detected_at: float = None):
+    """(sent, confirmed) for a signed transaction: through the FanoutSender when one is
+    configured, otherwise one sendTransaction with preflight and confirm_signature."""
+    if _sender is not None:
+        result = await _sender.send(txn, last_valid_block_height, detected_at)
+        return result.sent, result.confirmed
+    raw, _ = _serialize(txn)
+    try:
+        signature = (await client.send_raw_transaction(raw, opts=TxOpts(skip_preflight=False))).value
+    except RPCException as e:
+        logger.info(f"Sender - transaction rejected: {e.args[0].message}")
+        return False, None
+    logger.info(f"Transaction Signature: {signature}")
+    mark_sent()
+    return True, await confirm_signature(client, signature, detected_at=detected_at)
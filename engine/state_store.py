@@ -0,0 +1,257 @@
+import json
+import os
+import sqlite3
+from loguru import logger
+
+WALLET_TOKENS_JSON = "data/wallet_tokens.json"
+WALLET_TOKENS_DB = "data/wallet_tokens.db"
+WALLET_TOKENS_JOURNAL = "data/wallet_tokens.journal"
+
+"""
+Token registry backends for auto_sell. A token is the dict written by write_wallet_tokens:
+{"symbol", "token_id", "balance", "detection_time"}. Every backend exposes the same calls
+(add / remove / get / all / due / clear / close, plus `in` and len) so auto_sell can switch
+between them with STATE_BACKEND in config.ini.
+"""
+
+
+def _atomic_write_json(path: str, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(data, file, indent=4)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+class JsonTokenStore:
+    """The original data/wallet_tokens.json layout. Still rewrites the whole file on every
+    change, but through a temp file and os.replace so a crash never leaves it half written."""
+
+    def __init__(self, path: str = WALLET_TOKENS_JSON):
+        self.path = path
+        try:
+            with open(path, "r") as file:
+                tokens = json.load(file)
+        except FileNotFoundError:
+            tokens = []
+        self._tokens = {token["token_id"]: token for token in tokens}
+
+    def __contains__(self, token_id):
+        return token_id in self._tokens
+
+    def __len__(self):
+        return len(self._tokens)
+
+    def get(self, token_id):
+        return self._tokens.get(token_id)
+
+    def all(self):
+        return list(self._tokens.values())
+
+    def due(self, now: int, threshold_seconds: int):
+        return [token for token in self._tokens.values() if now - token.get("detection_time", 0) > threshold_seconds]
+
+    def add(self, tokens):
+        if not tokens:
+            return
+        for token in tokens:
+            self._tokens[token["token_id"]] = token
+        self._flush()
+
+    def remove(self, token_id):
+        if self._tokens.pop(token_id, None) is not None:
+            self._flush()
+
+    def clear(self):
+        self._tokens.clear()
+        self._flush()
+
+    def close(self):
+        pass
+
+    def _flush(self):
+        _atomic_write_json(self.path, list(self._tokens.values()))
+
+
+class SqliteTokenStore:
+    """SQLite in WAL mode. Inserts, lookups and removes touch one row; due() walks the
+    detection_time index. The deadline of a token is detection_time + X_SECONDS, so that
+    index orders tokens by deadline while staying valid if X_SECONDS is changed."""
+
+    def __init__(self, path: str = WALLET_TOKENS_DB):
+        self.path = path
+        self._conn = sqlite3.connect(path, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            # balance has no declared type so ints and strings round-trip unchanged
+            "CREATE TABLE IF NOT EXISTS tokens ("
+            "token_id TEXT PRIMARY KEY, symbol TEXT, balance, detection_time INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tokens_detection_time ON tokens (detection_time)")
+
+    def __contains__(self, token_id):
+        return self._conn.execute("SELECT 1 FROM tokens WHERE token_id = ?", (token_id,)).fetchone() is not None
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM tokens").fetchone()[0]
+
+    def get(self, token_id):
+        row = self._conn.execute("SELECT * FROM tokens WHERE token_id = ?", (token_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def all(self):
+        return [dict(row) for row in self._conn.execute("SELECT * FROM tokens ORDER BY detection_time")]
+
+    def due(self, now: int, threshold_seconds: int):
+        rows = self._conn.execute(
+            "SELECT * FROM tokens WHERE detection_time < ? ORDER BY detection_time",
+            (now - threshold_seconds,),
+        )
+        return [dict(row) for row in rows]
+
+    def add(self, tokens):
+        if not tokens:
+            return
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO tokens (token_id, symbol, balance, detection_time) "
+                "VALUES (:token_id, :symbol, :balance, :detection_time)",
+                tokens,
+            )
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def remove(self, token_id):
+        self._conn.execute("DELETE FROM tokens WHERE token_id = ?", (token_id,))
+
+    def clear(self):
+        self._conn.execute("DELETE FROM tokens")
+
+    def close(self):
+        self._conn.close()
+
+
+class JournalTokenStore:
+    """Append-only JSON-lines journal of add/remove/clear records, replayed into memory on
+    open. Each change appends one fsynced line. A line torn by a crash is dropped during
+    replay, and the journal is compacted into a fresh snapshot once stale records
+    outnumber live tokens."""
+
+    def __init__(self, path: str = WALLET_TOKENS_JOURNAL, compact_min_records: int = 1000):
+        self.path = path
+        self.compact_min_records = compact_min_records
+        self._tokens = {}
+        self._records = 0
+        self._replay()
+        self._file = open(path, "a")
+
+    def _replay(self):
+        try:
+            file = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        valid_bytes = 0
+        with file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                self._apply(record)
+                self._records += 1
+                valid_bytes += len(line)
+        if valid_bytes != os.path.getsize(self.path):
+            logger.warning(f"State - dropping torn tail of {self.path}")
+            with open(self.path, "r+b") as file:
+                file.truncate(valid_bytes)
+
+    def _apply(self, record):
+        op = record["op"]
+        if op == "add":
+            token = record["token"]
+            self._tokens[token["token_id"]] = token
+        elif op == "remove":
+            self._tokens.pop(record["token_id"], None)
+        elif op == "clear":
+            self._tokens.clear()
+
+    def _append(self, records):
+        for record in records:
+            self._apply(record)
+            self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._records += len(records)
+        if self._records > max(self.compact_min_records, 2 * len(self._tokens)):
+            self.compact()
+
+    def compact(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as file:
+            for token in self._tokens.values():
+                file.write(json.dumps({"op": "add", "token": token}, separators=(",", ":")) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a")
+        self._records = len(self._tokens)
+
+    def __contains__(self, token_id):
+        return token_id in self._tokens
+
+    def __len__(self):
+        return len(self._tokens)
+
+    def get(self, token_id):
+        return self._tokens.get(token_id)
+
+    def all(self):
+        return list(self._tokens.values())
+
+    def due(self, now: int, threshold_seconds: int):
+        return [token for token in self._tokens.values() if now - token.get("detection_time", 0) > threshold_seconds]
+
+    def add(self, tokens):
+        if tokens:
+            self._append([{"op": "add", "token": token} for token in tokens])
+
+    def remove(self, token_id):
+        if token_id in self._tokens:
+            self._append([{"op": "remove", "token_id": token_id}])
+
+    def clear(self):
+        if self._tokens:
+            self._append([{"op": "clear"}])
+
+    def close(self):
+        self._file.close()
+
+
+def open_token_store(backend: str = "json", path: str = None):
+    """Opens the configured backend. A fresh sqlite/journal store imports the legacy
+    wallet_tokens.json once so held tokens keep their detection times."""
+    backend = (backend or "json").strip().lower()
+    if backend == "json":
+        return JsonTokenStore(path or WALLET_TOKENS_JSON)
+    if backend == "sqlite":
+        store = SqliteTokenStore(path or WALLET_TOKENS_DB)
+    elif backend == "journal":
+        store = JournalTokenStore(path or WALLET_TOKENS_JOURNAL)
+    else:
+        raise ValueError(f"Unknown STATE_BACKEND {backend!r}, expected json, sqlite or journal")
+
+    if len(store) == 0 and os.path.exists(WALLET_TOKENS_JSON):
+        legacy = JsonTokenStore(WALLET_TOKENS_JSON).all()
+        if legacy:
+            logger.info(f"State - importing {len(legacy)} tokens from {WALLET_TOKENS_JSON}")
+            store.add(legacy)
+    return store
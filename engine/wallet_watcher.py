@@ -0,0 +1,146 @@
+import asyncio
+import base64
+import json
+import struct
+import websockets
+from loguru import logger
+from solders.pubkey import Pubkey  # type: ignore
+
+TOKEN_PROGRAM = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+TOKEN_2022_PROGRAM = "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb"
+TOKEN_ACCOUNT_SIZE = 165
+# SPL token account layout: mint (32) | owner (32) | amount (u64)
+OWNER_OFFSET = 32
+AMOUNT_OFFSET = 64
+
+
+def ws_url_from_http(rpc_url: str) -> str:
+    if rpc_url.startswith("https://"):
+        return "wss://" + rpc_url[len("https://"):]
+    if rpc_url.startswith("http://"):
+        return "ws://" + rpc_url[len("http://"):]
+    return rpc_url
+
+
+def parse_token_account(data: bytes):
+    """Returns (mint, owner, amount) from raw SPL token account bytes."""
+    mint = str(Pubkey.from_bytes(data[:OWNER_OFFSET]))
+    owner = str(Pubkey.from_bytes(data[OWNER_OFFSET:AMOUNT_OFFSET]))
+    (amount,) = struct.unpack_from("<Q", data, AMOUNT_OFFSET)
+    return mint, owner, amount
+
+
+def token_from_account(mint: str, amount: int) -> dict:
+    """Shapes a token account update like an entry of get_assets_by_owner's result."""
+    return {
+        "id": mint,
+        "symbol": "",
+        "balance": amount,
+        "token_info": {"symbol": "", "balance": amount},
+    }
+
+
+class WalletWatcher:
+    """Pushes wallet token accounts into the detection pipeline over a Solana websocket.
+
+    One `programSubscribe` per token program, filtered on the owner field, so every
+    balance change of the wallet's token accounts arrives as it lands. `reconcile` is
+    an async callable returning a get_assets_by_owner style snapshot; it only runs
+    after each (re)connect to pick up whatever happened while the socket was down.
+    """
+
+    def __init__(self, ws_url: str, wallet_address: str, on_tokens, reconcile=None,
+                 programs=(TOKEN_PROGRAM, TOKEN_2022_PROGRAM), commitment: str = "confirmed",
+                 reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0):
+        self.ws_url = ws_url
+        self.wallet_address = wallet_address
+        self.on_tokens = on_tokens
+        self.reconcile = reconcile
+        self.programs = programs
+        self.commitment = commitment
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.connected = asyncio.Event()
+        self._stopped = False
+        self._ws = None
+
+    def _subscribe_request(self, request_id: int, program: str) -> str:
+        filters = [{"memcmp": {"offset": OWNER_OFFSET, "bytes": self.wallet_address}}]
+        if program == TOKEN_PROGRAM:
+            # Token-2022 accounts carry extensions, so only the legacy program has a fixed size
+            filters.append({"dataSize": TOKEN_ACCOUNT_SIZE})
+        return json.dumps({
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": "programSubscribe",
+            "params": [program, {"encoding": "base64", "commitment": self.commitment, "filters": filters}],
+        })
+
+    async def _subscribe(self, ws):
+        pending = {}
+        for request_id, program in enumerate(self.programs, start=1):
+            pending[request_id] = program
+            await ws.send(self._subscribe_request(request_id, program))
+
+        while pending:
+            msg = json.loads(await ws.recv())
+            if msg.get("id") in pending:
+                if "error" in msg:
+                    raise ConnectionError(f"programSubscribe failed: {msg['error']}")
+                logger.info(f"Watching {pending.pop(msg['id'])} accounts of {self.wallet_address} (sub {msg['result']})")
+            else:
+                # a notification racing the second subscription ack
+                await self._handle(msg)
+
+    async def _handle(self, msg: dict):
+        if msg.get("method") != "programNotification":
+            return
+        value = msg["params"]["result"]["value"]
+        data = base64.b64decode(value["account"]["data"][0])
+        mint, owner, amount = parse_token_account(data)
+        if owner != self.wallet_address or amount == 0:
+            return
+        logger.info(f"Watcher - token account update {value['pubkey']} mint {mint} amount {amount}")
+        await self._emit([token_from_account(mint, amount)])
+
+    async def _emit(self, tokens):
+        result = self.on_tokens(tokens)
+        if asyncio.iscoroutine(result):
+            await result
+
+    async def _reconcile(self):
+        if self.reconcile is None:
+            return
+        tokens = await self.reconcile()
+        if tokens:
+            await self._emit(tokens)
+
+    async def run(self):
+        delay = self.reconnect_delay
+        while not self._stopped:
+            try:
+                async with websockets.connect(self.ws_url) as ws:
+                    self._ws = ws
+                    await self._subscribe(ws)
+                    self.connected.set()
+                    delay = self.reconnect_delay
+                    await self._reconcile()
+                    async for raw in ws:
+                        await self._handle(json.loads(raw))
+            except (websockets.WebSocketException, OSError) as e:
+                # drops, refused handshakes (InvalidStatusCode on a 429/5xx) and timeouts alike
+                logger.warning(f"Watcher - websocket dropped: {e}")
+            finally:
+                self._ws = None
+                self.connected.clear()
+
+            if self._stopped:
+                break
+            logger.info(f"Watcher - reconnecting in {delay}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def stop(self):
+        self._stopped = True
+        if self._ws is not None:
+            asyncio.ensure_future(self._ws.close())
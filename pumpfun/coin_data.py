@@ -1,9 +1,13 @@
+import asyncio
+import struct
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Optional
+from functools import lru_cache
+from typing import Dict, Iterable, NamedTuple, Optional
+import numpy as np
 from construct import Flag, Int64ul, Padding, Struct, Bytes
 from solders.pubkey import Pubkey  # type: ignore
-from spl.token.instructions import get_associated_token_address
-from pumpfun.constants import PUMP_FUN_PROGRAM
+from pumpfun.pda_cache import pda_cache
 from loguru import logger
 
 @dataclass
@@ -17,38 +21,91 @@ class CoinData:
     complete: bool
     creator: Pubkey
 
+BONDING_CURVE_LAYOUT = Struct(
+    Padding(8),
+    "virtualTokenReserves" / Int64ul,
+    "virtualSolReserves" / Int64ul,
+    "realTokenReserves" / Int64ul,
+    "realSolReserves" / Int64ul,
+    "tokenTotalSupply" / Int64ul,
+    "complete" / Flag,
+    "creator" / Bytes(32),
+)
+MULTIPLE_ACCOUNTS_LIMIT = 100
+
+# BONDING_CURVE_LAYOUT compiled once: the hot path unpacks straight from the account
+# buffer instead of going through construct.
+BONDING_CURVE_STRUCT = struct.Struct("<8x5Q?32s")
+BONDING_CURVE_DTYPE = np.dtype([
+    ("discriminator", "V8"),
+    ("virtual_token_reserves", "<u8"),
+    ("virtual_sol_reserves", "<u8"),
+    ("real_token_reserves", "<u8"),
+    ("real_sol_reserves", "<u8"),
+    ("token_total_supply", "<u8"),
+    ("complete", "?"),
+    ("creator", "V32"),
+])
+assert BONDING_CURVE_STRUCT.size == BONDING_CURVE_DTYPE.itemsize == BONDING_CURVE_LAYOUT.sizeof()
+
+class BondingCurveState(NamedTuple):
+    # field names match the BONDING_CURVE_LAYOUT container
+    virtualTokenReserves: int
+    virtualSolReserves: int
+    realTokenReserves: int
+    realSolReserves: int
+    tokenTotalSupply: int
+    complete: bool
+    creator: bytes
+
+def decode_bonding_curve(data) -> BondingCurveState:
+    """Decodes a bonding-curve account from bytes or a memoryview without copying it.
+    Newer curves carry trailing fields past the layout; they are ignored."""
+    return BondingCurveState._make(BONDING_CURVE_STRUCT.unpack_from(data))
+
+@lru_cache(maxsize=8)
+def _strided_dtype(itemsize: int) -> np.dtype:
+    """BONDING_CURVE_DTYPE padded out to a whole account of `itemsize` bytes."""
+    fields = BONDING_CURVE_DTYPE.fields
+    return np.dtype({
+        "names": BONDING_CURVE_DTYPE.names,
+        "formats": [fields[name][0] for name in BONDING_CURVE_DTYPE.names],
+        "offsets": [fields[name][1] for name in BONDING_CURVE_DTYPE.names],
+        "itemsize": itemsize,
+    })
+
+def decode_bonding_curves(buffers) -> np.ndarray:
+    """Decodes many bonding-curve accounts into one structured array, so each field is a
+    column (e.g. curves["virtual_sol_reserves"]). Raises ValueError on a short buffer.
+
+    Accounts of one size (the usual case) are joined whole and read through a padded
+    dtype; mixed sizes are trimmed to the layout first."""
+    size = BONDING_CURVE_DTYPE.itemsize
+    lengths = {len(buffer) for buffer in buffers}
+    if lengths and min(lengths) < size:
+        raise ValueError("bonding curve account shorter than the layout")
+    if len(lengths) == 1:
+        return np.frombuffer(b"".join(buffers), dtype=_strided_dtype(lengths.pop()))
+    return np.frombuffer(b"".join([buffer[:size] for buffer in buffers]), dtype=BONDING_CURVE_DTYPE)
+
 def get_virtual_reserves(client, bonding_curve: Pubkey):
-    bonding_curve_struct = Struct(
-        Padding(8),
-        "virtualTokenReserves" / Int64ul,
-        "virtualSolReserves" / Int64ul,
-        "realTokenReserves" / Int64ul,
-        "realSolReserves" / Int64ul,
-        "tokenTotalSupply" / Int64ul,
-        "complete" / Flag,
-        "creator" / Bytes(32),
-    )
-    
     try:
         account_info = client.get_account_info(bonding_curve)
-        data = account_info.value.data
-        parsed_data = bonding_curve_struct.parse(data)
-        return parsed_data
+        return decode_bonding_curve(account_info.value.data)
+    except Exception:
+        return None
+
+async def get_virtual_reserves_async(client, bonding_curve: Pubkey):
+    try:
+        account_info = await client.get_account_info(bonding_curve)
+        return decode_bonding_curve(account_info.value.data)
     except Exception:
         return None
 
 def derive_bonding_curve_accounts(mint_str: str):
     try:
-        logger.info(f"Deriving bonding curve for {mint_str}")
         mint = Pubkey.from_string(mint_str)
-        logger.info(f'mint {mint}')
-        bonding_curve, _ = Pubkey.find_program_address(
-            ["bonding-curve".encode(), bytes(mint)],
-            PUMP_FUN_PROGRAM
-        )
-        associated_bonding_curve = get_associated_token_address(bonding_curve, mint)
-        logger.info(f"associated bonding curve {associated_bonding_curve}")
-        return bonding_curve, associated_bonding_curve
+        return pda_cache.bonding_curve_accounts(mint)
     except Exception as e:
         logger.error(f'PF - error occured in deriving bonding curve account - {e}')
         return None, None
@@ -60,9 +117,21 @@ def get_coin_data(client, mint_str: str) -> Optional[CoinData]:
         return None
 
     virtual_reserves = get_virtual_reserves(client, bonding_curve)
+    return _build_coin_data(mint_str, bonding_curve, associated_bonding_curve, virtual_reserves)
+
+async def get_coin_data_async(client, mint_str: str) -> Optional[CoinData]:
+    logger.info("PF - retrieving coin data")
+    bonding_curve, associated_bonding_curve = derive_bonding_curve_accounts(mint_str)
+    if bonding_curve is None or associated_bonding_curve is None:
+        return None
+
+    virtual_reserves = await get_virtual_reserves_async(client, bonding_curve)
+    return _build_coin_data(mint_str, bonding_curve, associated_bonding_curve, virtual_reserves)
+
+def _build_coin_data(mint_str: str, bonding_curve: Pubkey, associated_bonding_curve: Pubkey, virtual_reserves) -> Optional[CoinData]:
     if virtual_reserves is None:
         return None
-    
+
     try:
         return CoinData(
             mint=Pubkey.from_string(mint_str),
@@ -77,3 +146,70 @@ def get_coin_data(client, mint_str: str) -> Optional[CoinData]:
     except Exception as e:
         logger.error(e)
         return None
+
+def _bonding_curve_chunks(mints: Iterable[str]):
+    """Unique mints with their derived curves, split into getMultipleAccounts-sized chunks."""
+    curves = []
+    for mint_str in dict.fromkeys(str(mint) for mint in mints):
+        bonding_curve, associated_bonding_curve = derive_bonding_curve_accounts(mint_str)
+        if bonding_curve is not None:
+            curves.append((mint_str, bonding_curve, associated_bonding_curve))
+    return [curves[i:i + MULTIPLE_ACCOUNTS_LIMIT] for i in range(0, len(curves), MULTIPLE_ACCOUNTS_LIMIT)]
+
+def _collect_coin_data(chunk, accounts, coins: Dict[str, CoinData]):
+    size = BONDING_CURVE_DTYPE.itemsize
+    found = [(curve, account.data) for curve, account in zip(chunk, accounts)
+             if account is not None and len(account.data) >= size]
+    if not found:
+        return
+    curves = decode_bonding_curves([data for _, data in found])
+    virtual_token_reserves = curves["virtual_token_reserves"].tolist()
+    virtual_sol_reserves = curves["virtual_sol_reserves"].tolist()
+    token_total_supply = curves["token_total_supply"].tolist()
+    complete = curves["complete"].tolist()
+    creators = curves["creator"].tobytes()
+    for i, ((mint_str, bonding_curve, associated_bonding_curve), _) in enumerate(found):
+        coins[mint_str] = CoinData(
+            mint=Pubkey.from_string(mint_str),
+            bonding_curve=bonding_curve,
+            associated_bonding_curve=associated_bonding_curve,
+            virtual_token_reserves=virtual_token_reserves[i],
+            virtual_sol_reserves=virtual_sol_reserves[i],
+            token_total_supply=token_total_supply[i],
+            complete=complete[i],
+            creator=Pubkey.from_bytes(creators[i * 32:(i + 1) * 32]),
+        )
+
+def get_coin_data_many(client, mints: Iterable[str], max_workers: int = 4) -> Dict[str, CoinData]:
+    """mint -> CoinData for every mint whose bonding curve exists, fetched 100 curves per
+    getMultipleAccounts call with the chunks in flight concurrently."""
+    chunks = _bonding_curve_chunks(mints)
+    coins = {}
+    if not chunks:
+        return coins
+
+    def fetch(chunk):
+        return client.get_multiple_accounts([bonding_curve for _, bonding_curve, _ in chunk]).value
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+        futures = [executor.submit(fetch, chunk) for chunk in chunks]
+        for chunk, future in zip(chunks, futures):
+            try:
+                _collect_coin_data(chunk, future.result(), coins)
+            except Exception as e:
+                logger.warning(f"PF - batched coin data fetch failed: {e}")
+    return coins
+
+async def get_coin_data_many_async(client, mints: Iterable[str]) -> Dict[str, CoinData]:
+    chunks = _bonding_curve_chunks(mints)
+    responses = await asyncio.gather(
+        *(client.get_multiple_accounts([bonding_curve for _, bonding_curve, _ in chunk]) for chunk in chunks),
+        return_exceptions=True,
+    )
+    coins = {}
+    for chunk, resp in zip(chunks, responses):
+        if isinstance(resp, Exception):
+            logger.warning(f"PF - batched coin data fetch failed: {resp}")
+            continue
+        _collect_coin_data(chunk, resp.value, coins)
+    return coins
@@ -0,0 +1,55 @@
+"""
+pump.fun bonding curve math.
+
+A sell of `amount` raw tokens against the curve's virtual reserves pays
+
+    sol_out = virtual_sol_reserves * amount // (virtual_token_reserves + amount)
+
+less the trade fee, which the program takes from the SOL out rounded up. Quoting the
+whole sell this way (instead of spot price times balance) accounts for the price impact
+of the sell itself, so min_sol_output no longer needs a large slippage to cover it.
+"""
+
+import numpy as np
+
+# protocol fee (95 bps) plus the creator fee (30 bps); the fee program can lower these
+SELL_FEE_BASIS_POINTS = 125
+
+
+def sell_quote(amount: int, virtual_token_reserves: int, virtual_sol_reserves: int,
+               fee_basis_points: int = SELL_FEE_BASIS_POINTS) -> int:
+    """Lamports received for selling `amount` raw tokens, after fees."""
+    if amount <= 0 or virtual_token_reserves <= 0 or virtual_sol_reserves <= 0:
+        return 0
+    sol_out = virtual_sol_reserves * amount // (virtual_token_reserves + amount)
+    fee = -(-sol_out * fee_basis_points // 10_000)
+    return max(sol_out - fee, 0)
+
+
+def sell_quotes(amounts, virtual_token_reserves, virtual_sol_reserves,
+                fee_basis_points: int = SELL_FEE_BASIS_POINTS) -> np.ndarray:
+    """sell_quote over arrays in one pass (float64, for valuation)."""
+    amounts = np.asarray(amounts, dtype=np.float64)
+    token_reserves = np.asarray(virtual_token_reserves, dtype=np.float64)
+    sol_reserves = np.asarray(virtual_sol_reserves, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sol_out = np.floor(sol_reserves * amounts / (token_reserves + amounts))
+    net = sol_out - np.ceil(sol_out * fee_basis_points / 10_000)
+    valid = (amounts > 0) & (token_reserves > 0) & (sol_reserves > 0)
+    return np.where(valid, np.maximum(net, 0.0), 0.0)
+
+
+def value_holdings(coins: dict, raw_balances: dict, fee_basis_points: int = SELL_FEE_BASIS_POINTS) -> dict:
+    """mint -> lamports from selling each whole raw balance, quoted in one NumPy call.
+    `coins` maps mint -> CoinData; mints without coin data or on a completed curve are
+    left out."""
+    mints = [mint for mint in raw_balances if mint in coins and not coins[mint].complete]
+    if not mints:
+        return {}
+    quotes = sell_quotes(
+        [raw_balances[mint] for mint in mints],
+        [coins[mint].virtual_token_reserves for mint in mints],
+        [coins[mint].virtual_sol_reserves for mint in mints],
+        fee_basis_points,
+    )
+    return dict(zip(mints, quotes.astype(np.int64).tolist()))
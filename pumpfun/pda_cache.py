@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from solders.pubkey import Pubkey  # type: ignore
+from spl.token.instructions import get_associated_token_address
+from pumpfun.constants import PUMP_FUN_PROGRAM
+from loguru import logger
+
+"""
+Memoized program-derived addresses for the pump.fun sell path.
+
+find_program_address is a bump search of sha256 hashes, and every pf_sell used to redo
+it for the bonding curve, its token account, the creator vault and the user's token
+account even though they are pure functions of mint, creator and owner. Results live in
+a bounded LRU; pass a path to keep them across restarts.
+"""
+
+
+class DerivedAddressCache:
+
+    def __init__(self, max_size: int = 50_000, path: str = None):
+        self.max_size = max_size
+        self.path = path
+        self._addresses = OrderedDict()  # (kind, seed bytes...) -> tuple of Pubkey
+        self._lock = threading.Lock()
+        self._dirty = False
+        if path:
+            self.load()
+
+    def __len__(self):
+        return len(self._addresses)
+
+    def _get(self, key):
+        with self._lock:
+            value = self._addresses.get(key)
+            if value is not None:
+                self._addresses.move_to_end(key)
+            return value
+
+    def _put(self, key, value):
+        with self._lock:
+            self._addresses[key] = value
+            self._addresses.move_to_end(key)
+            while len(self._addresses) > self.max_size:
+                self._addresses.popitem(last=False)
+            self._dirty = True
+        return value
+
+    def bonding_curve_accounts(self, mint: Pubkey):
+        """(bonding_curve, associated_bonding_curve) of a pump.fun mint."""
+        key = ("bonding_curve", bytes(mint))
+        value = self._get(key)
+        if value is None:
+            bonding_curve, _ = Pubkey.find_program_address([b"bonding-curve", bytes(mint)], PUMP_FUN_PROGRAM)
+            value = self._put(key, (bonding_curve, get_associated_token_address(bonding_curve, mint)))
+        return value
+
+    def creator_vault(self, creator: Pubkey) -> Pubkey:
+        key = ("creator_vault", bytes(creator))
+        value = self._get(key)
+        if value is None:
+            creator_vault, _ = Pubkey.find_program_address([b"creator-vault", bytes(creator)], PUMP_FUN_PROGRAM)
+            value = self._put(key, (creator_vault,))
+        return value[0]
+
+    def associated_token_address(self, owner: Pubkey, mint: Pubkey) -> Pubkey:
+        key = ("ata", bytes(owner), bytes(mint))
+        value = self._get(key)
+        if value is None:
+            value = self._put(key, (get_associated_token_address(owner, mint),))
+        return value[0]
+
+    def warm(self, mint: Pubkey, owner: Pubkey = None, creator: Pubkey = None):
+        """Derives everything a pump.fun sell of `mint` needs ahead of time."""
+        self.bonding_curve_accounts(mint)
+        if owner is not None:
+            self.associated_token_address(owner, mint)
+        if creator is not None:
+            self.creator_vault(creator)
+
+    def open(self, path: str):
+        """Persists the cache at `path` from now on, loading what is already there."""
+        self.path = path
+        self.load()
+        return self
+
+    def load(self):
+        try:
+            with open(self.path, "r") as file:
+                entries = json.load(file)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            logger.warning(f"PDA cache - ignoring unreadable {self.path}")
+            return
+        with self._lock:
+            for kind, seeds, addresses in entries[-self.max_size:]:
+                key = (kind, *(bytes.fromhex(seed) for seed in seeds))
+                self._addresses[key] = tuple(Pubkey.from_string(address) for address in addresses)
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            entries = [
+                [key[0], [seed.hex() for seed in key[1:]], [str(address) for address in value]]
+                for key, value in self._addresses.items()
+            ]
+            self._dirty = False
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(entries, file)
+        os.replace(tmp_path, self.path)
+
+
+pda_cache = DerivedAddressCache()
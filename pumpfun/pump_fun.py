@@ -1,23 +1,25 @@
+import asyncio
 import struct
 from solana.rpc.types import TokenAccountOpts, TxOpts
 from solana.transaction import AccountMeta
-from spl.token.instructions import (
-    CloseAccountParams,
-    close_account,
-    create_associated_token_account,
-    get_associated_token_address,
-)
+from spl.token.instructions import create_associated_token_account
 from solana.rpc.api import RPCException
-from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price  # type: ignore
 from solders.instruction import Instruction  # type: ignore
 from solders.message import MessageV0  # type: ignore
 from solders.transaction import VersionedTransaction  # type: ignore
 from solders.pubkey import Pubkey
-from pumpfun.utils import confirm_txn, get_token_balance
-from pumpfun.coin_data import get_coin_data
+from pumpfun.utils import confirm_txn, get_token_balance, get_token_balance_async
+from pumpfun.coin_data import get_coin_data, get_coin_data_async
+from pumpfun.curve import sell_quote
 from loguru import logger
 import time
-from raydium.Raydium import raydium_swap
+from raydium.Raydium import raydium_swap, raydium_swap_async
+from engine.mint_cache import mint_cache
+from pumpfun.pda_cache import pda_cache
+from engine.blockhash import recent_blockhash, recent_blockhash_info_async
+from engine.sender import send_and_confirm
+from engine.executor import mark_sent
+from engine.fees import MAX_COMPUTE_UNIT_LIMIT, compute_budget_instructions, unit_limit, unsigned_transaction
 
 GLOBAL = Pubkey.from_string("4wTV1YmiEkRvAtNtsSGPtUrqRYQMe5SKy2uB4Jjaxnjf")
 FEE_RECIPIENT = Pubkey.from_string("CebN5WGQ4jvEPvsVU4EoHEpgzq1VV7AbicfhtW4xC9iM")
@@ -30,14 +32,14 @@ PUMP_FUN_PROGRAM = Pubkey.from_string("6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF
 PUMP_FUN_FEE_PROGRAM = Pubkey.from_string("pfeeUxB6jkeY1Hxd7CsFCAjcbHA9rWtchMGdZ6VojVZ")
 PUMP_FUN_FEE_CONFIG = Pubkey.from_string("8Wf5TiAheLUqBrKXeYg2JtAFFMWtKdG2BSFgqUcPVwTt")
 SOL_DECIMAL = 10**9
+# compute units per pump.fun instruction until simulated units are recorded (engine/fees.py)
 UNIT_BUDGET = 100_000
-UNIT_PRICE = 1_000_000
+SELL_DISCRIMINATOR = bytes.fromhex("33e685a4017f83ad")
+SELL_ARGS = struct.Struct("<QQ")  # amount, min_sol_output
+MAX_TRANSACTION_SIZE = 1232  # bytes of one packet
 
 def derive_creator_vault(creator: Pubkey) -> Pubkey:
-    creator_vault, _ = Pubkey.find_program_address(
-        [b"creator-vault", bytes(creator)], PUMP_FUN_PROGRAM
-    )
-    return creator_vault
+    return pda_cache.creator_vault(creator)
 
 
 
@@ -70,7 +72,7 @@ def pf_buy(client, payer_keypair, mint_str: str, sol_in: float = 0.01, slippage:
             token_account_instruction = None
             logger.info(f"Token account found: {ASSOCIATED_USER}")
         except:
-            ASSOCIATED_USER = get_associated_token_address(USER, MINT)
+            ASSOCIATED_USER = pda_cache.associated_token_address(USER, MINT)
             token_account_instruction = create_associated_token_account(USER, USER, MINT)
             logger.info(f"Creating token account : {ASSOCIATED_USER}")
 
@@ -106,8 +108,7 @@ def pf_buy(client, payer_keypair, mint_str: str, sol_in: float = 0.01, slippage:
         swap_instruction = Instruction(PUMP_FUN_PROGRAM, bytes(data), keys)
 
         instructions = [
-            set_compute_unit_limit(UNIT_BUDGET),
-            set_compute_unit_price(UNIT_PRICE),
+            *compute_budget_instructions("pump_buy", UNIT_BUDGET),
         ]
         if token_account_instruction:
             instructions.append(token_account_instruction)
@@ -118,7 +119,7 @@ def pf_buy(client, payer_keypair, mint_str: str, sol_in: float = 0.01, slippage:
             payer_keypair.pubkey(),
             instructions,
             [],
-            client.get_latest_blockhash().value.blockhash,
+            recent_blockhash(client),
         )
 
         logger.info("Sending transaction...")
@@ -138,7 +139,60 @@ def pf_buy(client, payer_keypair, mint_str: str, sol_in: float = 0.01, slippage:
         logger.info(f"Error occurred during transaction: {e}")
         return False
 
-def pf_sell(client, payer_keypair, mint_str: str, percentage: int = 100, slippage: int = 15) -> bool:
+def sell_amounts(coin_data, token_balance: float, percentage: int, slippage: int, token_decimals: int = 6):
+    """Returns (amount, min_sol_output) for selling `percentage` of a ui `token_balance`.
+    min_sol_output is the curve's exact output for `amount` (price impact and fees
+    included) less `slippage` percent."""
+    token_decimal = 10**token_decimals
+    token_balance *= percentage / 100
+    amount = int(token_balance * token_decimal)
+    sol_out = sell_quote(amount, coin_data.virtual_token_reserves, coin_data.virtual_sol_reserves)
+    logger.info(f"Expected SOL out: {sol_out / SOL_DECIMAL:.9f} SOL")
+
+    min_sol_output = int(sol_out * (100 - slippage) // 100)
+    return amount, min_sol_output
+
+def sell_accounts(coin_data, user: Pubkey) -> list:
+    """AccountMetas of a pump.fun sell; they only depend on the mint, its creator and the seller."""
+    MINT = coin_data.mint
+    BONDING_CURVE = coin_data.bonding_curve
+    ASSOCIATED_BONDING_CURVE = coin_data.associated_bonding_curve
+    ASSOCIATED_USER = pda_cache.associated_token_address(user, MINT)
+    CREATOR_VAULT = derive_creator_vault(coin_data.creator)
+
+    keys = [
+        AccountMeta(pubkey=GLOBAL, is_signer=False, is_writable=False),
+        AccountMeta(pubkey=FEE_RECIPIENT, is_signer=False, is_writable=True),
+        AccountMeta(pubkey=MINT, is_signer=False, is_writable=False),
+        AccountMeta(pubkey=BONDING_CURVE, is_signer=False, is_writable=True),
+        AccountMeta(pubkey=ASSOCIATED_BONDING_CURVE, is_signer=False, is_writable=True),
+        AccountMeta(pubkey=ASSOCIATED_USER, is_signer=False, is_writable=True),
+        AccountMeta(pubkey=user, is_signer=True, is_writable=True),
+        AccountMeta(pubkey=SYSTEM_PROGRAM, is_signer=False, is_writable=False),
+        # CREATOR VAULT
+        AccountMeta(pubkey=CREATOR_VAULT, is_signer=False, is_writable=True),
+        # AccountMeta(pubkey=ASSOC_TOKEN_ACC_PROG, is_signer=False, is_writable=False),
+        AccountMeta(pubkey=TOKEN_PROGRAM, is_signer=False, is_writable=False),
+        AccountMeta(pubkey=EVENT_AUTHORITY, is_signer=False, is_writable=False),
+        AccountMeta(pubkey=PUMP_FUN_PROGRAM, is_signer=False, is_writable=False),
+        AccountMeta(pubkey=PUMP_FUN_FEE_CONFIG, is_signer=False, is_writable=False),
+        AccountMeta(pubkey=PUMP_FUN_FEE_PROGRAM, is_signer=False, is_writable=False),
+    ]
+    return keys
+
+def make_sell_instruction(coin_data, user: Pubkey, amount: int, min_sol_output: int, accounts: list = None) -> Instruction:
+    if accounts is None:
+        accounts = sell_accounts(coin_data, user)
+    return Instruction(PUMP_FUN_PROGRAM, SELL_DISCRIMINATOR + SELL_ARGS.pack(amount, min_sol_output), accounts)
+
+def _sellable_balance(token_balance):
+    ## Edgecase: token balance is mixed number (i.e. 1.5), then sell the whole number part (1)
+    if token_balance and token_balance % 1 != 0 and token_balance > 1: # is a mixed number
+        token_balance = int(token_balance)
+    return token_balance
+
+def pf_sell(client, payer_keypair, mint_str: str, percentage: int = 100, slippage: int = 15, coin_data=None) -> bool:
+    """coin_data may be passed in when it was already fetched in a batch (get_coin_data_many)."""
     try:
         logger.info(f"PF - Starting sell transaction for mint: {mint_str}")
 
@@ -146,8 +200,9 @@ def pf_sell(client, payer_keypair, mint_str: str, percentage: int = 100, slippag
             logger.info("Percentage must be between 1 and 100.")
             return False
 
-        coin_data = get_coin_data(client=client, mint_str=mint_str)
-        
+        if coin_data is None:
+            coin_data = get_coin_data(client=client, mint_str=mint_str)
+
         if not coin_data:
             logger.info("Failed to retrieve coin data.")
             return False
@@ -155,77 +210,29 @@ def pf_sell(client, payer_keypair, mint_str: str, percentage: int = 100, slippag
         if coin_data.complete:
             logger.info("Warning: This token has bonded and is only tradable on Raydium.")            
             logger.info('Initiating swap on raydium')
-            raydium_swap(ctx=client, payer=payer_keypair, desired_token_address=mint_str)
-            return
+            return raydium_swap(ctx=client, payer=payer_keypair, desired_token_address=mint_str, slippage=slippage)
 
-        MINT = coin_data.mint
-        BONDING_CURVE = coin_data.bonding_curve
-        ASSOCIATED_BONDING_CURVE = coin_data.associated_bonding_curve
         USER = payer_keypair.pubkey()
-        ASSOCIATED_USER = get_associated_token_address(USER, MINT)
-        CREATOR = coin_data.creator
-        CREATOR_VAULT = derive_creator_vault(CREATOR)
-        logger.info("Calculating token price...")
-        sol_decimal = 10**9
-        token_decimal = 10**6
-        token_price = (
-            coin_data.virtual_sol_reserves / sol_decimal
-        ) / (coin_data.virtual_token_reserves / token_decimal)
-        logger.info(f"Token Price: {token_price:.8f} SOL")
 
         logger.info("Retrieving token balance...")
-        token_balance = get_token_balance(client, payer_keypair, mint_str)
-        
-        ## Edgecase: token balance is mixed number (i.e. 1.5), then sell the whole number part (1)
-        if token_balance % 1 != 0 and token_balance > 1: # is a mixed number
-            token_balance = int(token_balance)
+        token_balance = _sellable_balance(get_token_balance(client, payer_keypair, mint_str))
 
-    
         logger.info(f"token_balance {token_balance}")
-        if token_balance == 0:
+        if not token_balance:
             logger.info("Token balance is zero. Nothing to sell.")
             return False
 
         logger.info("Calculating transaction amounts...")
-        token_balance *= percentage / 100
-        # for debugging
-        logger.info(f"token_balance {token_balance}")
-        logger.info(f"token_decimal {token_decimal}")
-        amount = int(token_balance * token_decimal)
-        sol_out = token_balance * token_price
-        slippage_adjustment = 1 - (slippage / 100)
-        min_sol_output = int(sol_out * slippage_adjustment * SOL_DECIMAL)
+        mint_info = mint_cache.fetch(client, mint_str)
+        token_decimals = mint_info.decimals if mint_info else 6
+        amount, min_sol_output = sell_amounts(coin_data, token_balance, percentage, slippage, token_decimals)
         logger.info(f"Amount: {amount}, Minimum Sol Out: {min_sol_output}")
 
         logger.info("Creating swap instructions...")
-        keys = [
-            AccountMeta(pubkey=GLOBAL, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=FEE_RECIPIENT, is_signer=False, is_writable=True),
-            AccountMeta(pubkey=MINT, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=BONDING_CURVE, is_signer=False, is_writable=True),
-            AccountMeta(pubkey=ASSOCIATED_BONDING_CURVE, is_signer=False, is_writable=True),
-            AccountMeta(pubkey=ASSOCIATED_USER, is_signer=False, is_writable=True),
-            AccountMeta(pubkey=USER, is_signer=True, is_writable=True),
-            AccountMeta(pubkey=SYSTEM_PROGRAM, is_signer=False, is_writable=False),
-            # CREATOR VAULT
-            AccountMeta(pubkey=CREATOR_VAULT, is_signer=False, is_writable=True),
-            # AccountMeta(pubkey=ASSOC_TOKEN_ACC_PROG, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=TOKEN_PROGRAM, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=EVENT_AUTHORITY, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=PUMP_FUN_PROGRAM, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=PUMP_FUN_FEE_CONFIG, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=PUMP_FUN_FEE_PROGRAM, is_signer=False, is_writable=False),
-        ]
-
-        data = bytearray()
-        data.extend(bytes.fromhex("33e685a4017f83ad"))
-        data.extend(struct.pack('<Q', amount))
-        data.extend(struct.pack('<Q', min_sol_output))
-        swap_instruction = Instruction(PUMP_FUN_PROGRAM, bytes(data), keys)
+        swap_instruction = make_sell_instruction(coin_data, USER, amount, min_sol_output)
 
         instructions = [
-            set_compute_unit_limit(UNIT_BUDGET),
-            set_compute_unit_price(UNIT_PRICE),
+            *compute_budget_instructions("pump_sell", UNIT_BUDGET),
             swap_instruction,
         ]
 
@@ -239,7 +246,7 @@ def pf_sell(client, payer_keypair, mint_str: str, percentage: int = 100, slippag
             payer_keypair.pubkey(),
             instructions,
             [],
-            client.get_latest_blockhash().value.blockhash,
+            recent_blockhash(client),
         )
 
         logger.info("Sending transaction...")
@@ -250,6 +257,7 @@ def pf_sell(client, payer_keypair, mint_str: str, percentage: int = 100, slippag
                 txn=VersionedTransaction(compiled_message, [payer_keypair]),
                 opts=TxOpts(skip_preflight=False)
             ).value
+            mark_sent()
         except RPCException as e:
             logger.info(f"Error: [{e.args[0].message}]...\nRetrying...")
             logger.info(f"sell error {mint_str} ",f" {e.args[0].message}")
@@ -275,3 +283,169 @@ def pf_sell(client, payer_keypair, mint_str: str, percentage: int = 100, slippag
     except Exception as e:
         logger.error(f"Error occurred during transaction: {e}")
         return False
+
+async def pf_sell_async(client, payer_keypair, mint_str: str, percentage: int = 100, slippage: int = 15, coin_data=None, detected_at: float = None) -> bool:
+    """Same as pf_sell but on a solana AsyncClient, so a slow confirmation only blocks this task.
+    detected_at is the token's detection time, used for confirmation latency."""
+    try:
+        logger.info(f"PF - Starting async sell transaction for mint: {mint_str}")
+
+        if not (1 <= percentage <= 100):
+            logger.info("Percentage must be between 1 and 100.")
+            return False
+
+        if coin_data is None:
+            coin_data = await get_coin_data_async(client=client, mint_str=mint_str)
+
+        if not coin_data:
+            logger.info("Failed to retrieve coin data.")
+            return False
+
+        if coin_data.complete:
+            logger.info("Warning: This token has bonded and is only tradable on Raydium.")
+            logger.info('Initiating swap on raydium')
+            return await raydium_swap_async(ctx=client, payer=payer_keypair, desired_token_address=mint_str, detected_at=detected_at, slippage=slippage)
+
+        USER = payer_keypair.pubkey()
+
+        token_balance = _sellable_balance(await get_token_balance_async(client, payer_keypair, mint_str))
+        logger.info(f"token_balance {token_balance}")
+        if not token_balance:
+            logger.info("Token balance is zero. Nothing to sell.")
+            return False
+
+        mint_info = await mint_cache.fetch_async(client, mint_str)
+        token_decimals = mint_info.decimals if mint_info else 6
+        amount, min_sol_output = sell_amounts(coin_data, token_balance, percentage, slippage, token_decimals)
+        logger.info(f"Amount: {amount}, Minimum Sol Out: {min_sol_output}")
+
+        instructions = [
+            *compute_budget_instructions("pump_sell", UNIT_BUDGET),
+            make_sell_instruction(coin_data, USER, amount, min_sol_output),
+        ]
+
+        blockhash_info = await recent_blockhash_info_async(client)
+        compiled_message = MessageV0.try_compile(USER, instructions, [], blockhash_info.blockhash)
+
+        start_time = time.time()
+        sent, confirmed = await send_and_confirm(
+            client, VersionedTransaction(compiled_message, [payer_keypair]),
+            blockhash_info.last_valid_block_height, detected_at)
+        if not sent:
+            logger.info(f"sell error {mint_str}: transaction not accepted")
+            return False
+        logger.info(f"Transaction confirmed: {confirmed}")
+        logger.info(f"Execution time {time.time() - start_time}")
+        return confirmed
+
+    except Exception as e:
+        logger.error(f"Error occurred during transaction: {e}")
+        return False
+
+class StagedSell:
+    """A pump.fun sell prepared during the hold window: route, accounts and the seller's
+    raw balance are resolved up front, so the deadline only computes amount and min-out
+    from `coin_data` (kept fresh by the caller), picks a blockhash, signs and sends."""
+    __slots__ = ("mint_str", "coin_data", "accounts", "raw_balance", "decimals")
+
+    def __init__(self, mint_str: str, coin_data, user: Pubkey, raw_balance: int, decimals: int):
+        self.mint_str = mint_str
+        self.coin_data = coin_data
+        self.accounts = sell_accounts(coin_data, user)
+        self.raw_balance = raw_balance
+        self.decimals = decimals
+
+    def ui_balance(self) -> float:
+        return self.raw_balance / 10**self.decimals
+
+def build_staged_sell(staged: StagedSell, payer_keypair, percentage: int, slippage: int, blockhash) -> VersionedTransaction:
+    token_balance = _sellable_balance(staged.ui_balance())
+    amount, min_sol_output = sell_amounts(staged.coin_data, token_balance, percentage, slippage, staged.decimals)
+    instruction = make_sell_instruction(staged.coin_data, payer_keypair.pubkey(), amount, min_sol_output, staged.accounts)
+    prefix = compute_budget_instructions("pump_sell", UNIT_BUDGET)
+    message = MessageV0.try_compile(payer_keypair.pubkey(), prefix + [instruction], [], blockhash)
+    return VersionedTransaction(message, [payer_keypair])
+
+async def pf_sell_staged_async(client, payer_keypair, staged: StagedSell, percentage: int = 100, slippage: int = 15, detected_at: float = None):
+    """Sends a StagedSell. Returns the confirmation result: False when nothing was sent
+    or the sell failed (so the caller can fall back to pf_sell_async), None when it went
+    out but was not confirmed and may still land."""
+    if not (1 <= percentage <= 100) or not staged.raw_balance:
+        return False
+    start_time = time.perf_counter()
+    blockhash_info = await recent_blockhash_info_async(client)
+    txn = build_staged_sell(staged, payer_keypair, percentage, slippage, blockhash_info.blockhash)
+    logger.info(f"PF - staged sell of {staged.mint_str} built in {(time.perf_counter() - start_time) * 1000:.2f}ms")
+    sent, confirmed = await send_and_confirm(client, txn, blockhash_info.last_valid_block_height, detected_at)
+    if not sent:
+        logger.info(f"staged sell error {staged.mint_str}: transaction not accepted")
+        return False
+    logger.info(f"Transaction confirmed: {confirmed}")
+    return confirmed
+
+def _batch_message(payer: Pubkey, instructions: list, blockhash) -> MessageV0:
+    """The sell instructions behind a compute unit limit sized to them."""
+    prefix = compute_budget_instructions("pump_sell", UNIT_BUDGET, len(instructions))
+    return MessageV0.try_compile(payer, prefix + instructions, [], blockhash)
+
+def _transaction_size(message: MessageV0) -> int:
+    # the wire size, signatures and the v0 version prefix included
+    return len(bytes(unsigned_transaction(message)))
+
+def build_staged_sell_batches(staged_sells: list, payer_keypair, percentage: int, slippage: int, blockhash) -> list:
+    """Packs the sells of several StagedSells into as few versioned transactions as fit
+    MAX_TRANSACTION_SIZE and MAX_COMPUTE_UNIT_LIMIT. Returns [(transaction, [StagedSell])]
+    in input order; sells with nothing to sell are left out."""
+    payer = payer_keypair.pubkey()
+    batches = []
+    members, instructions, message = [], [], None
+
+    def flush():
+        if members:
+            batches.append((VersionedTransaction(message, [payer_keypair]), list(members)))
+
+    for staged in staged_sells:
+        token_balance = _sellable_balance(staged.ui_balance())
+        amount, min_sol_output = sell_amounts(staged.coin_data, token_balance, percentage, slippage, staged.decimals)
+        if amount <= 0:
+            continue
+        instruction = make_sell_instruction(staged.coin_data, payer, amount, min_sol_output, staged.accounts)
+        candidate = _batch_message(payer, instructions + [instruction], blockhash)
+        fits = (_transaction_size(candidate) <= MAX_TRANSACTION_SIZE
+                and unit_limit("pump_sell", UNIT_BUDGET) * (len(instructions) + 1) <= MAX_COMPUTE_UNIT_LIMIT)
+        if members and not fits:
+            flush()
+            members, instructions = [], []
+            candidate = _batch_message(payer, [instruction], blockhash)
+        members.append(staged)
+        instructions.append(instruction)
+        message = candidate
+    flush()
+    return batches
+
+async def pf_sell_staged_batch_async(client, payer_keypair, staged_sells: list, percentage: int = 100, slippage: int = 15, detected_at: float = None) -> dict:
+    """Sends several StagedSells packed into batched transactions, all batches at once.
+    Returns mint -> confirmation result of its batch (None when it went out but was not
+    confirmed) for the sells that were sent; the others are left out. A batch is atomic:
+    one sell failing its min-out fails the others with it."""
+    results = {}
+    if not (1 <= percentage <= 100):
+        return results
+    start_time = time.perf_counter()
+    blockhash_info = await recent_blockhash_info_async(client)
+    batches = build_staged_sell_batches(staged_sells, payer_keypair, percentage, slippage, blockhash_info.blockhash)
+    logger.info(f"PF - {sum(len(members) for _, members in batches)} staged sells packed into {len(batches)} transactions "
+                f"in {(time.perf_counter() - start_time) * 1000:.2f}ms")
+
+    async def send(txn, members):
+        sent, confirmed = await send_and_confirm(client, txn, blockhash_info.last_valid_block_height, detected_at)
+        mints = ", ".join(staged.mint_str for staged in members)
+        if not sent:
+            logger.info(f"batched sell error {mints}: transaction not accepted")
+            return
+        logger.info(f"Batched sell of {mints} confirmed: {confirmed}")
+        for staged in members:
+            results[staged.mint_str] = confirmed
+
+    await asyncio.gather(*(send(txn, members) for txn, members in batches))
+    return results
@@ -1,13 +1,11 @@
-import json
-import time
-from solana.rpc.commitment import Processed, Confirmed
+from solana.rpc.commitment import Processed
 from solana.rpc.types import TokenAccountOpts
 from solana.transaction import Signature
 from solders.pubkey import Pubkey  # type: ignore
 from pumpfun.coin_data import get_coin_data
-import time
+from engine.confirmation import confirm_signature_blocking
 from loguru import logger 
-import requests
+from engine.http_pool import http_pool
 # from configparser import ConfigParser
 # import os, sys
 
@@ -40,29 +38,32 @@ def get_token_balance(client, payer_keypair, mint_str: str) -> float | None:
         logger.error(f"Error fetching token balance: {e}")
         return None
 
+async def get_token_balance_async(client, payer_keypair, mint_str: str) -> float | None:
+    try:
+        mint = Pubkey.from_string(mint_str)
+        response = await client.get_token_accounts_by_owner_json_parsed(
+            payer_keypair.pubkey(),
+            TokenAccountOpts(mint=mint),
+            commitment=Processed
+        )
+        accounts = response.value
+        if accounts:
+            token_amount = accounts[0].account.data.parsed['info']['tokenAmount']['uiAmount']
+            return float(token_amount)
+
+    except Exception as e:
+        logger.error(f"Error fetching token balance: {e}")
+        return None
+
 def confirm_txn(client, txn_sig: Signature, max_retries: int = 20, retry_interval: int = 3) -> bool:
-    retries = 1
-    
-    while retries < max_retries:
-        try:
-            txn_res = client.get_transaction(txn_sig, encoding="json", commitment=Confirmed, max_supported_transaction_version=0)
-            txn_json = json.loads(txn_res.value.transaction.meta.to_json())
-            
-            if txn_json['err'] is None:
-                logger.info("Transaction confirmed... try count:", retries)
-                return True
-            
-            logger.warning("Error: Transaction not confirmed. Retrying...")
-            if txn_json['err']:
-                logger.error("Transaction failed.")
-                return False
-        except Exception as e:
-            logger.error("Awaiting confirmation... try count:", retries)
-            retries += 1
-            time.sleep(retry_interval)
-    
-    logger.info("Max retries reached. Transaction confirmation failed.")
-    return None
+    """True once confirmed, False if the transaction failed, None if it did not land within
+    max_retries * retry_interval seconds. Polls getSignatureStatuses sub-second."""
+    confirmed = confirm_signature_blocking(client, txn_sig, timeout=max_retries * retry_interval)
+    if confirmed is None:
+        logger.info("Max retries reached. Transaction confirmation failed.")
+    elif not confirmed:
+        logger.error("Transaction failed.")
+    return confirmed
 
 def get_token_price(mint_str: str) -> float:
     try:
@@ -88,7 +89,7 @@ def get_token_price(mint_str: str) -> float:
 def is_tradeable_on_pumpfun(token_address):
     try:
         # PumpFun uses a specific API endpoint to check token status
-        response = requests.get(f"https://api.pump.fun/token/{token_address}")
+        response = http_pool.get(f"https://api.pump.fun/token/{token_address}")
         if response.status_code == 200:
             data = response.json()
             # Check if the token has active liquidity or is listed
@@ -1,22 +1,37 @@
-from raydium.sell_swap import sell
-from dexscreener import get_price, getSymbol
+from raydium.sell_swap import sell, sell_async
+from dexscreener import getSymbol
+import asyncio
 import time
 from loguru import logger
 
-def raydium_swap(ctx, payer, desired_token_address):
+def raydium_swap(ctx, payer, desired_token_address, slippage: float = None):
       
     token_symbol, SOl_Symbol = getSymbol(desired_token_address)
     logger.info(f"Raydium - Selling token {token_symbol} CA {desired_token_address}")
-    bought_token_curr_price = get_price(desired_token_address)
     
     start_time = time.time()
-    txS = sell(solana_client=ctx, TOKEN_TO_SWAP_SELL=desired_token_address, payer=payer, token_symbol=token_symbol, S0l_Symbol=SOl_Symbol)
+    txS = sell(solana_client=ctx, TOKEN_TO_SWAP_SELL=desired_token_address, payer=payer, token_symbol=token_symbol, S0l_Symbol=SOl_Symbol, slippage=slippage)
     end_time = time.time()
     execution_time = end_time - start_time
     logger.info(f"Total Sell Execution time: {execution_time} seconds")
 
-    if str(txS) != 'failed':
+    if txS is not None and str(txS) != 'failed':
         txS =  str(txS)   
         logger.info("-" * 79)
         logger.info(f"| {'Sold Price':<15} | {'Tx Sell':<40} |")
         logger.info("-" * 79)
+    return txS
+
+
+async def raydium_swap_async(ctx, payer, desired_token_address, detected_at: float = None, slippage: float = None):
+
+    token_symbol, SOl_Symbol = await asyncio.to_thread(getSymbol, desired_token_address)
+    logger.info(f"Raydium - Selling token {token_symbol} CA {desired_token_address}")
+
+    start_time = time.time()
+    txS = await sell_async(solana_client=ctx, TOKEN_TO_SWAP_SELL=desired_token_address, payer=payer, token_symbol=token_symbol, S0l_Symbol=SOl_Symbol, detected_at=detected_at, slippage=slippage)
+    logger.info(f"Total Sell Execution time: {time.time() - start_time} seconds")
+
+    if txS is not None and str(txS) != 'failed':
+        logger.info(f"| {'Tx Sell':<15} | {str(txS):<40} |")
+    return txS
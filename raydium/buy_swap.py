@@ -8,6 +8,7 @@ from solana.rpc.api import RPCException
 from solders.pubkey import Pubkey
 
 from raydium.create_close_account import get_token_account,fetch_pool_keys, get_token_account, make_swap_instruction
+from engine.blockhash import recent_blockhash
 from birdeye import getSymbol
 from webhook import sendWebhook
 
@@ -21,7 +22,7 @@ def buy(solana_client, TOKEN_TO_SWAP_BUY, payer, amount):
 
     mint = Pubkey.from_string(TOKEN_TO_SWAP_BUY)
     
-    pool_keys = fetch_pool_keys(str(mint))
+    pool_keys = fetch_pool_keys(str(mint), solana_client)
     if pool_keys == "failed":
         sendWebhook(f"a|BUY Pool ERROR {token_symbol}",f"[Raydium]: Pool Key Not Found")
         return "failed"
@@ -83,7 +84,7 @@ def buy(solana_client, TOKEN_TO_SWAP_BUY, payer, amount):
         try:
             print("7. Execute Transaction...")
             start_time = time.time()
-            txn = solana_client.send_transaction(swap_tx, payer, Wsol_account_keyPair)
+            txn = solana_client.send_transaction(swap_tx, payer, Wsol_account_keyPair, recent_blockhash=recent_blockhash(solana_client))
             txid_string_sig = txn.value
 
             print("8. Confirm transaction...")
@@ -7,18 +7,24 @@ from solana.rpc.types import TokenAccountOpts
 from solana.transaction import AccountMeta
 
 from raydium.layouts import SWAP_LAYOUT
+from raydium.pool_index import get_pool_index
+from raydium.pool_refresher import get_pool_refresher
+from raydium.pool_resolver import resolve_pool_keys, resolve_pool_keys_async
+from engine.mint_cache import mint_cache
 
-import json,requests
+import asyncio
 
 LAMPORTS_PER_SOL = 1000000000
 AMM_PROGRAM_ID = Pubkey.from_string('675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8')
 SERUM_PROGRAM_ID = Pubkey.from_string('srmqPvymJeFKQ4zGQed1GFppgkRHL9kaELCbyksJtPX')
 
 def make_swap_instruction(amount_in: int, token_account_in: Pubkey.from_string, token_account_out: Pubkey.from_string,
-                              accounts: dict, mint, ctx, owner) -> Instruction:
-        tokenPk = mint
-        accountProgramId = ctx.get_account_info_json_parsed(tokenPk)
-        TOKEN_PROGRAM_ID = accountProgramId.value.owner
+                              accounts: dict, mint, ctx, owner, token_program_id: Pubkey = None,
+                              min_amount_out: int = 0) -> Instruction:
+        if token_program_id is None:
+            TOKEN_PROGRAM_ID = mint_cache.fetch(ctx, mint).program_id
+        else:
+            TOKEN_PROGRAM_ID = token_program_id
         
         keys = [
             AccountMeta(pubkey=TOKEN_PROGRAM_ID, is_signer=False, is_writable=False),
@@ -45,7 +51,7 @@ def make_swap_instruction(amount_in: int, token_account_in: Pubkey.from_string,
             dict(
                 instruction=9,
                 amount_in=int(amount_in),
-                min_amount_out=0
+                min_amount_out=int(min_amount_out)
             )
         )
         return Instruction(AMM_PROGRAM_ID, data, keys)
@@ -71,6 +77,27 @@ def sell_get_token_account(ctx,
         print("Mint Token Not found")
         return None
 
+async def get_token_account_async(ctx, 
+                      owner: Pubkey.from_string, 
+                      mint: Pubkey.from_string):
+    try:
+        account_data = await ctx.get_token_accounts_by_owner(owner, TokenAccountOpts(mint))
+        return account_data.value[0].pubkey, None
+    except:
+        swap_associated_token_address = get_associated_token_address(owner, mint)
+        swap_token_account_Instructions = create_associated_token_account(owner, owner, mint)
+        return swap_associated_token_address, swap_token_account_Instructions
+
+async def sell_get_token_account_async(ctx, 
+                      owner: Pubkey.from_string, 
+                      mint: Pubkey.from_string):
+    try:
+        account_data = await ctx.get_token_accounts_by_owner(owner, TokenAccountOpts(mint))
+        return account_data.value[0].pubkey
+    except:
+        print("Mint Token Not found")
+        return None
+
 
 def extract_pool_info(pools_list: list, mint: str) -> dict:
     for pool in pools_list:
@@ -82,29 +109,7 @@ def extract_pool_info(pools_list: list, mint: str) -> dict:
     raise Exception(f'{mint} pool not found!')
 
 
-def fetch_pool_keys(mint: str):
-    amm_info = {}
-    all_pools = {}
-    try:
-        # Using this so it will be faster else no option, we go the slower way.
-        with open('all_pools.json', 'r') as file:
-            all_pools = json.load(file)
-        amm_info = extract_pool_info(all_pools, mint)
-    except:
-        resp = requests.get('https://api.raydium.io/v2/sdk/liquidity/mainnet.json', stream=True)
-        pools = resp.json()
-        official = pools['official']
-        unofficial = pools['unOfficial'] 
-        all_pools = official + unofficial
-
-        # Store all_pools in a JSON file
-        with open('all_pools.json', 'w') as file:
-            json.dump(all_pools, file)
-        try:
-            amm_info = extract_pool_info(all_pools, mint)
-        except:
-            return "failed"
-        
+def pool_keys_from_json(amm_info: dict) -> dict:
     return {
     'amm_id': Pubkey.from_string(amm_info['id']),
     'authority': Pubkey.from_string(amm_info['authority']),
@@ -125,3 +130,65 @@ def fetch_pool_keys(mint: str):
     'asks': Pubkey.from_string(amm_info['marketAsks']),
     'event_queue': Pubkey.from_string(amm_info['marketEventQueue'])
         }
+
+
+def _lookup_index(mint: str):
+    try:
+        pool_index = get_pool_index()
+        return pool_index.lookup(mint) if pool_index is not None else None
+    except Exception as e:
+        print(f"Pool index lookup failed for {mint}: {e}")
+        return None
+
+
+def _pool_missing(mint: str):
+    refresher = get_pool_refresher()
+    refresher.mark_missing(mint)
+    refresher.request_refresh()
+    return "failed"
+
+
+def fetch_pool_keys(mint: str, client=None):
+    """Pool keys from the local index, then from chain when a client is given (freshly
+    migrated tokens are not in the liquidity list yet). Never downloads in the caller's
+    thread: a miss asks the background refresher for a new list and fails fast, and the
+    mint stays in the negative cache so retries neither rescan the chain nor queue more
+    downloads (see raydium/pool_refresher.py)."""
+    pool_keys = _lookup_index(mint)
+    if pool_keys is not None:
+        return pool_keys
+    if get_pool_refresher().is_known_missing(mint):
+        return "failed"
+
+    if client is not None:
+        try:
+            pool_keys = resolve_pool_keys(client, mint)
+        except Exception as e:
+            # says nothing about the pool, so the mint is not cached as missing
+            print(f"On-chain pool lookup failed for {mint}: {e}")
+            get_pool_refresher().request_refresh()
+            return "failed"
+        if pool_keys is not None:
+            return pool_keys
+
+    return _pool_missing(mint)
+
+
+async def fetch_pool_keys_async(mint: str, client=None):
+    pool_keys = await asyncio.to_thread(_lookup_index, mint)
+    if pool_keys is not None:
+        return pool_keys
+    if get_pool_refresher().is_known_missing(mint):
+        return "failed"
+
+    if client is not None:
+        try:
+            pool_keys = await resolve_pool_keys_async(client, mint)
+        except Exception as e:
+            print(f"On-chain pool lookup failed for {mint}: {e}")
+            get_pool_refresher().request_refresh()
+            return "failed"
+        if pool_keys is not None:
+            return pool_keys
+
+    return _pool_missing(mint)
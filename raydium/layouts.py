@@ -1,4 +1,4 @@
-from construct import Bytes, Int8ul, Int64ul, BytesInteger
+from construct import Bytes, Int8ul, Int64ul, BytesInteger, Padding
 from construct import Struct as cStruct
 
 """Thanks to v0idum for creating layouts in python"""
@@ -15,7 +15,7 @@ SWAP_LAYOUT = cStruct(
     "min_amount_out" / Int64ul
 )
 
-# Not in use right now, might be useful in future
+# Raydium AMM v4 pool state, decoded by raydium/pool_resolver.py
 AMM_INFO_LAYOUT_V4 = cStruct(
     'status' / Int64ul,
     'nonce' / Int64ul,
@@ -77,3 +77,28 @@ AMM_INFO_LAYOUT_V4 = cStruct(
 
     'lpReserve' / Int64ul,
 )
+
+# Serum / OpenBook market state, the fields the AMM swap accounts need
+MARKET_STATE_LAYOUT_V3 = cStruct(
+    Padding(5),
+    'account_flags' / Int64ul,
+    'own_address' / Bytes(32),
+    'vault_signer_nonce' / Int64ul,
+    'base_mint' / Bytes(32),
+    'quote_mint' / Bytes(32),
+    'base_vault' / Bytes(32),
+    'base_deposits_total' / Int64ul,
+    'base_fees_accrued' / Int64ul,
+    'quote_vault' / Bytes(32),
+    'quote_deposits_total' / Int64ul,
+    'quote_fees_accrued' / Int64ul,
+    'quote_dust_threshold' / Int64ul,
+    'request_queue' / Bytes(32),
+    'event_queue' / Bytes(32),
+    'bids' / Bytes(32),
+    'asks' / Bytes(32),
+    'base_lot_size' / Int64ul,
+    'quote_lot_size' / Int64ul,
+    'fee_rate_bps' / Int64ul,
+    'referrer_rebate_accrued' / Int64ul,
+)
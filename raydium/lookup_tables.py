@@ -0,0 +1,212 @@
+import json
+import os
+import struct
+import threading
+from solana.rpc.commitment import Finalized
+from solana.rpc.types import TxOpts
+from solana.transaction import AccountMeta
+from solders.address_lookup_table_account import AddressLookupTableAccount  # type: ignore
+from solders.instruction import Instruction  # type: ignore
+from solders.message import MessageV0  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from solders.transaction import VersionedTransaction  # type: ignore
+from loguru import logger
+from engine.blockhash import recent_blockhash, recent_blockhash_async
+from engine.confirmation import confirm_signature_blocking
+from engine.sender import send_and_confirm
+
+"""
+Address lookup tables for Raydium sells.
+
+The AMM v4 swap names 17 accounts besides the seller's, and as a legacy transaction each
+costs 32 bytes. Every pool traded gets one table holding its static accounts (pool,
+vaults, market and the Serum program), created and extended in a single transaction the
+first time the pool is seen and remembered in a local file afterwards. A v0 sell then
+refers to those accounts by one-byte indexes, leaving room for compute budget
+instructions or more swaps.
+
+Tables cost rent (about 0.0064 SOL for 14 addresses) and are never closed here.
+"""
+
+ADDRESS_LOOKUP_TABLE_PROGRAM = Pubkey.from_string("AddressLookupTab1e1111111111111111111111111")
+SYSTEM_PROGRAM = Pubkey.from_string("11111111111111111111111111111111")
+SERUM_PROGRAM_ID = Pubkey.from_string('srmqPvymJeFKQ4zGQed1GFppgkRHL9kaELCbyksJtPX')
+# bincode of the program's instruction enum: u32 variant, then its fields
+CREATE_LOOKUP_TABLE = struct.Struct("<IQB")  # 0, recent_slot, bump_seed
+EXTEND_LOOKUP_TABLE = struct.Struct("<IQ")  # 2, number of addresses, then the addresses
+POOL_TABLE_KEYS = (
+    'amm_id', 'authority', 'open_orders', 'target_orders', 'base_vault', 'quote_vault',
+    'market_id', 'bids', 'asks', 'event_queue', 'market_base_vault', 'market_quote_vault',
+    'market_authority',
+)
+
+
+def lookup_table_address(authority: Pubkey, recent_slot: int):
+    return Pubkey.find_program_address([bytes(authority), recent_slot.to_bytes(8, 'little')], ADDRESS_LOOKUP_TABLE_PROGRAM)
+
+
+def create_lookup_table_instruction(authority: Pubkey, payer: Pubkey, recent_slot: int):
+    """(instruction, table address) creating a table owned by `authority`; `recent_slot`
+    must still be in the SlotHashes sysvar."""
+    table, bump = lookup_table_address(authority, recent_slot)
+    keys = [
+        AccountMeta(pubkey=table, is_signer=False, is_writable=True),
+        AccountMeta(pubkey=authority, is_signer=False, is_writable=False),
+        AccountMeta(pubkey=payer, is_signer=True, is_writable=True),
+        AccountMeta(pubkey=SYSTEM_PROGRAM, is_signer=False, is_writable=False),
+    ]
+    return Instruction(ADDRESS_LOOKUP_TABLE_PROGRAM, CREATE_LOOKUP_TABLE.pack(0, recent_slot, bump), keys), table
+
+
+def extend_lookup_table_instruction(table: Pubkey, authority: Pubkey, payer: Pubkey, addresses: list) -> Instruction:
+    keys = [
+        AccountMeta(pubkey=table, is_signer=False, is_writable=True),
+        AccountMeta(pubkey=authority, is_signer=True, is_writable=False),
+        AccountMeta(pubkey=payer, is_signer=True, is_writable=True),
+        AccountMeta(pubkey=SYSTEM_PROGRAM, is_signer=False, is_writable=False),
+    ]
+    data = EXTEND_LOOKUP_TABLE.pack(2, len(addresses)) + b"".join(bytes(address) for address in addresses)
+    return Instruction(ADDRESS_LOOKUP_TABLE_PROGRAM, data, keys)
+
+
+def pool_table_addresses(pool_keys: dict) -> list:
+    """Accounts of a pool's swap that can be loaded from a table. Invoked programs (AMM,
+    token program) have to stay in the message itself."""
+    return [pool_keys[key] for key in POOL_TABLE_KEYS] + [SERUM_PROGRAM_ID]
+
+
+class LookupTableManager:
+    """One lookup table per Raydium pool, owned and paid for by `payer_keypair`.
+
+    `tables_for(pool_keys)` is what a sell passes to MessageV0.try_compile: the pool's
+    table once its creation confirmed, else an empty list (the sell still works, with
+    every account inline). `ensure`/`ensure_async` create the table when it is missing;
+    call them when a token is detected, not on the sell path.
+    """
+
+    def __init__(self, payer_keypair, path: str = None):
+        self.payer_keypair = payer_keypair
+        self.path = path
+        self._tables = {}  # amm id str -> AddressLookupTableAccount
+        self._creating = set()
+        self._lock = threading.Lock()
+        if path:
+            self.load()
+
+    def __len__(self):
+        return len(self._tables)
+
+    def get(self, pool_keys: dict):
+        return self._tables.get(str(pool_keys['amm_id']))
+
+    def tables_for(self, pool_keys: dict) -> list:
+        table = self.get(pool_keys)
+        return [table] if table is not None else []
+
+    def _claim(self, pool_keys: dict) -> bool:
+        """True when the caller should create the pool's table."""
+        key = str(pool_keys['amm_id'])
+        with self._lock:
+            if key in self._tables or key in self._creating:
+                return False
+            self._creating.add(key)
+            return True
+
+    def _create_transaction(self, pool_keys: dict, recent_slot: int, blockhash):
+        payer = self.payer_keypair.pubkey()
+        addresses = pool_table_addresses(pool_keys)
+        create, table = create_lookup_table_instruction(payer, payer, recent_slot)
+        extend = extend_lookup_table_instruction(table, payer, payer, addresses)
+        message = MessageV0.try_compile(payer, [create, extend], [], blockhash)
+        return VersionedTransaction(message, [self.payer_keypair]), AddressLookupTableAccount(table, addresses)
+
+    def _created(self, pool_keys: dict, table: AddressLookupTableAccount, confirmed):
+        key = str(pool_keys['amm_id'])
+        with self._lock:
+            self._creating.discard(key)
+            if confirmed:
+                self._tables[key] = table
+        if confirmed:
+            logger.info(f"Lookup tables - {table.key} created for pool {key}")
+            self.save()
+        else:
+            logger.warning(f"Lookup tables - table for pool {key} not created (confirmed={confirmed})")
+
+    def ensure(self, client, pool_keys: dict):
+        if not self._claim(pool_keys):
+            return self.get(pool_keys)
+        table, confirmed = None, None
+        try:
+            recent_slot = client.get_slot(Finalized).value
+            txn, table = self._create_transaction(pool_keys, recent_slot, recent_blockhash(client))
+            signature = client.send_transaction(txn, opts=TxOpts(skip_preflight=False)).value
+            confirmed = confirm_signature_blocking(client, signature)
+        except Exception as e:
+            logger.warning(f"Lookup tables - creating table for pool {pool_keys['amm_id']} failed: {e}")
+        self._created(pool_keys, table, confirmed)
+        return self.get(pool_keys)
+
+    async def ensure_async(self, client, pool_keys: dict):
+        if not self._claim(pool_keys):
+            return self.get(pool_keys)
+        table, confirmed = None, None
+        try:
+            recent_slot = (await client.get_slot(Finalized)).value
+            txn, table = self._create_transaction(pool_keys, recent_slot, await recent_blockhash_async(client))
+            _, confirmed = await send_and_confirm(client, txn)
+        except Exception as e:
+            logger.warning(f"Lookup tables - creating table for pool {pool_keys['amm_id']} failed: {e}")
+        self._created(pool_keys, table, confirmed)
+        return self.get(pool_keys)
+
+    def open(self, path: str):
+        """Persists the tables at `path` from now on, loading what is already there."""
+        self.path = path
+        self.load()
+        return self
+
+    def load(self):
+        try:
+            with open(self.path, "r") as file:
+                entries = json.load(file)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            logger.warning(f"Lookup tables - ignoring unreadable {self.path}")
+            return
+        with self._lock:
+            for amm_id, entry in entries.items():
+                self._tables[amm_id] = AddressLookupTableAccount(
+                    Pubkey.from_string(entry["table"]),
+                    [Pubkey.from_string(address) for address in entry["addresses"]],
+                )
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            entries = {
+                amm_id: {"table": str(table.key), "addresses": [str(address) for address in table.addresses]}
+                for amm_id, table in self._tables.items()
+            }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(entries, file)
+        os.replace(tmp_path, self.path)
+
+
+_manager = None
+
+
+def set_lookup_table_manager(manager):
+    global _manager
+    _manager = manager
+
+
+def get_lookup_table_manager():
+    return _manager
+
+
+def lookup_tables_for(pool_keys: dict) -> list:
+    """Tables a sell through this pool can compile against (none without a manager)."""
+    return _manager.tables_for(pool_keys) if _manager is not None else []
@@ -0,0 +1,293 @@
+import codecs
+import json
+import os
+import sqlite3
+import struct
+import sys
+import threading
+from solders.pubkey import Pubkey
+from loguru import logger
+
+"""
+Compact mint -> pool index for SOL-paired Raydium AMM v4 pools.
+
+Each pool is one fixed-width record (18 raw pubkeys + base/quote decimals) stored as a
+BLOB in a WITHOUT ROWID SQLite table keyed on the raw 32-byte mint, so a lookup is one
+B-tree probe and never loads the liquidity list into memory.
+
+Both the offline build and the download stream the list: pool objects are decoded one at
+a time as bytes arrive and only SOL-paired pools are kept, so memory stays bounded by a
+single pool no matter how large the upstream list grows.
+
+Build it offline from an existing all_pools.json (or a raw mainnet.json):
+    python -m raydium.pool_index all_pools.json [all_pools.db]
+"""
+
+POOL_INDEX_PATH = 'all_pools.db'
+RAYDIUM_LIQUIDITY_URL = 'https://api.raydium.io/v2/sdk/liquidity/mainnet.json'
+CHUNK_SIZE = 1 << 16
+WSOL_MINT = 'So11111111111111111111111111111111111111112'
+
+# (pool_keys name, liquidity list field) in record order
+POOL_FIELDS = (
+    ('amm_id', 'id'),
+    ('authority', 'authority'),
+    ('base_mint', 'baseMint'),
+    ('quote_mint', 'quoteMint'),
+    ('lp_mint', 'lpMint'),
+    ('open_orders', 'openOrders'),
+    ('target_orders', 'targetOrders'),
+    ('base_vault', 'baseVault'),
+    ('quote_vault', 'quoteVault'),
+    ('market_id', 'marketId'),
+    ('market_base_vault', 'marketBaseVault'),
+    ('market_quote_vault', 'marketQuoteVault'),
+    ('market_authority', 'marketAuthority'),
+    ('bids', 'marketBids'),
+    ('asks', 'marketAsks'),
+    ('event_queue', 'marketEventQueue'),
+    ('program_id', 'programId'),
+    ('market_program_id', 'marketProgramId'),
+)
+# older liquidity lists omit the program ids
+FIELD_DEFAULTS = {
+    'programId': '675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8',
+    'marketProgramId': 'srmqPvymJeFKQ4zGQed1GFppgkRHL9kaELCbyksJtPX',
+}
+POOL_RECORD = struct.Struct('<' + '32s' * len(POOL_FIELDS) + 'BB')
+
+
+def sol_pair_mint(pool: dict):
+    """The non-SOL mint of a SOL-paired pool, or None for any other pool."""
+    if pool.get('quoteMint') == WSOL_MINT:
+        return pool.get('baseMint')
+    if pool.get('baseMint') == WSOL_MINT:
+        return pool.get('quoteMint')
+    return None
+
+
+def encode_pool(pool: dict) -> bytes:
+    keys = [bytes(Pubkey.from_string(pool.get(field) or FIELD_DEFAULTS[field])) for _, field in POOL_FIELDS]
+    return POOL_RECORD.pack(*keys, pool['baseDecimals'], pool['quoteDecimals'])
+
+
+def decode_pool(record: bytes) -> dict:
+    """Returns the pool keys dict make_swap_instruction takes."""
+    values = POOL_RECORD.unpack(record)
+    pool_keys = {name: Pubkey.from_bytes(raw) for (name, _), raw in zip(POOL_FIELDS, values)}
+    pool_keys['base_decimals'] = values[-2]
+    pool_keys['quote_decimals'] = values[-1]
+    return pool_keys
+
+
+class _ChunkReader:
+    """str view over an iterable of byte chunks for the streaming pool parser."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Appends the next chunk, dropping what has been consumed. False at end of stream."""
+        if self.eof:
+            return False
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self.eof = True
+            chunk = b''
+        self.buf = self.buf[self.pos:] + self._decoder.decode(chunk, final=self.eof)
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character without consuming it, '' at end of stream."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"pool list: expected {char!r} at offset {self.pos}")
+        self.pos += 1
+
+    def value(self, decoder=json.JSONDecoder()):
+        """Decodes one JSON value, pulling more chunks while it is incomplete."""
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # a number at the very end of the buffer may continue in the next chunk
+            if end == len(self.buf) and not self.eof and not isinstance(value, (dict, list, str)):
+                self.fill()
+                continue
+            self.pos = end
+            return value
+
+
+def _iter_array(reader):
+    reader.expect('[')
+    if reader.peek() == ']':
+        reader.pos += 1
+        return
+    while True:
+        item = reader.value()
+        if isinstance(item, dict):
+            yield item
+        char = reader.peek()
+        reader.pos += 1
+        if char == ']':
+            return
+        if char != ',':
+            raise ValueError(f"pool list: unexpected {char!r} in array")
+
+
+def iter_pool_objects(chunks):
+    """Yields pool dicts from the byte chunks of either an all_pools.json list or a raw
+    mainnet.json, whose top-level arrays ('official', 'unOfficial') hold the pools."""
+    reader = _ChunkReader(chunks)
+    char = reader.peek()
+    if char == '[':
+        yield from _iter_array(reader)
+        return
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        reader.value()  # key
+        reader.expect(':')
+        if reader.peek() == '[':
+            yield from _iter_array(reader)
+        else:
+            reader.value()
+        char = reader.peek()
+        reader.pos += 1
+        if char == '}':
+            return
+        if char != ',':
+            raise ValueError(f"pool list: unexpected {char!r} in object")
+
+
+def iter_file_chunks(path: str, chunk_size: int = CHUNK_SIZE):
+    with open(path, 'rb') as file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _create_schema(conn):
+    conn.execute("CREATE TABLE IF NOT EXISTS pools (mint BLOB PRIMARY KEY, record BLOB NOT NULL) WITHOUT ROWID")
+
+
+def insert_pools(conn, pools, batch_size: int = 5000) -> int:
+    """Inserts the SOL-paired pools of an iterable into an open index. The first pool seen
+    for a mint wins, like extract_pool_info's linear scan. Returns the number inserted."""
+    count = 0
+    batch = []
+    for pool in pools:
+        mint = sol_pair_mint(pool)
+        if mint is None:
+            continue
+        try:
+            batch.append((bytes(Pubkey.from_string(mint)), encode_pool(pool)))
+        except (KeyError, ValueError, TypeError, struct.error):
+            continue
+        if len(batch) >= batch_size:
+            count += _flush(conn, batch)
+            batch = []
+    if batch:
+        count += _flush(conn, batch)
+    return count
+
+
+def _flush(conn, batch) -> int:
+    before = conn.total_changes
+    conn.executemany("INSERT OR IGNORE INTO pools (mint, record) VALUES (?, ?)", batch)
+    return conn.total_changes - before
+
+
+def build_pool_index(pools, path: str = POOL_INDEX_PATH) -> int:
+    """Writes a fresh index next to `path` and moves it into place, so readers only ever see
+    a complete file."""
+    tmp_path = path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        _create_schema(conn)
+        with conn:
+            count = insert_pools(conn, pools)
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    logger.info(f"Raydium - pool index {path} built with {count} SOL pools")
+    return count
+
+
+class PoolIndex:
+
+    def __init__(self, path: str = POOL_INDEX_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+
+    def lookup(self, mint: str):
+        row = self._conn.execute("SELECT record FROM pools WHERE mint = ?", (bytes(Pubkey.from_string(mint)),)).fetchone()
+        return decode_pool(row[0]) if row is not None else None
+
+    def __contains__(self, mint: str):
+        return self._conn.execute("SELECT 1 FROM pools WHERE mint = ?", (bytes(Pubkey.from_string(mint)),)).fetchone() is not None
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM pools").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+_local = threading.local()  # this thread's (PoolIndex, mtime)
+
+
+def get_pool_index(path: str = POOL_INDEX_PATH):
+    """This thread's PoolIndex for `path`, reopened whenever the file has been replaced.
+    None if no index has been built yet. Each thread holds its own connection, so a
+    reopen never closes one another thread is reading from."""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    pool_index, opened_mtime = getattr(_local, 'pool_index', (None, None))
+    if pool_index is None or pool_index.path != path or opened_mtime != mtime:
+        if pool_index is not None:
+            pool_index.close()
+        pool_index = PoolIndex(path)
+        _local.pool_index = (pool_index, mtime)
+    return pool_index
+
+
+def main(argv):
+    if len(argv) < 2:
+        print("usage: python -m raydium.pool_index <all_pools.json|mainnet.json> [index path]")
+        return 1
+    src = argv[1]
+    dst = argv[2] if len(argv) > 2 else POOL_INDEX_PATH
+    build_pool_index(iter_pool_objects(iter_file_chunks(src)), dst)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
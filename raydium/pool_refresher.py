@@ -0,0 +1,150 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from loguru import logger
+from engine.http_pool import http_pool
+from raydium.pool_index import (
+    CHUNK_SIZE,
+    POOL_INDEX_PATH,
+    RAYDIUM_LIQUIDITY_URL,
+    build_pool_index,
+    iter_file_chunks,
+    iter_pool_objects,
+)
+
+ALL_POOLS_JSON = 'all_pools.json'
+
+
+class PoolIndexRefresher:
+    """Keeps the pool index fresh from a background thread so sells never wait on the
+    multi-hundred-MB liquidity list.
+
+    Downloads are conditional (ETag / Last-Modified remembered next to the index), so an
+    unchanged list costs one 304. A new list is streamed into a temp file and swapped in
+    with os.replace; get_pool_index() picks up the new file on its next call. Mints that
+    missed the index sit in a TTL'd negative cache so the same miss does not queue
+    another download until the entry expires.
+    """
+
+    def __init__(self, url: str = RAYDIUM_LIQUIDITY_URL, path: str = POOL_INDEX_PATH,
+                 interval: float = 600, negative_ttl: float = 300, max_negative: int = 10_000,
+                 timeout: float = 60):
+        self.url = url
+        self.path = path
+        self.meta_path = path + '.meta'
+        self.interval = interval
+        self.negative_ttl = negative_ttl
+        self.max_negative = max_negative
+        self.timeout = timeout
+        self._negative = OrderedDict()  # mint -> expiry (monotonic)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self.refreshed = threading.Event()
+
+    # negative cache
+
+    def is_known_missing(self, mint: str) -> bool:
+        with self._lock:
+            expiry = self._negative.get(mint)
+            if expiry is None:
+                return False
+            if expiry <= time.monotonic():
+                del self._negative[mint]
+                return False
+            return True
+
+    def mark_missing(self, mint: str):
+        with self._lock:
+            self._negative.pop(mint, None)
+            self._negative[mint] = time.monotonic() + self.negative_ttl
+            while len(self._negative) > self.max_negative:
+                self._negative.popitem(last=False)
+
+    def _clear_negative(self):
+        with self._lock:
+            self._negative.clear()
+
+    # refresh
+
+    def _load_meta(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.meta_path, 'r') as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_meta(self, meta: dict):
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(meta, file)
+        os.replace(tmp_path, self.meta_path)
+
+    def refresh(self) -> bool:
+        """One conditional fetch. Returns True when a new index was swapped in."""
+        if not os.path.exists(self.path) and os.path.exists(ALL_POOLS_JSON):
+            # one-off conversion of a list downloaded by older versions
+            build_pool_index(iter_pool_objects(iter_file_chunks(ALL_POOLS_JSON)), self.path)
+
+        meta = self._load_meta()
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+        with http_pool.stream('GET', self.url, headers=headers, timeout=self.timeout) as resp:
+            if resp.status_code == 304:
+                logger.info("Raydium - liquidity list unchanged")
+                return False
+            resp.raise_for_status()
+            build_pool_index(iter_pool_objects(resp.iter_bytes(CHUNK_SIZE)), self.path)
+            self._save_meta({
+                'etag': resp.headers.get('ETag'),
+                'last_modified': resp.headers.get('Last-Modified'),
+            })
+        self._clear_negative()
+        return True
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Raydium - pool list refresh failed: {e}")
+            self.refreshed.set()
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="raydium-pool-refresher", daemon=True)
+            self._thread.start()
+        return self
+
+    def request_refresh(self):
+        """Asks the background thread for a refresh now, starting it if needed. Never blocks."""
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        else:
+            self._wakeup.set()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+
+
+_refresher = None
+
+
+def get_pool_refresher() -> PoolIndexRefresher:
+    global _refresher
+    if _refresher is None:
+        _refresher = PoolIndexRefresher()
+    return _refresher
@@ -0,0 +1,175 @@
+import asyncio
+import struct
+from collections import OrderedDict
+from construct import Bytes, BytesInteger, FormatField
+from solana.rpc.types import MemcmpOpts
+from solders.pubkey import Pubkey
+from loguru import logger
+from raydium.layouts import AMM_INFO_LAYOUT_V4, MARKET_STATE_LAYOUT_V3
+
+"""
+On-chain pool discovery for Raydium AMM v4.
+
+getProgramAccounts on the AMM program with memcmp filters on base_mint / quote_mint finds
+the pool of a freshly migrated token without the off-chain liquidity list, then one
+getAccountInfo on its market supplies the Serum/OpenBook keys. Both accounts are decoded
+with struct.Struct formats compiled once from the construct layouts in raydium/layouts.py.
+"""
+
+AMM_PROGRAM_ID = Pubkey.from_string('675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8')
+WSOL_MINT = Pubkey.from_string('So11111111111111111111111111111111111111112')
+AMM_AUTHORITY, _ = Pubkey.find_program_address([b'amm authority'], AMM_PROGRAM_ID)
+AMM_INFO_V4_ACCOUNT_SIZE = 752  # AMM_INFO_LAYOUT_V4 plus trailing padding
+
+
+def compile_layout(layout):
+    """Flattens a construct Struct of fixed-size fields into (struct.Struct, field offsets,
+    names of 128-bit integer fields). Unnamed fields become pad bytes."""
+    fmt = '<'
+    offsets = {}
+    wide_ints = []
+    offset = 0
+    for subcon in layout.subcons:
+        size = subcon.sizeof()
+        name = subcon.name
+        inner = getattr(subcon, 'subcon', subcon)
+        if name is None:
+            fmt += f'{size}x'
+        elif isinstance(inner, FormatField):
+            fmt += inner.fmtstr.lstrip('<>=!')
+        elif isinstance(inner, BytesInteger):
+            fmt += f'{size}s'
+            wide_ints.append(name)
+        elif isinstance(inner, Bytes):
+            fmt += f'{size}s'
+        else:
+            raise TypeError(f'{name}: {type(inner).__name__} is not a fixed-size field')
+        if name is not None:
+            offsets[name] = offset
+        offset += size
+    return struct.Struct(fmt), offsets, tuple(wide_ints)
+
+
+AMM_INFO_V4_STRUCT, AMM_INFO_V4_OFFSETS, _AMM_WIDE_INTS = compile_layout(AMM_INFO_LAYOUT_V4)
+MARKET_V3_STRUCT, MARKET_V3_OFFSETS, _ = compile_layout(MARKET_STATE_LAYOUT_V3)
+_AMM_NAMES = tuple(subcon.name for subcon in AMM_INFO_LAYOUT_V4.subcons if subcon.name)
+_MARKET_NAMES = tuple(subcon.name for subcon in MARKET_STATE_LAYOUT_V3.subcons if subcon.name)
+
+
+def decode_amm_info(data) -> dict:
+    values = dict(zip(_AMM_NAMES, AMM_INFO_V4_STRUCT.unpack_from(data)))
+    for name in _AMM_WIDE_INTS:
+        values[name] = int.from_bytes(values[name], 'little')
+    return values
+
+
+def decode_market(data) -> dict:
+    return dict(zip(_MARKET_NAMES, MARKET_V3_STRUCT.unpack_from(data)))
+
+
+def pool_keys_from_accounts(amm_id: Pubkey, amm: dict, market: dict) -> dict:
+    """Builds the dict fetch_pool_keys returns from decoded pool and market accounts."""
+    market_id = Pubkey.from_bytes(amm['market_id'])
+    market_program_id = Pubkey.from_bytes(amm['serum_program_id'])
+    market_authority = Pubkey.create_program_address(
+        [bytes(market_id), market['vault_signer_nonce'].to_bytes(8, 'little')],
+        market_program_id,
+    )
+    return {
+        'amm_id': amm_id,
+        'authority': AMM_AUTHORITY,
+        'base_mint': Pubkey.from_bytes(amm['base_mint']),
+        'base_decimals': amm['base_decimal'],
+        'quote_mint': Pubkey.from_bytes(amm['quote_mint']),
+        'quote_decimals': amm['quote_decimal'],
+        'lp_mint': Pubkey.from_bytes(amm['lp_mint']),
+        'open_orders': Pubkey.from_bytes(amm['open_orders']),
+        'target_orders': Pubkey.from_bytes(amm['target_orders']),
+        'base_vault': Pubkey.from_bytes(amm['base_vault']),
+        'quote_vault': Pubkey.from_bytes(amm['quote_vault']),
+        'market_id': market_id,
+        'market_base_vault': Pubkey.from_bytes(market['base_vault']),
+        'market_quote_vault': Pubkey.from_bytes(market['quote_vault']),
+        'market_authority': market_authority,
+        'bids': Pubkey.from_bytes(market['bids']),
+        'asks': Pubkey.from_bytes(market['asks']),
+        'event_queue': Pubkey.from_bytes(market['event_queue']),
+        'program_id': AMM_PROGRAM_ID,
+        'market_program_id': market_program_id,
+    }
+
+
+def _pool_filters(base_mint: Pubkey, quote_mint: Pubkey):
+    return [
+        AMM_INFO_V4_ACCOUNT_SIZE,
+        MemcmpOpts(offset=AMM_INFO_V4_OFFSETS['base_mint'], bytes=str(base_mint)),
+        MemcmpOpts(offset=AMM_INFO_V4_OFFSETS['quote_mint'], bytes=str(quote_mint)),
+    ]
+
+
+def _pick_pool(accounts):
+    """First decodable pool, preferring ones that are open for swaps."""
+    pools = []
+    for keyed in accounts:
+        try:
+            pools.append((keyed.pubkey, decode_amm_info(keyed.account.data)))
+        except struct.error:
+            continue
+    # status 1 = initialized, 6 = swap only
+    pools.sort(key=lambda pool: pool[1]['status'] not in (1, 6))
+    return pools[0] if pools else None
+
+
+_resolved = OrderedDict()
+_RESOLVED_MAX = 1024
+
+
+def _remember(mint: str, pool_keys: dict) -> dict:
+    _resolved[mint] = pool_keys
+    _resolved.move_to_end(mint)
+    while len(_resolved) > _RESOLVED_MAX:
+        _resolved.popitem(last=False)
+    return pool_keys
+
+
+def resolve_pool_keys(client, mint: str):
+    """SOL pool keys for `mint` read straight from chain, or None if it has no AMM v4 pool."""
+    if mint in _resolved:
+        return _resolved[mint]
+    mint_pk = Pubkey.from_string(mint)
+    pool = None
+    for base, quote in ((mint_pk, WSOL_MINT), (WSOL_MINT, mint_pk)):
+        resp = client.get_program_accounts(AMM_PROGRAM_ID, encoding='base64', filters=_pool_filters(base, quote))
+        pool = _pick_pool(resp.value)
+        if pool is not None:
+            break
+    if pool is None:
+        return None
+
+    amm_id, amm = pool
+    market_info = client.get_account_info(Pubkey.from_bytes(amm['market_id'])).value
+    if market_info is None:
+        return None
+    logger.info(f"Raydium - resolved pool {amm_id} for {mint} on-chain")
+    return _remember(mint, pool_keys_from_accounts(amm_id, amm, decode_market(market_info.data)))
+
+
+async def resolve_pool_keys_async(client, mint: str):
+    """resolve_pool_keys on an AsyncClient; both pairings are queried concurrently."""
+    if mint in _resolved:
+        return _resolved[mint]
+    mint_pk = Pubkey.from_string(mint)
+    responses = await asyncio.gather(*(
+        client.get_program_accounts(AMM_PROGRAM_ID, encoding='base64', filters=_pool_filters(base, quote))
+        for base, quote in ((mint_pk, WSOL_MINT), (WSOL_MINT, mint_pk))
+    ))
+    pool = _pick_pool([keyed for resp in responses for keyed in resp.value])
+    if pool is None:
+        return None
+
+    amm_id, amm = pool
+    market_info = (await client.get_account_info(Pubkey.from_bytes(amm['market_id']))).value
+    if market_info is None:
+        return None
+    logger.info(f"Raydium - resolved pool {amm_id} for {mint} on-chain")
+    return _remember(mint, pool_keys_from_accounts(amm_id, amm, decode_market(market_info.data)))
@@ -1,140 +1,239 @@
 from spl.token.instructions import close_account, CloseAccountParams
-from solana.rpc.types import TokenAccountOpts
+from solana.rpc.types import TokenAccountOpts, TxOpts
 from solana.rpc.api import RPCException
-from solana.transaction import Transaction
+from solders.message import MessageV0
+from solders.transaction import VersionedTransaction
 from solders.pubkey import Pubkey
 from raydium.create_close_account import  fetch_pool_keys, sell_get_token_account,get_token_account, make_swap_instruction
+from raydium.create_close_account import fetch_pool_keys_async, sell_get_token_account_async, get_token_account_async
+from engine.mint_cache import mint_cache
+from engine.confirmation import confirm_signature_blocking
+from engine.blockhash import recent_blockhash, recent_blockhash_info_async
+from engine.sender import send_and_confirm
+from engine.executor import mark_sent
+from raydium.quote import sell_min_amount_out, sell_min_amount_out_async
+from raydium.lookup_tables import lookup_tables_for
+from engine.fees import compute_budget_instructions
 from loguru import logger
+import asyncio
 import time
 
 
 LAMPORTS_PER_SOL = 1000000000
+# compute units of a sell (WSOL account, swap, close) until simulated units are recorded
+RAYDIUM_UNIT_BUDGET = 150_000
 
 
-def sell(solana_client, TOKEN_TO_SWAP_SELL, payer, token_symbol, S0l_Symbol):
+def sell(solana_client, TOKEN_TO_SWAP_SELL, payer, token_symbol, S0l_Symbol, slippage: float = None, max_balance_retries: int = 5):
+    """Sells the wallet's whole balance of TOKEN_TO_SWAP_SELL for SOL, in one attempt.
+
+    Returns the signature on success, None when the transaction went out but was not
+    confirmed (it may still land) and "failed" otherwise; retries are the caller's
+    (SellExecutor's) to schedule. Gives up after `max_balance_retries` empty balance reads.
+    """
 
     mint = Pubkey.from_string(TOKEN_TO_SWAP_SELL)
     sol = Pubkey.from_string("So11111111111111111111111111111111111111112")
 
     """Get swap token program id"""
     logger.info("1. Get TOKEN_PROGRAM_ID...")
-    TOKEN_PROGRAM_ID = solana_client.get_account_info_json_parsed(mint).value.owner
+    TOKEN_PROGRAM_ID = mint_cache.fetch(solana_client, mint).program_id
 
     """Get Pool Keys"""
     logger.info("2. Get Pool Keys...")
-    pool_keys = fetch_pool_keys(str(mint))
+    pool_keys = fetch_pool_keys(str(mint), solana_client)
     if pool_keys == "failed":
         logger.info(f"a|Sell Pool ERROR {token_symbol}",f"[Raydium]: Pool Key Not Found")
         return "failed"
     
-    txnBool = True
-    while txnBool:
-        """Get Token Balance from wallet"""
-        logger.info("3. Get oken Balance from wallet...")
-
-        balanceBool = True
-        while balanceBool:
-            tokenPk = mint
-
-            accountProgramId = solana_client.get_account_info_json_parsed(tokenPk)
-            programid_of_token = accountProgramId.value.owner
-
-            accounts = solana_client.get_token_accounts_by_owner_json_parsed(payer.pubkey(),TokenAccountOpts(program_id=programid_of_token)).value
-            for account in accounts:
-                mint_in_acc = account.account.data.parsed['info']['mint']
-                if mint_in_acc == str(mint):
-                    amount_in = int(account.account.data.parsed['info']['tokenAmount']['amount'])
-                    logger.info("3.1 Token Balance [Lamports]: ",amount_in)
-                    break
-            if int(amount_in) > 0:
-                balanceBool = False
-            else:
-                logger.info("No Balance, Retrying...")
-                time.sleep(2)
-
-        """Get token accounts"""
-        logger.info("4. Get token accounts for swap...")
-        swap_token_account = sell_get_token_account(solana_client, payer.pubkey(), mint)
-        WSOL_token_account, WSOL_token_account_Instructions = get_token_account(solana_client,payer.pubkey(), sol)
-        
-        if swap_token_account == None:
-            logger.info("swap_token_account not found...")
+    """Get Token Balance from wallet"""
+    logger.info("3. Get oken Balance from wallet...")
+
+    amount_in = 0
+    for _ in range(max_balance_retries):
+        accounts = solana_client.get_token_accounts_by_owner_json_parsed(payer.pubkey(),TokenAccountOpts(program_id=TOKEN_PROGRAM_ID)).value
+        for account in accounts:
+            mint_in_acc = account.account.data.parsed['info']['mint']
+            if mint_in_acc == str(mint):
+                amount_in = int(account.account.data.parsed['info']['tokenAmount']['amount'])
+                logger.info(f"3.1 Token Balance [Lamports]: {amount_in}")
+                break
+        if amount_in > 0:
+            break
+        logger.info("No Balance, Retrying...")
+        time.sleep(2)
+    else:
+        return "failed"
+
+    """Get token accounts"""
+    logger.info("4. Get token accounts for swap...")
+    swap_token_account = sell_get_token_account(solana_client, payer.pubkey(), mint)
+    WSOL_token_account, WSOL_token_account_Instructions = get_token_account(solana_client,payer.pubkey(), sol)
+    
+    if swap_token_account == None:
+        logger.info("swap_token_account not found...")
+        return "failed"
+
+    """Quote the swap locally for min_amount_out"""
+    min_out = 0
+    if slippage is not None:
+        min_out = sell_min_amount_out(solana_client, pool_keys, mint, amount_in, slippage)
+
+    """Make swap instructions"""
+    logger.info("5. Create Swap Instructions...")
+    instructions_swap = make_swap_instruction(  amount_in, 
+                                                swap_token_account,
+                                                WSOL_token_account,
+                                                pool_keys, 
+                                                mint, 
+                                                solana_client,
+                                                payer,
+                                                token_program_id=TOKEN_PROGRAM_ID,
+                                                min_amount_out=min_out
+                                            )
+
+    """Close wsol account"""
+    logger.info("6.  Create Instructions to Close WSOL account...")
+    params = CloseAccountParams(account=WSOL_token_account, dest=payer.pubkey(), owner=payer.pubkey(), program_id=TOKEN_PROGRAM_ID)
+    closeAcc =(close_account(params))
+
+    """Create transaction and add instructions"""
+    logger.info("7. Create transaction and add instructions to Close WSOL account...")
+    instructions = compute_budget_instructions("raydium_sell", RAYDIUM_UNIT_BUDGET)
+    if WSOL_token_account_Instructions != None:
+        instructions.append(WSOL_token_account_Instructions)
+    instructions += [instructions_swap, closeAcc]
+
+    """Send transaction"""
+    txid_string_sig = None
+    try:
+        logger.info("8. Execute Transaction...")
+        start_time = time.time()
+        message = MessageV0.try_compile(payer.pubkey(), instructions, lookup_tables_for(pool_keys), recent_blockhash(solana_client))
+        txn = solana_client.send_transaction(VersionedTransaction(message, [payer]), opts=TxOpts(skip_preflight=False))
+
+        """Confirm it has been sent"""
+        txid_string_sig = txn.value
+        mark_sent()
+        logger.info("9. Confirm it has been sent...")
+        confirmed = confirm_signature_blocking(solana_client, txid_string_sig)
+
+        end_time = time.time()
+        execution_time = end_time - start_time
+        logger.info(f"Execution time: {execution_time} seconds")
+        if confirmed:
+            logger.info(f"[create_account] Transaction Success {txid_string_sig}")
+            return txid_string_sig
+        if confirmed is None:
+            # may still land; resending could sell twice
+            logger.info(f"e|Sell ERROR {token_symbol} [Raydium]: not confirmed {txid_string_sig}")
+            return None
+        # failed on-chain; the executor decides whether and when to try again
+        logger.info("Transaction Failed")
+        return "failed"
+
+    except RPCException as e:
+        logger.info(f"e|SELL ERROR {token_symbol} [Raydium]: {e.args[0].message}")
+        return None if txid_string_sig is not None else "failed"
+
+    except Exception as e:
+        logger.info(f"e|SELL Exception ERROR {token_symbol} [Raydium]: {e}")
+        # once sent, the outcome is unknown rather than failed
+        return None if txid_string_sig is not None else "failed"
+
+
+async def sell_async(solana_client, TOKEN_TO_SWAP_SELL, payer, token_symbol, S0l_Symbol, max_balance_retries: int = 5, detected_at: float = None,
+                     slippage: float = None):
+    """Async version of sell() for a solana AsyncClient.
+
+    Returns the signature on success, None when the transaction went out but was not
+    confirmed (it may still land) and "failed" otherwise. With `slippage` (percent) the
+    swap's min_amount_out comes from a local quote of the pool.
+    """
+    mint = Pubkey.from_string(TOKEN_TO_SWAP_SELL)
+    sol = Pubkey.from_string("So11111111111111111111111111111111111111112")
+
+    """Get swap token program id"""
+    TOKEN_PROGRAM_ID = (await mint_cache.fetch_async(solana_client, mint)).program_id
+
+    """Get Pool Keys"""
+    pool_keys = await fetch_pool_keys_async(str(mint), solana_client)
+    if pool_keys == "failed":
+        logger.info(f"a|Sell Pool ERROR {token_symbol} [Raydium]: Pool Key Not Found")
+        return "failed"
+
+    """Get Token Balance from wallet"""
+    amount_in = 0
+    for _ in range(max_balance_retries):
+        accounts = (await solana_client.get_token_accounts_by_owner_json_parsed(payer.pubkey(), TokenAccountOpts(program_id=TOKEN_PROGRAM_ID))).value
+        for account in accounts:
+            if account.account.data.parsed['info']['mint'] == str(mint):
+                amount_in = int(account.account.data.parsed['info']['tokenAmount']['amount'])
+                break
+        if amount_in > 0:
+            break
+        logger.info("No Balance, Retrying...")
+        await asyncio.sleep(2)
+    else:
+        return "failed"
+    logger.info(f"Token Balance [Lamports]: {amount_in}")
+
+    """Get token accounts"""
+    swap_token_account = await sell_get_token_account_async(solana_client, payer.pubkey(), mint)
+    WSOL_token_account, WSOL_token_account_Instructions = await get_token_account_async(solana_client, payer.pubkey(), sol)
+    if swap_token_account == None:
+        logger.info("swap_token_account not found...")
+        return "failed"
+
+    min_out = 0
+    if slippage is not None:
+        min_out = await sell_min_amount_out_async(solana_client, pool_keys, mint, amount_in, slippage)
+
+    instructions_swap = make_swap_instruction(amount_in,
+                                              swap_token_account,
+                                              WSOL_token_account,
+                                              pool_keys,
+                                              mint,
+                                              solana_client,
+                                              payer,
+                                              token_program_id=TOKEN_PROGRAM_ID,
+                                              min_amount_out=min_out)
+    params = CloseAccountParams(account=WSOL_token_account, dest=payer.pubkey(), owner=payer.pubkey(), program_id=TOKEN_PROGRAM_ID)
+    closeAcc = close_account(params)
+
+    instructions = compute_budget_instructions("raydium_sell", RAYDIUM_UNIT_BUDGET)
+    if WSOL_token_account_Instructions != None:
+        instructions.append(WSOL_token_account_Instructions)
+    instructions += [instructions_swap, closeAcc]
+
+    """Send transaction"""
+    try:
+        start_time = time.time()
+        blockhash_info = await recent_blockhash_info_async(solana_client)
+        message = MessageV0.try_compile(payer.pubkey(), instructions, lookup_tables_for(pool_keys), blockhash_info.blockhash)
+        swap_tx = VersionedTransaction(message, [payer])
+        txid_string_sig = swap_tx.signatures[0]
+
+        """Send and confirm"""
+        sent, confirmed = await send_and_confirm(solana_client, swap_tx, blockhash_info.last_valid_block_height, detected_at)
+        if not sent:
+            logger.info(f"e|SELL ERROR {token_symbol} [Raydium]: transaction not accepted")
             return "failed"
+        logger.info(f"Execution time: {time.time() - start_time} seconds")
+        if confirmed:
+            logger.info(f"[create_account] Transaction Success {txid_string_sig}")
+            return txid_string_sig
+        if confirmed is None:
+            logger.info(f"e|Sell ERROR {token_symbol} [Raydium]: not confirmed {txid_string_sig}")
+            return None
+        # failed on-chain; the executor decides whether and when to try again
+        logger.info("Transaction Failed")
+        return "failed"
 
-        else:
-            """Make swap instructions"""
-            logger.info("5. Create Swap Instructions...")
-            instructions_swap = make_swap_instruction(  amount_in, 
-                                                        swap_token_account,
-                                                        WSOL_token_account,
-                                                        pool_keys, 
-                                                        mint, 
-                                                        solana_client,
-                                                        payer
-                                                    )
-
-            """Close wsol account"""
-            logger.info("6.  Create Instructions to Close WSOL account...")
-            params = CloseAccountParams(account=WSOL_token_account, dest=payer.pubkey(), owner=payer.pubkey(), program_id=TOKEN_PROGRAM_ID)
-            closeAcc =(close_account(params))
-
-            """Create transaction and add instructions"""
-            logger.info("7. Create transaction and add instructions to Close WSOL account...")
-            swap_tx = Transaction()
-            signers = [payer]
-            if WSOL_token_account_Instructions != None:
-                swap_tx.add(WSOL_token_account_Instructions)
-            swap_tx.add(instructions_swap)
-            swap_tx.add(closeAcc)
-
-            """Send transaction"""
-            try:
-                logger.info("8. Execute Transaction...")
-                start_time = time.time()
-                txn = solana_client.send_transaction(swap_tx, *signers)
-
-                """Confirm it has been sent"""
-                txid_string_sig = txn.value
-                logger.info("9. Confirm it has been sent...")
-                checkTxn = True
-                while checkTxn:
-                    try:
-                        status = solana_client.get_transaction(txid_string_sig,"json")
-                        FeesUsed = (status.value.transaction.meta.fee) / 1000000000
-                        if status.value.transaction.meta.err == None:
-                            logger.info("[create_account] Transaction Success",txn.value)
-                            logger.info(f"[create_account] Transaction Fees: {FeesUsed:.10f} SOL")
-
-                            end_time = time.time()
-                            execution_time = end_time - start_time
-                            logger.info(f"Execution time: {execution_time} seconds")
-
-                            txnBool = False
-                            checkTxn = False
-                            return txid_string_sig
-                        else:
-
-                            logger.info("Transaction Failed")
-
-                            end_time = time.time()
-                            execution_time = end_time - start_time
-                            logger.info(f"Execution time: {execution_time} seconds")
-
-                            checkTxn = False
-
-                    except Exception as e:
-                        logger.info(f"e|Sell ERROR {token_symbol}",f"[Raydium]: {e}")
-
-                        logger.info("Sleeping...",e)
-                        time.sleep(0.500)
-                        logger.info("Retrying...")
-
-            except RPCException as e:
-                logger.info(f"Error: [{e.args[0].message}]...\nRetrying...")
-                logger.info(f"e|SELL ERROR {token_symbol}",f"[Raydium]: {e.args[0].message}")
-
-            except Exception as e:
-                logger.info(f"Error: [{e}]...\nEnd...")
-                logger.info(f"e|SELL Exception ERROR {token_symbol}",f"[Raydium]: {e.args[0].message}")
-                txnBool = False
-                return "failed"
+    except RPCException as e:
+        logger.info(f"e|SELL ERROR {token_symbol} [Raydium]: {e.args[0].message}")
+        return "failed"
+
+    except Exception as e:
+        logger.info(f"e|SELL Exception ERROR {token_symbol} [Raydium]: {e}")
+        return "failed"
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the bot runs from the repository root, where its packages are importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,63 @@
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def account_json(data: bytes, owner: str = "11111111111111111111111111111111") -> dict:
+    return {
+        "data": [base64.b64encode(bytes(data)).decode(), "base64"],
+        "executable": False,
+        "lamports": 1_000_000,
+        "owner": owner,
+        "rentEpoch": 0,
+        "space": len(data),
+    }
+
+
+class MockRpc:
+    """A JSON-RPC endpoint on localhost. `handler(method, params)` returns the result, or
+    raises RpcError to answer with an error. Every request is kept in `calls`."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.calls = []
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                mock.calls.append((request["method"], request.get("params")))
+                try:
+                    reply = {"jsonrpc": "2.0", "id": request["id"], "result": mock.handler(request["method"], request.get("params"))}
+                except RpcError as e:
+                    reply = {"jsonrpc": "2.0", "id": request["id"], "error": {"code": e.code, "message": str(e)}}
+                body = json.dumps(reply).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def methods(self) -> list:
+        return [method for method, _ in self.calls]
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class RpcError(Exception):
+    def __init__(self, message: str, code: int = -32603):
+        super().__init__(message)
+        self.code = code
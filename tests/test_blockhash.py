@@ -0,0 +1,56 @@
+import asyncio
+import time
+import pytest
+from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
+from solders.hash import Hash
+from engine import blockhash
+from engine.blockhash import BlockhashInfo, BlockhashProvider, recent_blockhash, recent_blockhash_async
+from mock_rpc import MockRpc
+
+LATEST = Hash.new_unique()
+
+
+def _latest(method, params):
+    return {"context": {"slot": 1}, "value": {"blockhash": str(LATEST), "lastValidBlockHeight": 150}}
+
+
+@pytest.fixture
+def provider():
+    provider = BlockhashProvider(client=None)
+    blockhash.set_blockhash_provider(provider)
+    yield provider
+    blockhash.set_blockhash_provider(None)
+
+
+def test_fresh_blockhash_is_served_from_memory(provider):
+    cached = Hash.new_unique()
+    provider.update(BlockhashInfo(cached, 100, time.monotonic()))
+    with MockRpc(_latest) as rpc:
+        assert recent_blockhash(Client(rpc.url)) == cached
+    assert rpc.calls == []
+
+
+def test_stale_blockhash_is_fetched_and_kept(provider):
+    provider.update(BlockhashInfo(Hash.new_unique(), 100, time.monotonic() - 2 * provider.max_age))
+
+    async def run(url):
+        async with AsyncClient(url) as client:
+            return await recent_blockhash_async(client)
+
+    with MockRpc(_latest) as rpc:
+        assert asyncio.run(run(rpc.url)) == LATEST
+    assert rpc.methods() == ["getLatestBlockhash"]
+    assert provider.current().last_valid_block_height == 150
+
+
+def test_background_refresh():
+    with MockRpc(_latest) as rpc:
+        provider = BlockhashProvider(Client(rpc.url), interval=0.01).start()
+        try:
+            deadline = time.monotonic() + 5
+            while provider.current() is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            provider.stop()
+    assert provider.current().blockhash == LATEST
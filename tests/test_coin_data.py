@@ -0,0 +1,74 @@
+import asyncio
+import struct
+import pytest
+from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
+from solders.pubkey import Pubkey
+from pumpfun.coin_data import (
+    BONDING_CURVE_LAYOUT, decode_bonding_curve, decode_bonding_curves, derive_bonding_curve_accounts,
+    get_coin_data_many, get_coin_data_many_async,
+)
+from pumpfun.constants import PUMP_FUN_PROGRAM
+from mock_rpc import MockRpc, account_json
+
+
+def _curve_data(virtual_tokens, virtual_sol, complete=False, creator=bytes(range(32)), extra=b""):
+    return b"\0" * 8 + struct.pack("<5Q?32s", virtual_tokens, virtual_sol, 0, 0, 10**15, complete, creator) + extra
+
+
+def _chain(curves):
+    """getMultipleAccounts over bonding curve str -> account data."""
+    def handler(method, params):
+        value = [account_json(curves[key], str(PUMP_FUN_PROGRAM)) if key in curves else None for key in params[0]]
+        return {"context": {"slot": 1}, "value": value}
+    return handler
+
+
+def test_many_mints_are_read_100_curves_per_call():
+    mints = [str(Pubkey.new_unique()) for _ in range(150)]
+    curves = {str(derive_bonding_curve_accounts(mint)[0]): _curve_data(i + 1, 2 * (i + 1)) for i, mint in enumerate(mints)}
+    with MockRpc(_chain(curves)) as rpc:
+        coins = get_coin_data_many(Client(rpc.url), mints + mints[:5])
+    assert sorted(len(params[0]) for _, params in rpc.calls) == [50, 100]
+    assert len(coins) == 150
+    coin = coins[mints[7]]
+    assert (coin.virtual_token_reserves, coin.virtual_sol_reserves, coin.complete) == (8, 16, False)
+    assert coin.bonding_curve == derive_bonding_curve_accounts(mints[7])[0]
+    assert coin.creator == Pubkey.from_bytes(bytes(range(32)))
+
+
+def test_missing_curves_are_left_out_async():
+    live, gone = str(Pubkey.new_unique()), str(Pubkey.new_unique())
+    curves = {str(derive_bonding_curve_accounts(live)[0]): _curve_data(5, 7, complete=True, extra=b"\0" * 16)}
+
+    async def run(url):
+        async with AsyncClient(url) as client:
+            return await get_coin_data_many_async(client, [live, gone])
+
+    with MockRpc(_chain(curves)) as rpc:
+        coins = asyncio.run(run(rpc.url))
+    assert list(coins) == [live]
+    assert coins[live].complete is True
+    assert rpc.methods() == ["getMultipleAccounts"]
+
+
+def test_decode_matches_the_construct_layout():
+    data = _curve_data(1_073_000_000_000_000, 30_000_000_000, complete=True, extra=b"\xff" * 8)
+    parsed = BONDING_CURVE_LAYOUT.parse(data)
+    state = decode_bonding_curve(memoryview(data))
+    assert state._asdict() == {name: parsed[name] for name in state._fields}
+
+
+def test_decode_many_handles_mixed_sizes():
+    buffers = [_curve_data(1, 2), _curve_data(3, 4, extra=b"\0" * 16), _curve_data(5, 6, complete=True)]
+    curves = decode_bonding_curves(buffers)
+    assert curves["virtual_token_reserves"].tolist() == [1, 3, 5]
+    assert curves["complete"].tolist() == [False, False, True]
+    same_size = decode_bonding_curves([_curve_data(7, 8, extra=b"\0" * 8)] * 2)
+    assert same_size["virtual_sol_reserves"].tolist() == [8, 8]
+    assert same_size["creator"][0].tobytes() == bytes(range(32))
+
+
+def test_decode_many_rejects_short_accounts():
+    with pytest.raises(ValueError):
+        decode_bonding_curves([_curve_data(1, 2), b"\0" * 40])
@@ -0,0 +1,110 @@
+import asyncio
+import json
+from types import SimpleNamespace
+import websockets
+from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
+from solders.signature import Signature
+from engine.confirmation import ConfirmationService, confirm_signature_blocking
+from mock_rpc import MockRpc
+
+LANDED, FAILED, PENDING = (str(Signature.new_unique()) for _ in range(3))
+
+
+def _status(confirmation_status, err=None):
+    return {"slot": 1, "confirmations": None, "err": err, "confirmationStatus": confirmation_status,
+            "status": {"Ok": None} if err is None else {"Err": err}}
+
+
+def _statuses(params):
+    statuses = {LANDED: _status("confirmed"), FAILED: _status("finalized", {"InstructionError": [0, {"Custom": 1}]}),
+                PENDING: _status("processed")}
+    return {"context": {"slot": 1}, "value": [statuses.get(key) for key in params[0]]}
+
+
+def test_one_poll_resolves_every_pending_signature():
+    async def run(url):
+        async with AsyncClient(url) as client:
+            service = ConfirmationService(client)
+            futures = [service.track(key) for key in (LANDED, FAILED, PENDING)]
+            assert service.track(LANDED) is futures[0]
+            await service.poll_once()
+            return [future.result() if future.done() else "pending" for future in futures], len(service)
+
+    with MockRpc(lambda method, params: _statuses(params)) as rpc:
+        results, pending = asyncio.run(run(rpc.url))
+    assert results == [True, False, "pending"]
+    assert pending == 1
+    assert rpc.methods() == ["getSignatureStatuses"]
+    assert len(rpc.calls[0][1][0]) == 3
+
+
+def test_expired_signatures_resolve_to_none():
+    async def run(url):
+        async with AsyncClient(url) as client:
+            service = ConfirmationService(client, timeout=0.0)
+            future = service.track(PENDING)
+            await service.poll_once()
+            return future.result(), service.latency_summary()
+
+    with MockRpc(lambda method, params: _statuses(params)) as rpc:
+        assert asyncio.run(run(rpc.url)) == (None, {"count": 0})
+
+
+def test_websocket_notification_resolves_its_signature():
+    async def run():
+        service = ConfirmationService(client=None)
+        future = service.track(LANDED)
+        service._requests[7] = LANDED
+        service._handle({"jsonrpc": "2.0", "id": 7, "result": 42})
+        service._handle({"jsonrpc": "2.0", "method": "signatureNotification",
+                         "params": {"subscription": 42, "result": {"context": {"slot": 1}, "value": {"err": None}}}})
+        return future.result(), service.latency_summary()["count"]
+
+    assert asyncio.run(run()) == (True, 1)
+
+
+def test_blocking_confirmation_polls_until_settled():
+    with MockRpc(lambda method, params: _statuses(params)) as rpc:
+        client = Client(rpc.url)
+        assert confirm_signature_blocking(client, LANDED) is True
+        assert confirm_signature_blocking(client, FAILED) is False
+        assert confirm_signature_blocking(client, PENDING, timeout=0.05, poll_interval=0.01) is None
+
+
+class NotLanded:
+    """An AsyncClient stand-in whose getSignatureStatuses never sees the signatures."""
+
+    async def get_signature_statuses(self, signatures):
+        return SimpleNamespace(value=[None] * len(signatures))
+
+
+def test_listener_survives_refused_handshakes():
+    attempts = []
+
+    async def process_request(path, headers):
+        attempts.append(path)
+        if len(attempts) <= 2:
+            return 503, [], b"busy\n"
+
+    async def handler(ws):
+        request = json.loads(await ws.recv())
+        await ws.send(json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": 42}))
+        await ws.send(json.dumps({"jsonrpc": "2.0", "method": "signatureNotification", "params": {
+            "subscription": 42, "result": {"context": {"slot": 1}, "value": {"err": None}}}}))
+        await asyncio.sleep(1)
+
+    async def run():
+        async with websockets.serve(handler, "127.0.0.1", 0, process_request=process_request) as server:
+            port = server.sockets[0].getsockname()[1]
+            service = ConfirmationService(NotLanded(), ws_url=f"ws://127.0.0.1:{port}", fallback_interval=10,
+                                          reconnect_delay=0.01, max_reconnect_delay=0.05)
+            future = service.track(LANDED)
+            service.start()
+            try:
+                return await asyncio.wait_for(future, 5)
+            finally:
+                service.stop()
+
+    assert asyncio.run(run()) is True
+    assert len(attempts) == 3
@@ -0,0 +1,48 @@
+import numpy as np
+from solders.pubkey import Pubkey
+from pumpfun.coin_data import CoinData
+from pumpfun.curve import sell_quote, sell_quotes, value_holdings
+
+TOKENS, SOL = 800_000_000_000_000, 40_000_000_000
+
+
+def _coin(complete=False, tokens=TOKENS, sol=SOL):
+    return CoinData(Pubkey.new_unique(), Pubkey.new_unique(), Pubkey.new_unique(), tokens, sol, 10**15, complete,
+                    Pubkey.new_unique())
+
+
+def test_sell_quote_follows_the_program_math():
+    # 40 SOL * 2e14 / (8e14 + 2e14) = 8 SOL out, less 1.25% fee
+    assert sell_quote(200_000_000_000_000, TOKENS, SOL, fee_basis_points=0) == 8_000_000_000
+    assert sell_quote(200_000_000_000_000, TOKENS, SOL) == 7_900_000_000
+    # floor on the output, ceiling on the fee
+    assert sell_quote(3, TOKENS, SOL, fee_basis_points=0) == 0
+    assert sell_quote(20_000_001, TOKENS, SOL, fee_basis_points=0) == 1_000
+    assert sell_quote(20_000_001, TOKENS, SOL) == 1_000 - 13
+
+
+def test_sell_quote_includes_price_impact():
+    spot = SOL / TOKENS
+    amount = TOKENS // 4
+    assert sell_quote(amount, TOKENS, SOL, 0) < spot * amount * 0.81
+
+
+def test_empty_inputs_quote_zero():
+    assert sell_quote(0, TOKENS, SOL) == 0
+    assert sell_quote(10, 0, SOL) == 0
+    assert sell_quote(10, TOKENS, 0) == 0
+
+
+def test_sell_quotes_matches_sell_quote():
+    amounts = [0, 1_000_000, 5_000_000_000, 8_080_808_080_808, 10**14]
+    quotes = sell_quotes(amounts, [TOKENS, TOKENS, TOKENS, TOKENS, 0], SOL)
+    assert quotes.dtype == np.float64
+    assert quotes.tolist() == [sell_quote(amount, TOKENS if i < 4 else 0, SOL) for i, amount in enumerate(amounts)]
+
+
+def test_value_holdings_skips_completed_and_unknown_curves():
+    live, done = _coin(), _coin(complete=True)
+    coins = {"live": live, "done": done}
+    values = value_holdings(coins, {"live": 5_000_000_000, "done": 5_000_000_000, "unknown": 1})
+    assert values == {"live": sell_quote(5_000_000_000, TOKENS, SOL)}
+    assert value_holdings(coins, {"done": 1}) == {}
@@ -0,0 +1,82 @@
+import threading
+import time
+import httpx
+import pytest
+import dexscreener
+from dexscreener import TokenPairsCache
+
+WSOL = "So11111111111111111111111111111111111111112"
+
+
+class FakePool:
+    """Answers dexscreener token lookups after `delay`, counting requests per URL."""
+
+    def __init__(self, delay=0.0, status=200):
+        self.delay = delay
+        self.status = status
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        with self._lock:
+            self.requests.append(url)
+        time.sleep(self.delay)
+        token = url.rsplit("/", 1)[1]
+        pairs = [{"baseToken": {"address": token, "symbol": "TKN"},
+                  "quoteToken": {"address": WSOL, "symbol": "SOL"}, "priceUsd": "0.5"}]
+        return httpx.Response(self.status, json={"pairs": pairs}, request=httpx.Request("GET", url))
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(dexscreener, "http_pool", pool)
+    monkeypatch.setattr(dexscreener, "token_pairs", TokenPairsCache())
+    return pool
+
+
+def test_concurrent_lookups_share_one_request(pool):
+    pool.delay = 0.1
+    cache = TokenPairsCache()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("mint"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(pool.requests) == 1
+    assert len(results) == 8 and all(result is results[0] for result in results)
+
+
+def test_prices_refetch_after_ttl_but_symbols_do_not(pool):
+    assert dexscreener.get_price("mint") == 0.5
+    assert dexscreener.getSymbol("mint") == ("TKN", "SOL")
+    assert len(pool.requests) == 1
+    dexscreener.token_pairs.ttl = 0.0
+    assert dexscreener.getSymbol("mint") == ("TKN", "SOL")
+    assert len(pool.requests) == 1
+    dexscreener.get_price("mint")
+    assert len(pool.requests) == 2
+
+
+def test_failed_lookup_is_not_cached(pool):
+    pool.status = 503
+    cache = TokenPairsCache()
+    with pytest.raises(httpx.HTTPStatusError):
+        cache.get("mint")
+    pool.status = 200
+    assert cache.get("mint")["pairs"]
+    assert len(pool.requests) == 2
+
+
+def test_cache_is_bounded(pool):
+    cache = TokenPairsCache(max_size=2)
+    for token in ("a", "b", "c"):
+        cache.get(token)
+    assert list(cache._responses) == ["b", "c"]
+
+
+def test_prefetch_skips_stablecoins(pool):
+    cache = TokenPairsCache()
+    cache.prefetch(["a", "b", "a"] + dexscreener.EXCLUDE)
+    assert sorted(pool.requests) == [dexscreener.TOKENS_URL.format(token) for token in ("a", "b")]
@@ -0,0 +1,118 @@
+import asyncio
+import queue
+import time
+from engine.executor import (
+    SellExecutor, BUILDING, SENT, CONFIRMED, FAILED, PENDING, UNCONFIRMED_RETRY_DELAY, mark_sent, sell_outcome,
+)
+from engine.registry import TokenRecord, TokenRegistry
+from auto_sell import detect_old_tokens, remove_token
+
+MINT = "So11111111111111111111111111111111111111112"
+
+
+def test_sell_outcome():
+    assert sell_outcome(None) is None
+    assert sell_outcome(False) is False
+    assert sell_outcome("failed") is False
+    assert sell_outcome(True) is True
+    assert sell_outcome("5signature") is True
+
+
+def test_claim_leases_the_mint():
+    executor = SellExecutor()
+    job = executor.claim(MINT)
+    assert job.state == BUILDING and job.attempts == 1
+    assert executor.claim(MINT) is None
+    assert not executor.claimable(MINT)
+
+
+def test_failed_attempt_backs_off():
+    executor = SellExecutor(backoff=2.0)
+    job = executor.claim(MINT)
+    assert executor.finish(job, False) is False
+    assert job.state == PENDING
+    assert 0 < executor.retry_delay(MINT) <= 2.0
+    assert executor.claim(MINT) is None
+
+
+def test_unconfirmed_send_waits_for_blockhash_expiry():
+    executor = SellExecutor(backoff=2.0)
+    job = executor.claim(MINT)
+    job.state, job.sent_at = SENT, time.monotonic()
+    executor.finish(job, None)
+    assert executor.retry_delay(MINT) > UNCONFIRMED_RETRY_DELAY - 1
+
+
+def test_gives_up_after_max_attempts():
+    executor = SellExecutor(max_attempts=2, backoff=0.0)
+    assert executor.finish(executor.claim(MINT), False) is False
+    job = executor.claim(MINT)
+    assert executor.finish(job, False) is True
+    assert job.state == FAILED
+    assert MINT not in executor
+    assert executor.stats[FAILED] == 1
+
+
+def test_finished_job_keeps_lease_until_loop_removes_token():
+    # a worker finishes while the main loop is between draining `finished` and picking
+    # due tokens: the mint is still in the registry but must not be claimable
+    registry = TokenRegistry()
+    registry.add([TokenRecord(MINT, detection_time=0)])
+    executor = SellExecutor()
+    finished = queue.SimpleQueue()
+    calls = []
+
+    def sell():
+        calls.append(MINT)
+        return "signature"
+
+    executor.submit(MINT, sell, on_done=lambda job: finished.put(job.mint)).result()
+    assert executor.state(MINT) == CONFIRMED
+    due = [token for token in detect_old_tokens(registry, 0) if executor.claimable(token.token_id)]
+    assert due == []
+    assert executor.submit(MINT, sell) is None
+
+    while not finished.empty():
+        mint = finished.get()
+        remove_token(registry, token_id=mint)
+        executor.forget(mint)
+    assert MINT not in registry
+    assert executor.claimable(MINT)
+    assert calls == [MINT]
+    executor.shutdown()
+
+
+def test_mark_sent_moves_current_job():
+    executor = SellExecutor()
+
+    def sell():
+        mark_sent()
+        raise RuntimeError("confirmation lost")
+
+    job = executor.submit(MINT, sell).result()
+    assert job.sent_at is not None
+    # raised after the send, so the outcome is unknown and the retry waits
+    assert job.state == PENDING
+    assert executor.retry_delay(MINT) > UNCONFIRMED_RETRY_DELAY - 1
+    executor.shutdown()
+
+
+def test_run_async_bounds_concurrency():
+    executor = SellExecutor(max_workers=2)
+    running = []
+    peak = []
+
+    async def sell():
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.pop()
+        return True
+
+    async def run():
+        jobs = [executor.claim(f"mint{i}") for i in range(6)]
+        return await asyncio.gather(*(executor.run_async(job, sell) for job in jobs))
+
+    assert asyncio.run(run()) == [True] * 6
+    assert max(peak) == 2
+    assert len(executor) == 0
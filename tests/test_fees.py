@@ -0,0 +1,105 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.message import MessageV0
+from solders.system_program import TransferParams, transfer
+from engine import fees
+from engine.fees import (
+    DEFAULT_UNIT_PRICE, MAX_COMPUTE_UNIT_LIMIT, PRIORITIZATION_FEES_ACCOUNTS_LIMIT, FeeEstimator,
+    compute_budget_instructions, simulate_units_async, unit_limit, unit_price, unit_samples,
+)
+
+PAYER = Keypair()
+
+
+@pytest.fixture(autouse=True)
+def reset_fees():
+    fees.set_fee_estimator(None)
+    unit_samples.clear()
+    yield
+    fees.set_fee_estimator(None)
+    unit_samples.clear()
+
+
+def _fees(values, first_slot=1000):
+    return [{"slot": first_slot + i, "prioritizationFee": fee} for i, fee in enumerate(values)]
+
+
+def _message():
+    instruction = transfer(TransferParams(from_pubkey=PAYER.pubkey(), to_pubkey=Keypair().pubkey(), lamports=1))
+    return MessageV0.try_compile(PAYER.pubkey(), [instruction], [], Hash.default())
+
+
+class SimulatingClient:
+    def __init__(self, units, err=None):
+        self.value = SimpleNamespace(err=err, units_consumed=units)
+        self.simulated = []
+
+    async def simulate_transaction(self, txn):
+        self.simulated.append(txn)
+        return SimpleNamespace(value=self.value)
+
+
+def test_price_is_a_percentile_of_the_window():
+    estimator = FeeEstimator("http://rpc", percentile=75, window=150, max_price=50_000)
+    assert estimator.unit_price() == DEFAULT_UNIT_PRICE
+    # slots 1000..1399; only the last 150 (fees 25_000..39_900) are in the window
+    estimator.observe(_fees(range(0, 40_000, 100)))
+    assert estimator.unit_price() == 36_200
+
+
+def test_price_is_clamped():
+    estimator = FeeEstimator("http://rpc", min_price=1_000, max_price=50_000)
+    estimator.observe(_fees([10**9] * 200))
+    assert estimator.unit_price() == 50_000
+    estimator.observe(_fees([0] * 200, first_slot=5000))
+    assert estimator.unit_price() == 1_000
+
+
+def test_tracked_accounts_are_bounded():
+    estimator = FeeEstimator("http://rpc")
+    estimator.track([f"account{i}" for i in range(PRIORITIZATION_FEES_ACCOUNTS_LIMIT + 10)])
+    accounts = estimator._payload()["params"][0]
+    assert len(accounts) == PRIORITIZATION_FEES_ACCOUNTS_LIMIT
+    assert accounts[0] == "account10"
+
+
+def test_unit_price_follows_the_estimator():
+    assert unit_price() == DEFAULT_UNIT_PRICE
+    estimator = FeeEstimator("http://rpc")
+    estimator.observe(_fees([12_345] * 10))
+    fees.set_fee_estimator(estimator)
+    assert unit_price() == 12_345
+
+
+def test_unit_limit_from_samples_plus_margin():
+    assert unit_limit("pump_sell", 100_000) == 100_000
+    unit_samples.record("pump_sell", 40_000)
+    unit_samples.record("pump_sell", 52_000)
+    assert unit_limit("pump_sell", 100_000) == 59_800
+    assert unit_limit("raydium_sell", 150_000) == 150_000
+    unit_samples.record("pump_sell", MAX_COMPUTE_UNIT_LIMIT)
+    assert unit_limit("pump_sell", 100_000) == MAX_COMPUTE_UNIT_LIMIT
+
+
+def test_simulated_units_are_recorded_without_an_adaptive_fee():
+    client = SimulatingClient(61_000)
+    assert asyncio.run(simulate_units_async(client, "pump_sell", _message())) == 61_000
+    assert len(client.simulated) == 1
+    assert unit_limit("pump_sell", 100_000) == 70_150
+
+
+def test_failed_simulation_is_not_recorded():
+    client = SimulatingClient(0, err="InstructionError")
+    assert asyncio.run(simulate_units_async(client, "pump_sell", _message())) is None
+    assert unit_limit("pump_sell", 100_000) == 100_000
+
+
+def test_compute_budget_scales_with_instruction_count():
+    limit, price = compute_budget_instructions("pump_sell", 100_000, count=3)
+    assert limit.data[1:5] == (300_000).to_bytes(4, "little")
+    capped, _ = compute_budget_instructions("pump_sell", 100_000, count=20)
+    assert capped.data[1:5] == MAX_COMPUTE_UNIT_LIMIT.to_bytes(4, "little")
+    assert price.data[1:9] == DEFAULT_UNIT_PRICE.to_bytes(8, "little")
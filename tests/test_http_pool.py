@@ -0,0 +1,50 @@
+import asyncio
+from engine import http_pool as http_pool_module
+from engine.http_pool import DEFAULT_SETTINGS, HOST_SETTINGS, HttpPool
+from mock_rpc import MockRpc
+
+
+def test_one_client_per_host():
+    pool = HttpPool()
+    try:
+        client = pool.client("https://api.dexscreener.com/latest/dex/tokens/a")
+        assert pool.client("https://api.dexscreener.com/latest/dex/tokens/b") is client
+        assert pool.client("https://api.raydium.io/v2/sdk/liquidity/mainnet.json") is not client
+        assert pool.client("http://api.dexscreener.com/latest") is not client
+    finally:
+        pool.close()
+
+
+def test_host_settings():
+    pool = HttpPool()
+    try:
+        assert pool.client("https://api.raydium.io/x").timeout == HOST_SETTINGS["api.raydium.io"].timeout
+        assert pool.client("https://example.com:8443/x").timeout == DEFAULT_SETTINGS.timeout
+    finally:
+        pool.close()
+
+
+def test_http2_falls_back_without_h2(monkeypatch):
+    monkeypatch.setattr(http_pool_module, "_h2_available", lambda: False)
+    pool = HttpPool()
+    pool.configure(http2=True)
+    assert pool.http2 is False
+
+
+def test_requests_go_through_the_pooled_client():
+    pool = HttpPool()
+
+    async def post_async(url):
+        response = await pool.post_async(url, json={"jsonrpc": "2.0", "id": 1, "method": "getSlot"})
+        await pool.aclose()
+        return response.json()["result"]
+
+    with MockRpc(lambda method, params: 7) as rpc:
+        try:
+            assert [pool.post(rpc.url, json={"jsonrpc": "2.0", "id": i, "method": "getSlot"}).json()["result"]
+                    for i in range(3)] == [7, 7, 7]
+            assert len(pool._clients) == 1
+            assert asyncio.run(post_async(rpc.url)) == 7
+        finally:
+            pool.close()
+    assert rpc.methods() == ["getSlot"] * 4
@@ -0,0 +1,95 @@
+import struct
+from solana.rpc.api import Client
+from solders.hash import Hash
+from solders.instruction import AccountMeta, Instruction
+from solders.keypair import Keypair
+from solders.message import MessageV0
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from raydium.lookup_tables import (
+    ADDRESS_LOOKUP_TABLE_PROGRAM, POOL_TABLE_KEYS, SERUM_PROGRAM_ID, LookupTableManager,
+    create_lookup_table_instruction, extend_lookup_table_instruction, lookup_table_address, pool_table_addresses,
+)
+from mock_rpc import MockRpc, RpcError
+
+PAYER = Keypair()
+
+
+def _pool_keys():
+    return {key: Pubkey.new_unique() for key in POOL_TABLE_KEYS}
+
+
+def test_create_instruction_encoding():
+    payer = PAYER.pubkey()
+    instruction, table = create_lookup_table_instruction(payer, payer, 123_456)
+    assert (table, struct.unpack("<IQB", bytes(instruction.data))[2]) == lookup_table_address(payer, 123_456)
+    assert struct.unpack("<IQB", bytes(instruction.data))[:2] == (0, 123_456)
+    assert instruction.program_id == ADDRESS_LOOKUP_TABLE_PROGRAM
+    assert [meta.pubkey for meta in instruction.accounts][:3] == [table, payer, payer]
+
+
+def test_extend_instruction_encoding():
+    table, payer = Pubkey.new_unique(), PAYER.pubkey()
+    addresses = pool_table_addresses(_pool_keys())
+    assert len(addresses) == 14 and addresses[-1] == SERUM_PROGRAM_ID
+    data = bytes(extend_lookup_table_instruction(table, payer, payer, addresses).data)
+    assert struct.unpack_from("<IQ", data) == (2, 14)
+    assert data[12:] == b"".join(bytes(address) for address in addresses)
+
+
+def test_tables_survive_a_restart(tmp_path):
+    path = str(tmp_path / "lookup_tables.json")
+    pool_keys = _pool_keys()
+    manager = LookupTableManager(PAYER, path=path)
+    assert manager.tables_for(pool_keys) == []
+    _, table = manager._create_transaction(pool_keys, 1, Hash.default())
+    manager._created(pool_keys, table, True)
+    reloaded = LookupTableManager(PAYER).open(path)
+    assert len(reloaded) == 1
+    restored, = reloaded.tables_for(pool_keys)
+    assert (restored.key, list(restored.addresses)) == (table.key, list(table.addresses))
+
+
+def test_ensure_creates_the_table_once():
+    signature = Signature.new_unique()
+
+    def handler(method, params):
+        if method == "getSlot":
+            return 500
+        if method == "getLatestBlockhash":
+            return {"context": {"slot": 1}, "value": {"blockhash": str(Hash.new_unique()), "lastValidBlockHeight": 150}}
+        if method == "sendTransaction":
+            return str(signature)
+        return {"context": {"slot": 1}, "value": [{"slot": 1, "confirmations": None, "err": None,
+                                                    "confirmationStatus": "confirmed", "status": {"Ok": None}}]}
+
+    pool_keys = _pool_keys()
+    manager = LookupTableManager(PAYER)
+    with MockRpc(handler) as rpc:
+        table = manager.ensure(Client(rpc.url), pool_keys)
+        assert manager.ensure(Client(rpc.url), pool_keys) is table
+    assert rpc.methods() == ["getSlot", "getLatestBlockhash", "sendTransaction", "getSignatureStatuses"]
+    assert table.key == lookup_table_address(PAYER.pubkey(), 500)[0]
+
+
+def test_failed_creation_leaves_the_pool_without_a_table():
+    def handler(method, params):
+        raise RpcError("node is behind")
+
+    pool_keys = _pool_keys()
+    manager = LookupTableManager(PAYER)
+    with MockRpc(handler) as rpc:
+        assert manager.ensure(Client(rpc.url), pool_keys) is None
+    assert manager.tables_for(pool_keys) == [] and manager._claim(pool_keys)
+
+
+def test_v0_sell_refers_to_table_accounts_by_index():
+    pool_keys = _pool_keys()
+    manager = LookupTableManager(PAYER)
+    _, table = manager._create_transaction(pool_keys, 1, Hash.default())
+    manager._created(pool_keys, table, True)
+    instruction = Instruction(Pubkey.new_unique(), b"", [AccountMeta(address, False, True) for address in table.addresses])
+    with_table = MessageV0.try_compile(PAYER.pubkey(), [instruction], manager.tables_for(pool_keys), Hash.default())
+    lookup, = with_table.address_table_lookups
+    assert (lookup.account_key, list(lookup.writable_indexes)) == (table.key, list(range(14)))
+    assert len(with_table.account_keys) == 2
@@ -0,0 +1,86 @@
+import asyncio
+import struct
+from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
+from solders.pubkey import Pubkey
+from engine.mint_cache import MintCache
+from mock_rpc import MockRpc, account_json
+
+TOKEN_PROGRAM = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+TOKEN_2022_PROGRAM = "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb"
+
+
+def _mint_data(supply, decimals):
+    return b"\0" * 36 + struct.pack("<QB", supply, decimals) + b"\1" + b"\0" * 36
+
+
+def _chain(mints):
+    """getAccountInfo / getMultipleAccounts over mint str -> (program, supply, decimals)."""
+    def account(key):
+        if key not in mints:
+            return None
+        program, supply, decimals = mints[key]
+        return account_json(_mint_data(supply, decimals), program)
+
+    def handler(method, params):
+        if method == "getMultipleAccounts":
+            return {"context": {"slot": 1}, "value": [account(key) for key in params[0]]}
+        return {"context": {"slot": 1}, "value": account(params[0])}
+
+    return handler
+
+
+def test_fetch_reads_program_and_decimals_once():
+    mint = str(Pubkey.new_unique())
+    cache = MintCache()
+    with MockRpc(_chain({mint: (TOKEN_2022_PROGRAM, 10**15, 9)})) as rpc:
+        client = Client(rpc.url)
+        info = cache.fetch(client, mint)
+        assert cache.fetch(client, Pubkey.from_string(mint)) is info
+    assert str(info.program_id) == TOKEN_2022_PROGRAM
+    assert (info.decimals, info.supply) == (9, 10**15)
+    assert rpc.methods() == ["getAccountInfo"]
+
+
+def test_unknown_mint_is_not_cached():
+    mint = str(Pubkey.new_unique())
+    cache = MintCache()
+    with MockRpc(_chain({})) as rpc:
+        assert cache.fetch(Client(rpc.url), mint) is None
+    assert mint not in cache
+
+
+def test_prefetch_batches_uncached_mints():
+    mints = {str(Pubkey.new_unique()): (TOKEN_PROGRAM, 1_000, 6) for _ in range(150)}
+    cache = MintCache()
+    listed = list(mints)
+    with MockRpc(_chain(mints)) as rpc:
+        cache.prefetch_many(Client(rpc.url), listed + listed[:10])
+        cache.prefetch_many(Client(rpc.url), listed)
+    assert [len(params[0]) for _, params in rpc.calls] == [100, 50]
+    assert all(cache.get(mint).decimals == 6 for mint in listed)
+
+
+def test_prefetch_async_skips_non_mint_accounts():
+    good, bad = str(Pubkey.new_unique()), str(Pubkey.new_unique())
+
+    def handler(method, params):
+        value = [account_json(_mint_data(5, 6), TOKEN_PROGRAM) if key == good else account_json(b"\0" * 10)
+                 for key in params[0]]
+        return {"context": {"slot": 1}, "value": value}
+
+    async def run(url):
+        async with AsyncClient(url) as client:
+            await cache.prefetch_many_async(client, [good, bad])
+
+    cache = MintCache()
+    with MockRpc(handler) as rpc:
+        asyncio.run(run(rpc.url))
+    assert good in cache and bad not in cache
+
+
+def test_cache_is_bounded():
+    cache = MintCache(max_size=2)
+    for mint in ("a", "b", "c"):
+        cache.put(mint, object())
+    assert "a" not in cache and "c" in cache
@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+from solders.pubkey import Pubkey
+from spl.token.instructions import get_associated_token_address
+from pumpfun.constants import PUMP_FUN_PROGRAM
+from pumpfun.pda_cache import DerivedAddressCache
+import auto_sell
+from engine.registry import TokenRecord
+
+
+def test_derivations_match_find_program_address():
+    cache = DerivedAddressCache()
+    mint, owner, creator = Pubkey.new_unique(), Pubkey.new_unique(), Pubkey.new_unique()
+    bonding_curve, _ = Pubkey.find_program_address([b"bonding-curve", bytes(mint)], PUMP_FUN_PROGRAM)
+    assert cache.bonding_curve_accounts(mint) == (bonding_curve, get_associated_token_address(bonding_curve, mint))
+    assert cache.creator_vault(creator) == Pubkey.find_program_address([b"creator-vault", bytes(creator)], PUMP_FUN_PROGRAM)[0]
+    assert cache.associated_token_address(owner, mint) == get_associated_token_address(owner, mint)
+    assert len(cache) == 3
+
+
+def test_persists_across_restarts(tmp_path):
+    path = str(tmp_path / "pda_cache.json")
+    mint, owner = Pubkey.new_unique(), Pubkey.new_unique()
+    cache = DerivedAddressCache().open(path)
+    cache.warm(mint, owner)
+    cache.save()
+    reloaded = DerivedAddressCache(path=path)
+    assert len(reloaded) == 2
+    assert reloaded._get(("bonding_curve", bytes(mint))) == cache.bonding_curve_accounts(mint)
+
+
+def test_cache_is_bounded():
+    cache = DerivedAddressCache(max_size=3)
+    mints = [Pubkey.new_unique() for _ in range(5)]
+    for mint in mints:
+        cache.bonding_curve_accounts(mint)
+    assert len(cache) == 3
+    assert cache._get(("bonding_curve", bytes(mints[0]))) is None
+
+
+
+def _pump_mint() -> str:
+    while True:
+        candidate = str(Pubkey.new_unique())[:-4] + "pump"
+        try:
+            return str(Pubkey.from_string(candidate))
+        except ValueError:
+            continue
+
+
+def test_detection_warms_and_persists_creator_vaults(tmp_path, monkeypatch):
+    path = str(tmp_path / "pda_cache.json")
+    monkeypatch.setattr(auto_sell, "pda_cache", DerivedAddressCache(path=path))
+    monkeypatch.setattr(auto_sell, "track_accounts", lambda accounts: None)
+    mint, owner, creator = _pump_mint(), Pubkey.new_unique(), Pubkey.new_unique()
+    token = TokenRecord(token_id=mint, symbol="", balance="1", detection_time=0)
+    auto_sell.warm_derived_addresses([token], owner, {mint: SimpleNamespace(creator=creator)})
+    reloaded = DerivedAddressCache(path=path)
+    assert reloaded._get(("creator_vault", bytes(creator))) == (DerivedAddressCache().creator_vault(creator),)
+    assert reloaded._get(("ata", bytes(owner), bytes(Pubkey.from_string(mint)))) is not None
@@ -0,0 +1,80 @@
+import json
+import os
+import threading
+from solders.pubkey import Pubkey
+from raydium.pool_index import WSOL_MINT, POOL_FIELDS, build_pool_index, get_pool_index, iter_pool_objects
+
+
+def _pool(mint: str, quote_is_sol=True, **overrides):
+    pool = {field: str(Pubkey.new_unique()) for _, field in POOL_FIELDS}
+    pool.update(baseMint=mint, quoteMint=WSOL_MINT, baseDecimals=6, quoteDecimals=9)
+    if not quote_is_sol:
+        pool.update(baseMint=WSOL_MINT, quoteMint=mint, baseDecimals=9, quoteDecimals=6)
+    pool.update(overrides)
+    return pool
+
+
+def _chunks(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_streams_pools_across_chunk_boundaries():
+    pools = [_pool(str(Pubkey.new_unique())) for _ in range(3)]
+    document = json.dumps({"name": "mainnet", "official": pools[:1], "unOfficial": pools[1:]}).encode()
+    for size in (1, 7, 4096):
+        assert list(iter_pool_objects(_chunks(document, size))) == pools
+
+
+def test_index_keeps_sol_pairs_only(tmp_path):
+    sold_base, sold_quote = str(Pubkey.new_unique()), str(Pubkey.new_unique())
+    usdc_pair = _pool(str(Pubkey.new_unique()), quoteMint=str(Pubkey.new_unique()))
+    pools = [_pool(sold_base), _pool(sold_quote, quote_is_sol=False), usdc_pair, {"id": "broken"}]
+    path = str(tmp_path / "pools.db")
+    assert build_pool_index(pools, path) == 2
+    index = get_pool_index(path)
+    assert len(index) == 2
+    pool_keys = index.lookup(sold_base)
+    assert str(pool_keys['amm_id']) == pools[0]['id']
+    assert (pool_keys['base_decimals'], pool_keys['quote_decimals']) == (6, 9)
+    assert str(index.lookup(sold_quote)['base_mint']) == WSOL_MINT
+    assert index.lookup(usdc_pair['baseMint']) is None
+
+
+def test_replaced_index_is_reopened(tmp_path):
+    path = str(tmp_path / "pools.db")
+    first, second = str(Pubkey.new_unique()), str(Pubkey.new_unique())
+    build_pool_index([_pool(first)], path)
+    assert first in get_pool_index(path)
+    build_pool_index([_pool(second)], path)
+    # make sure the mtime moves even on coarse filesystem clocks
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    index = get_pool_index(path)
+    assert second in index and first not in index
+
+
+def test_lookups_survive_concurrent_replacement(tmp_path):
+    path = str(tmp_path / "pools.db")
+    mint = str(Pubkey.new_unique())
+    build_pool_index([_pool(mint)], path)
+    errors = []
+    stop = threading.Event()
+
+    def reader():
+        try:
+            while not stop.is_set():
+                assert get_pool_index(path).lookup(mint) is not None
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for generation in range(20):
+        build_pool_index([_pool(mint)], path)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + generation + 1))
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert errors == []
@@ -0,0 +1,136 @@
+import asyncio
+import struct
+import pytest
+from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
+from solders.pubkey import Pubkey
+import raydium.create_close_account as pools
+from raydium.pool_refresher import PoolIndexRefresher
+from raydium.pool_resolver import AMM_INFO_V4_ACCOUNT_SIZE, AMM_INFO_V4_OFFSETS, AMM_PROGRAM_ID, MARKET_V3_OFFSETS, WSOL_MINT
+from mock_rpc import MockRpc, RpcError, account_json
+
+SERUM = Pubkey.from_string("srmqPvymJeFKQ4zGQed1GFppgkRHL9kaELCbyksJtPX")
+MARKET_SIZE = 388
+
+
+class Refresher(PoolIndexRefresher):
+    """The real negative cache without the background download."""
+
+    def __init__(self):
+        super().__init__()
+        self.refresh_requests = 0
+
+    def request_refresh(self):
+        self.refresh_requests += 1
+
+
+@pytest.fixture
+def refresher(monkeypatch):
+    refresher = Refresher()
+    monkeypatch.setattr(pools, "get_pool_refresher", lambda: refresher)
+    monkeypatch.setattr(pools, "get_pool_index", lambda: None)
+    return refresher
+
+
+def _pool_accounts(mint: Pubkey, market: Pubkey):
+    amm = bytearray(AMM_INFO_V4_ACCOUNT_SIZE)
+    amm[0:8] = struct.pack("<Q", 6)
+    for name, key in (("base_mint", mint), ("quote_mint", WSOL_MINT), ("market_id", market), ("serum_program_id", SERUM)):
+        amm[AMM_INFO_V4_OFFSETS[name]:AMM_INFO_V4_OFFSETS[name] + 32] = bytes(key)
+    nonce = next(n for n in range(256) if _valid_nonce(market, n))
+    market_data = bytearray(MARKET_SIZE)
+    offset = MARKET_V3_OFFSETS["vault_signer_nonce"]
+    market_data[offset:offset + 8] = nonce.to_bytes(8, "little")
+    return bytes(amm), bytes(market_data)
+
+
+def _valid_nonce(market, nonce):
+    try:
+        Pubkey.create_program_address([bytes(market), nonce.to_bytes(8, "little")], SERUM)
+        return True
+    except BaseException:  # solders panics on seeds that land on the curve
+        return False
+
+
+def _chain(pools_by_mint, fail=False):
+    """RPC handler serving AMM v4 pools for the mints in `pools_by_mint` (mint -> amm id)."""
+    amms = {}  # mint str -> (amm id, amm data)
+    markets = {}  # market str -> market data
+    for mint, amm_id in pools_by_mint.items():
+        market = Pubkey.new_unique()
+        amm, markets[str(market)] = _pool_accounts(mint, market)
+        amms[str(mint)] = (amm_id, amm)
+
+    def handler(method, params):
+        if fail:
+            raise RpcError("internal error")
+        if method == "getProgramAccounts":
+            base = params[1]["filters"][1]["memcmp"]["bytes"]
+            if base not in amms:
+                return []
+            amm_id, amm = amms[base]
+            return [{"pubkey": str(amm_id), "account": account_json(amm, str(AMM_PROGRAM_ID))}]
+        if method == "getAccountInfo":
+            return {"context": {"slot": 1}, "value": account_json(markets[params[0]], str(SERUM))}
+        raise RpcError(f"unexpected {method}")
+
+    return handler
+
+
+def test_resolves_on_chain_when_the_index_misses(refresher):
+    mint, amm_id = Pubkey.new_unique(), Pubkey.new_unique()
+    with MockRpc(_chain({mint: amm_id})) as rpc:
+        pool_keys = pools.fetch_pool_keys(str(mint), Client(rpc.url))
+    assert pool_keys["amm_id"] == amm_id
+    assert pool_keys["base_mint"] == mint and pool_keys["quote_mint"] == WSOL_MINT
+    assert rpc.methods() == ["getProgramAccounts", "getAccountInfo"]
+    assert refresher.refresh_requests == 0
+
+
+def test_on_chain_miss_is_cached(refresher):
+    mint = str(Pubkey.new_unique())
+    with MockRpc(_chain({})) as rpc:
+        client = Client(rpc.url)
+        assert pools.fetch_pool_keys(mint, client) == "failed"
+        scans = len(rpc.calls)
+        assert pools.fetch_pool_keys(mint, client) == "failed"
+        assert pools.fetch_pool_keys(mint, client) == "failed"
+    # both pairings were scanned once; the retries hit the negative cache
+    assert scans == 2 and len(rpc.calls) == 2
+    assert refresher.is_known_missing(mint)
+    assert refresher.refresh_requests == 1
+
+
+def test_rpc_errors_are_not_cached_as_missing(refresher):
+    mint = str(Pubkey.new_unique())
+    with MockRpc(_chain({}, fail=True)) as rpc:
+        assert pools.fetch_pool_keys(mint, Client(rpc.url)) == "failed"
+    assert not refresher.is_known_missing(mint)
+
+
+def test_broken_index_falls_back_to_chain(refresher, monkeypatch):
+    def broken_index():
+        raise OSError("database disk image is malformed")
+
+    monkeypatch.setattr(pools, "get_pool_index", broken_index)
+    mint, amm_id = Pubkey.new_unique(), Pubkey.new_unique()
+    with MockRpc(_chain({mint: amm_id})) as rpc:
+        assert pools.fetch_pool_keys(str(mint), Client(rpc.url))["amm_id"] == amm_id
+
+
+def test_async_lookup_uses_the_negative_cache(refresher):
+    found, missing, amm_id = Pubkey.new_unique(), str(Pubkey.new_unique()), Pubkey.new_unique()
+
+    async def run(url):
+        async with AsyncClient(url) as client:
+            pool_keys = await pools.fetch_pool_keys_async(str(found), client)
+            misses = [await pools.fetch_pool_keys_async(missing, client) for _ in range(3)]
+        return pool_keys, misses
+
+    with MockRpc(_chain({found: amm_id})) as rpc:
+        pool_keys, misses = asyncio.run(run(rpc.url))
+    assert pool_keys["amm_id"] == amm_id
+    assert misses == ["failed"] * 3
+    # found: two pairings and its market; missing: two pairings, once
+    assert rpc.methods().count("getProgramAccounts") == 4
+    assert refresher.refresh_requests == 1
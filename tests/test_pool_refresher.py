@@ -0,0 +1,89 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from solders.pubkey import Pubkey
+from raydium.pool_index import POOL_FIELDS, WSOL_MINT, get_pool_index
+from raydium.pool_refresher import PoolIndexRefresher
+
+
+def _pool(mint: str):
+    pool = {field: str(Pubkey.new_unique()) for _, field in POOL_FIELDS}
+    pool.update(baseMint=mint, quoteMint=WSOL_MINT, baseDecimals=6, quoteDecimals=9)
+    return pool
+
+
+class LiquidityList:
+    """Serves a liquidity list with an ETag, answering 304 to a matching If-None-Match."""
+
+    def __init__(self, mints):
+        self.set(mints)
+        self.requests = []
+        parent = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                parent.requests.append(self.headers.get("If-None-Match"))
+                if self.headers.get("If-None-Match") == parent.etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", parent.etag)
+                self.send_header("Content-Length", str(len(parent.body)))
+                self.end_headers()
+                self.wfile.write(parent.body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/mainnet.json"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def set(self, mints):
+        self.body = json.dumps({"official": [], "unOfficial": [_pool(mint) for mint in mints]}).encode()
+        self.etag = f'"{len(mints)}"'
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def liquidity(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    server = LiquidityList([str(Pubkey.new_unique())])
+    yield server
+    server.close()
+
+
+def test_unchanged_list_is_not_downloaded_again(liquidity, tmp_path):
+    refresher = PoolIndexRefresher(url=liquidity.url, path=str(tmp_path / "pools.db"))
+    assert refresher.refresh() is True
+    assert refresher.refresh() is False
+    assert liquidity.requests == [None, liquidity.etag]
+    assert len(get_pool_index(refresher.path)) == 1
+
+
+def test_new_list_replaces_the_index_and_clears_misses(liquidity, tmp_path):
+    refresher = PoolIndexRefresher(url=liquidity.url, path=str(tmp_path / "pools.db"))
+    refresher.refresh()
+    listed = str(Pubkey.new_unique())
+    refresher.mark_missing(listed)
+    liquidity.set([listed, str(Pubkey.new_unique())])
+    assert refresher.refresh() is True
+    assert not refresher.is_known_missing(listed)
+    assert get_pool_index(refresher.path).lookup(listed) is not None
+
+
+def test_misses_expire():
+    refresher = PoolIndexRefresher(negative_ttl=0.05, max_negative=2)
+    refresher.mark_missing("a")
+    assert refresher.is_known_missing("a")
+    time.sleep(0.06)
+    assert not refresher.is_known_missing("a")
+    for mint in ("b", "c", "d"):
+        refresher.mark_missing(mint)
+    assert [refresher.is_known_missing(mint) for mint in ("b", "c", "d")] == [False, True, True]
@@ -0,0 +1,144 @@
+import asyncio
+import struct
+from solana.rpc.async_api import AsyncClient
+from solders.pubkey import Pubkey
+from engine import prestage
+from engine.prestage import SellStager
+from pumpfun.coin_data import derive_bonding_curve_accounts
+from pumpfun.constants import PUMP_FUN_PROGRAM
+from pumpfun.pda_cache import pda_cache
+from pumpfun.pump_fun import TOKEN_PROGRAM
+from raydium.pool_resolver import AMM_INFO_V4_ACCOUNT_SIZE, AMM_INFO_V4_OFFSETS, WSOL_MINT
+from raydium.quote import TOKEN_AMOUNT_OFFSET, amount_out
+from mock_rpc import MockRpc, account_json
+
+OWNER = Pubkey.new_unique()
+
+
+def _pump_mint() -> str:
+    while True:
+        candidate = str(Pubkey.new_unique())[:-4] + "pump"
+        try:
+            return str(Pubkey.from_string(candidate))
+        except ValueError:
+            continue
+
+
+def _curve(complete=False, creator=bytes(32)):
+    return b"\0" * 8 + struct.pack("<5Q?32s", 800_000_000_000_000, 40_000_000_000, 0, 0, 10**15, complete, creator)
+
+
+class Chain:
+    """getMultipleAccounts over account str -> (data, owner); curves can be swapped later."""
+
+    def __init__(self):
+        self.accounts = {}
+
+    def add_token_account(self, mint: str, balance: int):
+        token_account = pda_cache.associated_token_address(OWNER, Pubkey.from_string(mint))
+        data = bytes(Pubkey.from_string(mint)) + bytes(OWNER) + struct.pack("<Q", balance) + b"\0" * 93
+        self.accounts[str(token_account)] = (data, str(TOKEN_PROGRAM))
+        mint_data = b"\0" * 36 + struct.pack("<QB", 10**15, 6) + b"\1" + b"\0" * 36
+        self.accounts[mint] = (mint_data, str(TOKEN_PROGRAM))
+
+    def add_pump_token(self, mint: str, balance: int, complete=False, creator=bytes(32)):
+        bonding_curve = str(derive_bonding_curve_accounts(mint)[0])
+        self.accounts[bonding_curve] = (_curve(complete, bytes(creator)), str(PUMP_FUN_PROGRAM))
+        self.add_token_account(mint, balance)
+
+    def add_raydium_pool(self, mint: str, token_reserve: int, sol_reserve: int) -> dict:
+        pool_keys = {'amm_id': Pubkey.new_unique(), 'base_mint': Pubkey.from_string(mint), 'quote_mint': WSOL_MINT,
+                     'base_vault': Pubkey.new_unique(), 'quote_vault': Pubkey.new_unique()}
+        amm = bytearray(AMM_INFO_V4_ACCOUNT_SIZE)
+        struct.pack_into("<Q", amm, AMM_INFO_V4_OFFSETS['swap_fee_numerator'], 25)
+        struct.pack_into("<Q", amm, AMM_INFO_V4_OFFSETS['swap_fee_denominator'], 10_000)
+        self.accounts[str(pool_keys['amm_id'])] = (bytes(amm), str(Pubkey.default()))
+        for vault, amount in ((pool_keys['base_vault'], token_reserve), (pool_keys['quote_vault'], sol_reserve)):
+            data = bytearray(165)
+            struct.pack_into("<Q", data, TOKEN_AMOUNT_OFFSET, amount)
+            self.accounts[str(vault)] = (bytes(data), str(TOKEN_PROGRAM))
+        return pool_keys
+
+    def __call__(self, method, params):
+        value = [account_json(*self.accounts[key]) if key in self.accounts else None for key in params[0]]
+        return {"context": {"slot": 1}, "value": value}
+
+
+def test_stage_many_stages_pump_sells_and_warms_the_rest(monkeypatch):
+    warmed = []
+
+    async def fetch_pool_keys_async(mint, client):
+        warmed.append(mint)
+        return "failed"
+
+    monkeypatch.setattr(prestage, "fetch_pool_keys_async", fetch_pool_keys_async)
+    held, empty, graduated = _pump_mint(), _pump_mint(), _pump_mint()
+    creator = Pubkey.new_unique()
+    chain = Chain()
+    chain.add_pump_token(held, 5_000_000)
+    chain.add_pump_token(empty, 0, creator=creator)
+    chain.add_pump_token(graduated, 5_000_000, complete=True)
+
+    async def run(url):
+        async with AsyncClient(url) as client:
+            stager = SellStager(client, OWNER)
+            await stager.stage_many([held, empty, graduated, held])
+            return stager
+
+    with MockRpc(chain) as rpc:
+        stager = asyncio.run(run(rpc.url))
+    assert list(stager._staged) == [held]
+    staged = stager.get(held)
+    assert (staged.raw_balance, staged.decimals) == (5_000_000, 6)
+    assert warmed == [graduated]
+    assert set(rpc.methods()) == {"getMultipleAccounts"}
+    assert stager.value()[held] > 0
+    # warmed even for a token not staged yet: its sell must not pay for the bump search
+    assert pda_cache._get(("creator_vault", bytes(creator))) is not None
+
+
+def test_refresh_drops_completed_curves(monkeypatch):
+    monkeypatch.setattr(prestage, "fetch_pool_keys_async", lambda mint, client: asyncio.sleep(0, "failed"))
+    mint = _pump_mint()
+    chain = Chain()
+    chain.add_pump_token(mint, 5_000_000)
+
+    async def run(url):
+        async with AsyncClient(url) as client:
+            stager = SellStager(client, OWNER)
+            await stager.stage_many([mint])
+            staged = mint in stager
+            chain.add_pump_token(mint, 5_000_000, complete=True)
+            await stager.refresh()
+            await asyncio.sleep(0)
+            return staged, mint in stager
+
+    with MockRpc(chain) as rpc:
+        assert asyncio.run(run(rpc.url)) == (True, False)
+
+
+def test_raydium_holdings_are_valued_on_refresh(monkeypatch):
+    mint = str(Pubkey.new_unique())
+    chain = Chain()
+    chain.add_token_account(mint, 10_000_000)
+    pool_keys = chain.add_raydium_pool(mint, 1_000_000_000, 50_000_000_000)
+
+    async def fetch_pool_keys_async(mint, client):
+        return pool_keys
+
+    monkeypatch.setattr(prestage, "fetch_pool_keys_async", fetch_pool_keys_async)
+
+    async def run(url):
+        async with AsyncClient(url) as client:
+            stager = SellStager(client, OWNER)
+            await stager.stage_many([mint])
+            before = stager.raydium_value()
+            await stager.refresh()
+            after = stager.raydium_value()
+            stager.discard(mint)
+            return before, after, stager.raydium_value()
+
+    with MockRpc(chain) as rpc:
+        before, after, sold = asyncio.run(run(rpc.url))
+    assert before == {} and sold == {}
+    assert after == {mint: amount_out(10_000_000, 1_000_000_000, 50_000_000_000, 25, 10_000)}
@@ -0,0 +1,116 @@
+import struct
+from solana.rpc.api import Client
+from solders.pubkey import Pubkey
+from raydium.pool_resolver import AMM_INFO_V4_ACCOUNT_SIZE, AMM_INFO_V4_OFFSETS, WSOL_MINT
+from raydium.quote import (
+    TOKEN_AMOUNT_OFFSET, PoolReserves, amount_out, amounts_out, decode_pool_reserves, fetch_pool_reserves_many,
+    min_amount_out, quote_holdings, sell_min_amount_out,
+)
+from mock_rpc import MockRpc, account_json
+
+MINT = Pubkey.new_unique()
+# 1,000 tokens (6 decimals) against 50 SOL, 0.25% fee
+TOKEN_RESERVE, SOL_RESERVE = 1_000_000_000, 50_000_000_000
+
+
+def _pool_keys(mint=MINT):
+    return {
+        'amm_id': Pubkey.new_unique(), 'base_mint': mint, 'quote_mint': WSOL_MINT,
+        'base_vault': Pubkey.new_unique(), 'quote_vault': Pubkey.new_unique(),
+    }
+
+
+def _amm_data(base_pnl=0, quote_pnl=0, fee=(25, 10_000)):
+    data = bytearray(AMM_INFO_V4_ACCOUNT_SIZE)
+    for name, value in (('swap_fee_numerator', fee[0]), ('swap_fee_denominator', fee[1]),
+                        ('base_need_take_pnl', base_pnl), ('quote_need_take_pnl', quote_pnl)):
+        struct.pack_into("<Q", data, AMM_INFO_V4_OFFSETS[name], value)
+    return bytes(data)
+
+
+def _vault_data(amount):
+    data = bytearray(165)
+    struct.pack_into("<Q", data, TOKEN_AMOUNT_OFFSET, amount)
+    return bytes(data)
+
+
+def test_amount_out_matches_the_program():
+    # fee ceil(10_000_000 * 25 / 10_000) = 25_000, then the constant product on 9_975_000
+    assert amount_out(10_000_000, TOKEN_RESERVE, SOL_RESERVE, 25, 10_000) == 493_824_104
+    assert amount_out(1_000_000_000, SOL_RESERVE, TOKEN_RESERVE, 25, 10_000) == 19_559_782
+    # the fee rounds up: 1 unit in pays 1 unit of fee and gets nothing
+    assert amount_out(1, TOKEN_RESERVE, SOL_RESERVE, 25, 10_000) == 0
+    assert amount_out(0, TOKEN_RESERVE, SOL_RESERVE, 25, 10_000) == 0
+    assert amount_out(10, 0, SOL_RESERVE, 25, 10_000) == 0
+
+
+def test_min_amount_out():
+    assert min_amount_out(493_824_104, 15) == 419_750_488
+    assert min_amount_out(493_824_104, 0) == 493_824_104
+
+
+def test_reserves_exclude_pending_pnl():
+    pool_keys = _pool_keys()
+    reserves = decode_pool_reserves(pool_keys, _amm_data(base_pnl=5, quote_pnl=7),
+                                    _vault_data(TOKEN_RESERVE + 5), _vault_data(SOL_RESERVE + 7))
+    assert (reserves.base_reserve, reserves.quote_reserve) == (TOKEN_RESERVE, SOL_RESERVE)
+    assert reserves.reserves_for(MINT) == (TOKEN_RESERVE, SOL_RESERVE)
+    assert reserves.reserves_for(WSOL_MINT) == (SOL_RESERVE, TOKEN_RESERVE)
+    assert reserves.quote(str(MINT), 10_000_000) == 493_824_104
+
+
+def _chain(pools):
+    """getMultipleAccounts over the amm and vault accounts of `pools`."""
+    accounts = {}
+    for pool_keys in pools:
+        accounts[str(pool_keys['amm_id'])] = _amm_data()
+        accounts[str(pool_keys['base_vault'])] = _vault_data(TOKEN_RESERVE)
+        accounts[str(pool_keys['quote_vault'])] = _vault_data(SOL_RESERVE)
+
+    def handler(method, params):
+        assert method == "getMultipleAccounts"
+        value = [account_json(accounts[key]) if key in accounts else None for key in params[0]]
+        return {"context": {"slot": 1}, "value": value}
+
+    return handler
+
+
+def test_reserves_are_read_33_pools_per_call():
+    pools = [_pool_keys(Pubkey.new_unique()) for _ in range(40)]
+    with MockRpc(_chain(pools)) as rpc:
+        reserves = fetch_pool_reserves_many(Client(rpc.url), pools)
+    assert [len(params[0]) for _, params in rpc.calls] == [99, 21]
+    assert len(reserves) == 40
+    assert all(isinstance(pool, PoolReserves) and pool.fee_denominator == 10_000 for pool in reserves.values())
+
+
+def test_sell_min_amount_out_from_chain():
+    pool_keys = _pool_keys()
+    with MockRpc(_chain([pool_keys])) as rpc:
+        assert sell_min_amount_out(Client(rpc.url), pool_keys, MINT, 10_000_000, 15) == 419_750_488
+
+
+def test_unreadable_pool_sells_without_bound():
+    with MockRpc(_chain([])) as rpc:
+        assert sell_min_amount_out(Client(rpc.url), _pool_keys(), MINT, 10_000_000, 15) == 0
+
+
+def test_batch_quote_matches_the_exact_quote():
+    amounts = [0, 1, 10_000_000, 123_456_789, 999_999_999]
+    quotes = amounts_out(amounts, [TOKEN_RESERVE] * 5, [SOL_RESERVE] * 5, [25] * 5, [10_000] * 5)
+    assert quotes.tolist() == [amount_out(amount, TOKEN_RESERVE, SOL_RESERVE, 25, 10_000) for amount in amounts]
+
+
+def test_quote_holdings_prices_each_side_of_its_pool():
+    token_pool, sol_pool, unread = _pool_keys(), _pool_keys(WSOL_MINT), _pool_keys()
+    sol_pool['quote_mint'] = MINT
+    reserves = {
+        str(token_pool['amm_id']): PoolReserves(token_pool['amm_id'], MINT, WSOL_MINT, TOKEN_RESERVE, SOL_RESERVE, 25, 10_000),
+        str(sol_pool['amm_id']): PoolReserves(sol_pool['amm_id'], WSOL_MINT, MINT, SOL_RESERVE, TOKEN_RESERVE, 25, 10_000),
+    }
+    holdings = [(MINT, 10_000_000, token_pool), (str(MINT), 77_777_777, sol_pool), (MINT, 10_000_000, unread)]
+    assert quote_holdings(holdings, reserves).tolist() == [
+        reserves[str(token_pool['amm_id'])].quote(MINT, 10_000_000),
+        reserves[str(sol_pool['amm_id'])].quote(MINT, 77_777_777),
+        0,
+    ]
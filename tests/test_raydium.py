@@ -0,0 +1,126 @@
+import asyncio
+import time
+from types import SimpleNamespace
+import pytest
+from solana.rpc.api import RPCException
+from solders.hash import Hash
+from solders.instruction import Instruction
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from spl.token.constants import TOKEN_PROGRAM_ID
+import raydium.Raydium as Raydium
+import raydium.sell_swap as sell_swap
+from engine.executor import sell_outcome
+
+MINT = "7GCihgDB8fe6KNjn2MYtkzZcRjQy3t9GHdC8uHYmW2hr"
+
+
+def _patch(monkeypatch, result):
+    async def sell_async(**kwargs):
+        return result
+
+    monkeypatch.setattr(Raydium, "getSymbol", lambda address: ("TOKEN", "SOL"))
+    monkeypatch.setattr(Raydium, "sell", lambda **kwargs: result)
+    monkeypatch.setattr(Raydium, "sell_async", sell_async)
+
+
+def test_unconfirmed_sell_stays_unknown(monkeypatch):
+    _patch(monkeypatch, None)
+    assert sell_outcome(Raydium.raydium_swap(None, None, MINT)) is None
+    assert sell_outcome(asyncio.run(Raydium.raydium_swap_async(None, None, MINT))) is None
+
+
+def test_failed_and_confirmed_sells(monkeypatch):
+    _patch(monkeypatch, "failed")
+    assert sell_outcome(Raydium.raydium_swap(None, None, MINT)) is False
+    _patch(monkeypatch, "5signature")
+    assert Raydium.raydium_swap(None, None, MINT) == "5signature"
+
+
+class FakeClient:
+    """The wallet holds `balance` of MINT; every send is counted and answered by `send`."""
+
+    def __init__(self, balance=1_000_000, send=lambda: Keypair().sign_message(b"sell")):
+        self.balance = balance
+        self.send = send
+        self.balance_reads = 0
+        self.sends = 0
+
+    def _accounts(self):
+        self.balance_reads += 1
+        info = {'mint': MINT, 'tokenAmount': {'amount': str(self.balance)}}
+        return SimpleNamespace(value=[SimpleNamespace(account=SimpleNamespace(data=SimpleNamespace(parsed={'info': info})))])
+
+    def get_token_accounts_by_owner_json_parsed(self, owner, opts):
+        return self._accounts()
+
+    def send_transaction(self, txn, opts=None):
+        self.sends += 1
+        return SimpleNamespace(value=self.send())
+
+
+class FakeAsyncClient(FakeClient):
+
+    async def get_token_accounts_by_owner_json_parsed(self, owner, opts):
+        return self._accounts()
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    """Everything a Raydium sell reads besides the wallet balance, resolved locally."""
+    async def resolved(value):
+        return value
+
+    mint_info = SimpleNamespace(program_id=TOKEN_PROGRAM_ID)
+    monkeypatch.setattr(sell_swap, "mint_cache", SimpleNamespace(fetch=lambda client, mint: mint_info,
+                                                                 fetch_async=lambda client, mint: resolved(mint_info)))
+    monkeypatch.setattr(sell_swap, "fetch_pool_keys", lambda mint, client: {'amm_id': Pubkey.new_unique()})
+    monkeypatch.setattr(sell_swap, "fetch_pool_keys_async", lambda mint, client: resolved({'amm_id': Pubkey.new_unique()}))
+    monkeypatch.setattr(sell_swap, "sell_get_token_account", lambda client, owner, mint: Pubkey.new_unique())
+    monkeypatch.setattr(sell_swap, "sell_get_token_account_async", lambda client, owner, mint: resolved(Pubkey.new_unique()))
+    monkeypatch.setattr(sell_swap, "get_token_account", lambda client, owner, mint: (Pubkey.new_unique(), None))
+    monkeypatch.setattr(sell_swap, "get_token_account_async", lambda client, owner, mint: resolved((Pubkey.new_unique(), None)))
+    monkeypatch.setattr(sell_swap, "make_swap_instruction", lambda *args, **kwargs: Instruction(Pubkey.new_unique(), b"", []))
+    monkeypatch.setattr(sell_swap, "recent_blockhash", lambda client: Hash.default())
+    monkeypatch.setattr(sell_swap, "recent_blockhash_info_async",
+                        lambda client: resolved(SimpleNamespace(blockhash=Hash.default(), last_valid_block_height=150)))
+    monkeypatch.setattr(time, "sleep", lambda seconds: None)
+    return monkeypatch
+
+
+def _sell(client):
+    return sell_swap.sell(client, MINT, Keypair(), "TOKEN", "SOL")
+
+
+def test_swap_failed_on_chain_is_sent_once(chain):
+    chain.setattr(sell_swap, "confirm_signature_blocking", lambda client, signature: False)
+    client = FakeClient()
+    assert _sell(client) == "failed"
+    assert client.sends == 1
+
+
+def test_rejected_send_is_not_resent(chain):
+    def rejected():
+        raise RPCException(SimpleNamespace(message="custom program error: 0x1e"))
+
+    client = FakeClient(send=rejected)
+    assert _sell(client) == "failed"
+    assert client.sends == 1
+
+
+def test_empty_balance_gives_up(chain):
+    client = FakeClient(balance=0)
+    assert sell_swap.sell(client, MINT, Keypair(), "TOKEN", "SOL", max_balance_retries=3) == "failed"
+    assert (client.balance_reads, client.sends) == (3, 0)
+
+
+def test_async_swap_failed_on_chain_is_sent_once(chain):
+    sends = []
+
+    async def send_and_confirm(client, txn, last_valid_block_height=None, detected_at=None):
+        sends.append(txn)
+        return True, False
+
+    chain.setattr(sell_swap, "send_and_confirm", send_and_confirm)
+    result = asyncio.run(sell_swap.sell_async(FakeAsyncClient(), MINT, Keypair(), "TOKEN", "SOL"))
+    assert result == "failed" and len(sends) == 1
@@ -0,0 +1,22 @@
+from engine.registry import TokenRecord, TokenRegistry
+from engine.state_store import JournalTokenStore
+
+
+def test_registry_writes_through_to_its_store(tmp_path):
+    path = str(tmp_path / "tokens.journal")
+    registry = TokenRegistry(JournalTokenStore(path))
+    registry.add([TokenRecord("a", "A", 5, 100), TokenRecord("b", "B", 7, 200)])
+    registry.remove("a")
+    registry.store.close()
+
+    reopened = TokenRegistry(JournalTokenStore(path))
+    assert "a" not in reopened and len(reopened) == 1
+    assert reopened.get("b").to_dict() == {"symbol": "B", "token_id": "b", "balance": 7, "detection_time": 200}
+
+
+def test_new_ids_and_due():
+    registry = TokenRegistry()
+    registry.add([TokenRecord("a", detection_time=100), TokenRecord("b", detection_time=200)])
+    assert registry.new_ids(["a", "c"]) == {"c"}
+    assert [token.token_id for token in registry.due(now=260, threshold_seconds=100)] == ["a"]
+
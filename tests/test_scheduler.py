@@ -0,0 +1,83 @@
+import asyncio
+from engine.scheduler import SellScheduler
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_pops_due_tokens_in_deadline_order():
+    scheduler = SellScheduler(clock=Clock())
+    scheduler.schedule("late", 1010, "L")
+    scheduler.schedule("early", 1001, "E")
+    scheduler.schedule("later", 1020, "X")
+    assert scheduler.next_deadline() == 1001
+    assert scheduler.pop_due(1005) == [("early", "E")]
+    assert scheduler.pop_due(1015) == [("late", "L")]
+    assert len(scheduler) == 1 and "later" in scheduler
+
+
+def test_reschedule_and_cancel_leave_no_stale_fires():
+    scheduler = SellScheduler(clock=Clock())
+    scheduler.schedule("a", 1001, "first")
+    scheduler.schedule("a", 1030, "second")
+    scheduler.schedule("b", 1002)
+    scheduler.cancel("b")
+    assert scheduler.pop_due(1010) == []
+    assert scheduler.next_deadline() == 1030
+    assert scheduler.pop_due(1030) == [("a", "second")]
+    assert scheduler.next_deadline() is None
+
+
+def test_heap_is_compacted():
+    scheduler = SellScheduler(clock=Clock())
+    for deadline in range(1000):
+        scheduler.schedule("same", 2000 + deadline)
+    assert len(scheduler._heap) <= 2 * len(scheduler) + 65
+
+
+def test_run_fires_due_tokens_together():
+    async def run():
+        loop = asyncio.get_running_loop()
+        scheduler = SellScheduler(clock=loop.time)
+        fired = []
+        now = loop.time()
+        scheduler.schedule("a", now + 0.05, 1)
+        scheduler.schedule("b", now + 0.05, 2)
+        scheduler.schedule("c", now + 10, 3)
+        task = asyncio.create_task(scheduler.run(fired.append))
+        await asyncio.sleep(0.15)
+        # a token scheduled while the loop sleeps wakes it up early
+        scheduler.schedule("d", loop.time(), 4)
+        await asyncio.sleep(0.05)
+        task.cancel()
+        return fired
+
+    fired = asyncio.run(run())
+    assert fired == [[("a", 1), ("b", 2)], [("d", 4)]]
+
+
+def test_run_survives_a_failing_fire():
+    async def run():
+        loop = asyncio.get_running_loop()
+        scheduler = SellScheduler(clock=loop.time)
+        calls = []
+
+        def fire(due):
+            calls.append(due)
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+
+        scheduler.schedule("a", loop.time())
+        task = asyncio.create_task(scheduler.run(fire))
+        await asyncio.sleep(0.05)
+        scheduler.schedule("b", loop.time())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        return calls
+
+    assert [[token for token, _ in due] for due in asyncio.run(run())] == [["a"], ["b"]]
@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+import auto_sell
+from engine.executor import SellExecutor, BUILDING, SENT, PENDING, CONFIRMED, UNCONFIRMED_RETRY_DELAY, mark_sent
+from engine.registry import TokenRecord, TokenRegistry
+
+SOLD, UNCONFIRMED, NOT_SENT = "Asoldpump", "Bunconfirmedpump", "Cnotsentpump"
+
+
+class Stager:
+    def __init__(self, mints):
+        self._staged = {mint: f"staged {mint}" for mint in mints}
+
+    def __contains__(self, mint):
+        return mint in self._staged
+
+    def get(self, mint):
+        return self._staged[mint]
+
+    def discard(self, mint):
+        self._staged.pop(mint, None)
+
+
+def _sell_due(monkeypatch, batch_sell):
+    mints = [SOLD, UNCONFIRMED, NOT_SENT]
+    registry = TokenRegistry()
+    registry.add([TokenRecord(mint, detection_time=0) for mint in mints])
+    executor = SellExecutor(backoff=0.0)
+    claimed = [(registry.get(mint), executor.claim(mint)) for mint in mints]
+    single, retried = [], []
+
+    async def sell_token_async(ctx, payer, token, percentage, slippage, coin_data=None, staged=None):
+        single.append(token.token_id)
+        return "signature"
+
+    monkeypatch.setattr(auto_sell, "pf_sell_staged_batch_async", batch_sell)
+    monkeypatch.setattr(auto_sell, "sell_token_async", sell_token_async)
+    try:
+        asyncio.run(auto_sell.sell_due_async(None, None, registry, Stager(mints), executor, claimed,
+                                             lambda token: retried.append(token.token_id), 100, 15, batch=True))
+    finally:
+        # whatever happened, no job is left holding its lease mid-sell
+        assert not any(executor.state(mint) in (BUILDING, SENT) for mint in mints)
+    return registry, executor, single, retried
+
+
+def test_batch_members_are_finished_by_their_batch_result(monkeypatch):
+    async def batch_sell(ctx, payer, staged_sells, percentage, slippage, detected_at):
+        mark_sent()
+        # NOT_SENT's batch was not accepted anywhere
+        return {SOLD: True, UNCONFIRMED: None}
+
+    registry, executor, single, retried = _sell_due(monkeypatch, batch_sell)
+    # the unconfirmed member may still land and is not sent again on its own
+    assert single == [NOT_SENT]
+    assert retried == [UNCONFIRMED]
+    assert executor.state(UNCONFIRMED) == PENDING
+    assert executor.retry_delay(UNCONFIRMED) > UNCONFIRMED_RETRY_DELAY - 1
+    assert SOLD not in registry and NOT_SENT not in registry
+    assert executor.stats[CONFIRMED] == 2
+
+
+def test_batch_failure_releases_every_job(monkeypatch):
+    async def batch_sell(ctx, payer, staged_sells, percentage, slippage, detected_at):
+        raise RuntimeError("rpc down")
+
+    registry, executor, single, retried = _sell_due(monkeypatch, batch_sell)
+    assert single == []
+    assert sorted(retried) == sorted([SOLD, UNCONFIRMED, NOT_SENT])
+    assert all(executor.state(mint) == PENDING for mint in retried)
+
+
+def test_cancelled_batch_does_not_leak_leases(monkeypatch):
+    async def batch_sell(ctx, payer, staged_sells, percentage, slippage, detected_at):
+        mark_sent()
+        raise asyncio.CancelledError()
+
+    with pytest.raises(asyncio.CancelledError):
+        _sell_due(monkeypatch, batch_sell)
+
+
+def _sell_staged(monkeypatch, staged_result):
+    rebuilt = []
+
+    async def pf_sell_staged_async(ctx, payer, staged, percentage, slippage, detected_at):
+        return staged_result
+
+    async def pf_sell_async(**kwargs):
+        rebuilt.append(kwargs["mint_str"])
+        return True
+
+    monkeypatch.setattr(auto_sell, "pf_sell_staged_async", pf_sell_staged_async)
+    monkeypatch.setattr(auto_sell, "pf_sell_async", pf_sell_async)
+    token = TokenRecord(SOLD, detection_time=0)
+    result = asyncio.run(auto_sell.sell_token_async(None, None, token, 100, 15, staged="staged"))
+    return result, rebuilt
+
+
+def test_unconfirmed_staged_sell_is_not_rebuilt(monkeypatch):
+    assert _sell_staged(monkeypatch, None) == (None, [])
+    assert _sell_staged(monkeypatch, True) == (True, [])
+
+
+def test_staged_sell_not_sent_falls_back(monkeypatch):
+    assert _sell_staged(monkeypatch, False) == (True, [SOLD])
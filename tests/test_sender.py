@@ -0,0 +1,95 @@
+import asyncio
+import time
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.message import MessageV0
+from solders.system_program import TransferParams, transfer
+from solders.transaction import VersionedTransaction
+from engine import sender as sender_module
+from engine.executor import SellExecutor
+from engine.sender import FanoutSender, send_and_confirm
+from mock_rpc import MockRpc, RpcError
+
+
+def _transaction():
+    payer = Keypair()
+    instruction = transfer(TransferParams(from_pubkey=payer.pubkey(), to_pubkey=Keypair().pubkey(), lamports=1))
+    return VersionedTransaction(MessageV0.try_compile(payer.pubkey(), [instruction], [], Hash.new_unique()), [payer])
+
+
+def _endpoint(accept=True, delay=0.0, lands_after=None, block_height=100):
+    """Handler of one mock RPC: accepts (after `delay`) or rejects sendTransaction, and
+    reports the signature confirmed once it has seen `lands_after` sends."""
+    state = {"sends": 0, "height": block_height}
+
+    def handler(method, params):
+        if method == "sendTransaction":
+            time.sleep(delay)
+            if not accept:
+                raise RpcError("node is unhealthy")
+            state["sends"] += 1
+            return "signature"
+        if method == "getSignatureStatuses":
+            if lands_after is None or state["sends"] < lands_after:
+                return {"context": {"slot": 1}, "value": [None]}
+            return {"context": {"slot": 1}, "value": [{"slot": 1, "confirmations": None, "err": None, "confirmationStatus": "confirmed"}]}
+        if method == "getBlockHeight":
+            return state["height"]
+        raise RpcError(f"unexpected {method}")
+
+    return handler
+
+
+def _send(urls, executor=None, **kwargs):
+    executor = executor or SellExecutor()
+    job = executor.claim("mint")
+
+    async def run():
+        async with FanoutSender(urls, rebroadcast_interval=0.05, **kwargs) as fanout:
+            sender_module.set_transaction_sender(fanout)
+            try:
+                outcome = {}
+
+                async def sell():
+                    outcome["result"] = await send_and_confirm(None, _transaction(), 1_000)
+                    return outcome["result"][1]
+
+                await executor.run_async(job, sell)
+                return outcome["result"], fanout
+            finally:
+                sender_module.set_transaction_sender(None)
+
+    (sent, confirmed), fanout = asyncio.run(run())
+    return sent, confirmed, fanout, job
+
+
+def test_first_accepting_endpoint_wins():
+    with MockRpc(_endpoint(accept=False)) as rejecting, \
+            MockRpc(_endpoint(delay=1.5)) as slow, \
+            MockRpc(_endpoint(lands_after=1)) as fast:
+        start = time.monotonic()
+        sent, confirmed, fanout, job = _send([rejecting.url, slow.url, fast.url])
+        elapsed = time.monotonic() - start
+    assert sent and confirmed is True
+    assert job.sent_at is not None
+    assert fanout.first_landed_counts == {fast.url: 1}
+    # confirmed without waiting for the slow endpoint to answer
+    assert elapsed < 1.0
+    assert slow.methods()[0] == "sendTransaction"
+
+
+def test_all_endpoints_rejecting():
+    with MockRpc(_endpoint(accept=False)) as first, MockRpc(_endpoint(accept=False)) as second:
+        sent, confirmed, fanout, job = _send([first.url, second.url])
+    assert (sent, confirmed) == (False, None)
+    # nothing went out, so the sell is not marked sent and is not polled for
+    assert job.sent_at is None
+    assert first.methods() == second.methods() == ["sendTransaction"]
+    assert not fanout.first_landed_counts
+
+
+def test_rebroadcasts_until_blockhash_expires():
+    with MockRpc(_endpoint(block_height=1_001)) as endpoint:
+        sent, confirmed, fanout, job = _send([endpoint.url])
+    assert (sent, confirmed) == (True, None)
+    assert endpoint.methods().count("getBlockHeight") == 1
@@ -0,0 +1,54 @@
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.transaction import VersionedTransaction
+from pumpfun.coin_data import CoinData
+from pumpfun.pump_fun import (
+    MAX_TRANSACTION_SIZE, StagedSell, _batch_message, _transaction_size, build_staged_sell_batches,
+    make_sell_instruction,
+)
+
+PAYER = Keypair()
+
+
+def _staged_sell(raw_balance=5_000_000_000):
+    coin = CoinData(
+        mint=Pubkey.new_unique(),
+        bonding_curve=Pubkey.new_unique(),
+        associated_bonding_curve=Pubkey.new_unique(),
+        virtual_token_reserves=800_000_000_000_000,
+        virtual_sol_reserves=40_000_000_000,
+        token_total_supply=1_000_000_000_000_000,
+        complete=False,
+        creator=Pubkey.new_unique(),
+    )
+    return StagedSell(str(coin.mint), coin, PAYER.pubkey(), raw_balance, 6)
+
+
+def _instruction(staged):
+    return make_sell_instruction(staged.coin_data, PAYER.pubkey(), 1, 0, staged.accounts)
+
+
+def test_transaction_size_is_the_wire_size():
+    staged = [_staged_sell() for _ in range(3)]
+    message = _batch_message(PAYER.pubkey(), [_instruction(sell) for sell in staged], Hash.default())
+    assert _transaction_size(message) == len(bytes(VersionedTransaction(message, [PAYER])))
+
+
+def test_batches_fill_up_to_the_size_limit():
+    staged = [_staged_sell() for _ in range(20)]
+    batches = build_staged_sell_batches(staged, PAYER, 100, 15, Hash.default())
+    assert [sell for _, members in batches for sell in members] == staged
+    assert len(batches) > 1
+    for i, (txn, members) in enumerate(batches):
+        assert len(bytes(txn)) <= MAX_TRANSACTION_SIZE
+        if i + 1 < len(batches):
+            # one more sell would not have fit
+            grown = [_instruction(sell) for sell in members + [batches[i + 1][1][0]]]
+            assert _transaction_size(_batch_message(PAYER.pubkey(), grown, Hash.default())) > MAX_TRANSACTION_SIZE
+
+
+def test_empty_balances_are_left_out():
+    staged = [_staged_sell(), _staged_sell(raw_balance=0)]
+    batches = build_staged_sell_batches(staged, PAYER, 100, 15, Hash.default())
+    assert [members for _, members in batches] == [[staged[0]]]
@@ -0,0 +1,74 @@
+import json
+import pytest
+from engine import state_store
+from engine.state_store import JournalTokenStore, JsonTokenStore, SqliteTokenStore, open_token_store
+
+
+def _token(token_id, detection_time=100, balance=5):
+    return {"symbol": token_id.upper(), "token_id": token_id, "balance": balance, "detection_time": detection_time}
+
+
+STORES = {
+    "json": lambda tmp_path: JsonTokenStore(str(tmp_path / "tokens.json")),
+    "sqlite": lambda tmp_path: SqliteTokenStore(str(tmp_path / "tokens.db")),
+    "journal": lambda tmp_path: JournalTokenStore(str(tmp_path / "tokens.journal")),
+}
+
+
+@pytest.fixture(params=sorted(STORES))
+def open_store(request, tmp_path):
+    return lambda: STORES[request.param](tmp_path)
+
+
+def test_round_trips_across_reopen(open_store):
+    store = open_store()
+    store.add([_token("a", 100), _token("b", 200, balance="1.5")])
+    store.remove("a")
+    store.add([_token("c", 300)])
+    store.close()
+
+    store = open_store()
+    assert "a" not in store and len(store) == 2
+    assert store.get("b") == _token("b", 200, balance="1.5")
+    assert [token["token_id"] for token in store.due(now=420, threshold_seconds=200)] == ["b"]
+    store.clear()
+    store.close()
+    assert len(open_store()) == 0
+
+
+def test_journal_drops_a_torn_tail(tmp_path):
+    path = str(tmp_path / "tokens.journal")
+    store = JournalTokenStore(path)
+    store.add([_token("a"), _token("b")])
+    store.close()
+    with open(path, "a") as file:
+        file.write('{"op":"remove","token_id":"a"')  # crash mid-write
+    store = JournalTokenStore(path)
+    assert sorted(token["token_id"] for token in store.all()) == ["a", "b"]
+    store.remove("b")
+    store.close()
+    assert [token["token_id"] for token in JournalTokenStore(path).all()] == ["a"]
+
+
+def test_journal_compacts(tmp_path):
+    path = str(tmp_path / "tokens.journal")
+    store = JournalTokenStore(path, compact_min_records=10)
+    for i in range(30):
+        store.add([_token(f"t{i}")])
+        store.remove(f"t{i}")
+    store.add([_token("kept")])
+    store.close()
+    with open(path) as file:
+        assert len(file.readlines()) <= 11
+    assert [token["token_id"] for token in JournalTokenStore(path).all()] == ["kept"]
+
+
+def test_new_backend_imports_legacy_json(tmp_path, monkeypatch):
+    legacy = tmp_path / "wallet_tokens.json"
+    legacy.write_text(json.dumps([_token("a", 123)]))
+    monkeypatch.setattr(state_store, "WALLET_TOKENS_JSON", str(legacy))
+    store = open_token_store("sqlite", str(tmp_path / "tokens.db"))
+    assert store.get("a")["detection_time"] == 123
+    store.close()
+    with pytest.raises(ValueError):
+        open_token_store("redis")
@@ -0,0 +1,80 @@
+import asyncio
+import httpx
+from solders.pubkey import Pubkey
+from auto_sell import get_assets_by_owner, get_assets_by_owner_async, track_wallet_tokens, write_wallet_tokens
+from engine.prestage import SellStager
+from engine.registry import TokenRegistry
+from engine.scheduler import SellScheduler
+from mock_rpc import MockRpc, RpcError
+
+WALLET = "Wa11et1111111111111111111111111111111111111"
+
+
+def _asset(mint, balance, interface="FungibleToken", symbol="TKN"):
+    return {"id": mint, "interface": interface, "token_info": {"symbol": symbol, "balance": balance}}
+
+
+def _scan(url):
+    async def run():
+        async with httpx.AsyncClient() as http:
+            return await get_assets_by_owner_async(http, url, WALLET)
+
+    return asyncio.run(run())
+
+
+def test_scan_keeps_fungible_tokens_with_a_balance():
+    items = [_asset("mintA", 5), _asset("mintB", 0), _asset("nft", 1, interface="V1_NFT"), _asset("mintC", "12.5")]
+    with MockRpc(lambda method, params: {"items": items}) as rpc:
+        tokens = _scan(rpc.url)
+    assert [token["id"] for token in tokens] == ["mintA", "mintC"]
+    assert rpc.calls[0][0] == "getAssetsByOwner"
+    assert rpc.calls[0][1]["ownerAddress"] == WALLET
+
+
+def test_failed_scan_is_none_not_empty():
+    with MockRpc(lambda method, params: {}) as rpc:
+        url = rpc.url
+    # the server is gone: "could not look" must not read as "wallet is empty"
+    assert _scan(url) is None
+
+
+def test_write_wallet_tokens_adds_new_mints_only():
+    registry = TokenRegistry()
+    first = write_wallet_tokens([_asset("mintA", 5)], registry)
+    assert [token.token_id for token in first] == ["mintA"]
+    detected_at = registry.get("mintA").detection_time
+    second = write_wallet_tokens([_asset("mintA", 5), _asset("mintB", 1)], registry)
+    assert [token.token_id for token in second] == ["mintB"]
+    assert registry.get("mintA").detection_time == detected_at
+    assert write_wallet_tokens([], registry) == []
+    assert len(registry) == 0
+
+
+def test_rpc_error_reply_leaves_pending_sells_alone():
+    def rate_limited(method, params):
+        raise RpcError("rate limited")
+
+    registry, scheduler, stager = TokenRegistry(), SellScheduler(), SellStager(None, Pubkey.new_unique())
+    track_wallet_tokens([_asset("mintA", 5)], registry, scheduler, stager, 60)
+    detected_at = registry.get("mintA").detection_time
+    with MockRpc(rate_limited) as rpc:
+        async_scan = _scan(rpc.url)
+        sync_scan = get_assets_by_owner(rpc.url, WALLET)
+    assert async_scan is None and sync_scan is None
+    assert track_wallet_tokens(async_scan, registry, scheduler, stager, 60) == []
+    assert write_wallet_tokens(sync_scan, registry) == []
+    assert registry.get("mintA").detection_time == detected_at
+    assert "mintA" in scheduler
+
+
+def test_sync_scan_of_an_unreachable_node_is_none():
+    with MockRpc(lambda method, params: {}) as rpc:
+        url = rpc.url
+    assert get_assets_by_owner(url, WALLET) is None
+
+
+def test_empty_wallet_drops_pending_sells():
+    registry, scheduler, stager = TokenRegistry(), SellScheduler(), SellStager(None, Pubkey.new_unique())
+    track_wallet_tokens([_asset("mintA", 5)], registry, scheduler, stager, 60)
+    track_wallet_tokens([], registry, scheduler, stager, 60)
+    assert len(registry) == 0 and "mintA" not in scheduler
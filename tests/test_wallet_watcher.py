@@ -0,0 +1,84 @@
+import asyncio
+import base64
+import json
+import struct
+import websockets
+from solders.pubkey import Pubkey
+from engine.wallet_watcher import TOKEN_ACCOUNT_SIZE, WalletWatcher, parse_token_account, ws_url_from_http
+
+WALLET = str(Pubkey.new_unique())
+MINT = Pubkey.new_unique()
+
+
+def _account_data(owner=WALLET, amount=42):
+    data = bytes(MINT) + bytes(Pubkey.from_string(owner)) + struct.pack("<Q", amount)
+    return data + b"\0" * (TOKEN_ACCOUNT_SIZE - len(data))
+
+
+def _notification(data):
+    return json.dumps({
+        "jsonrpc": "2.0",
+        "method": "programNotification",
+        "params": {"subscription": 11, "result": {
+            "context": {"slot": 1},
+            "value": {"pubkey": "account", "account": {"data": [base64.b64encode(data).decode(), "base64"]}},
+        }},
+    })
+
+
+def test_ws_url_from_http():
+    assert ws_url_from_http("https://rpc.example/?key=1") == "wss://rpc.example/?key=1"
+    assert ws_url_from_http("http://127.0.0.1:8899") == "ws://127.0.0.1:8899"
+
+
+def test_parse_token_account():
+    assert parse_token_account(_account_data()) == (str(MINT), WALLET, 42)
+
+
+async def _watch(refused_handshakes, drops):
+    """Runs a watcher against a stand-in server that refuses the first handshakes with a
+    503, then closes the first accepted sockets right after subscribing."""
+    attempts = []
+    tokens = []
+    reconciles = []
+
+    async def process_request(path, headers):
+        attempts.append(path)
+        if len(attempts) <= refused_handshakes:
+            return 503, [], b"busy\n"
+
+    async def handler(ws):
+        for _ in range(2):
+            request = json.loads(await ws.recv())
+            await ws.send(json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": request["id"] + 10}))
+        if len(attempts) <= refused_handshakes + drops:
+            return
+        await ws.send(_notification(_account_data(owner=str(Pubkey.new_unique()))))
+        await ws.send(_notification(_account_data()))
+        await asyncio.sleep(1)
+
+    async def reconcile():
+        reconciles.append(len(attempts))
+        return []
+
+    async with websockets.serve(handler, "127.0.0.1", 0, process_request=process_request) as server:
+        port = server.sockets[0].getsockname()[1]
+        watcher = WalletWatcher(f"ws://127.0.0.1:{port}", WALLET, tokens.extend, reconcile=reconcile,
+                                reconnect_delay=0.01, max_reconnect_delay=0.05)
+        task = asyncio.create_task(watcher.run())
+        for _ in range(200):
+            if tokens:
+                break
+            await asyncio.sleep(0.01)
+        watcher.stop()
+        await asyncio.wait_for(task, 2)
+    return attempts, tokens, reconciles
+
+
+def test_reconnects_after_refused_handshakes_and_drops():
+    attempts, tokens, reconciles = asyncio.run(_watch(refused_handshakes=2, drops=1))
+    assert len(attempts) == 4
+    # every successful subscribe is followed by a reconcile
+    assert reconciles == [3, 4]
+    assert [token["id"] for token in tokens] == [str(MINT)]
+    assert tokens[0]["balance"] == 42